@@ -0,0 +1,102 @@
+"""
+Benchmark de la canonicalisation d'URLs sur des listes de liens de pages réelles.
+
+Compare normalize_url non mémoïsé (ancien comportement), UrlCanonicalizer sans cache
+et UrlCanonicalizer avec cache LRU, et mesure combien de variantes sont fusionnées.
+
+Usage:
+  python benchmarks/bench_canonical.py --html pages/            # pages HTML sauvegardées
+  python benchmarks/bench_canonical.py --mongo                  # URLs stockées (crawled_data, url_history)
+"""
+import argparse
+import os
+import sys
+import time
+from urllib.parse import urljoin
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+from crawler.canonical import UrlCanonicalizer  # noqa: E402
+from crawler.web_crawler import AdvancedAntiBlockingStrategy  # noqa: E402
+
+
+def links_from_html(paths):
+    """Une liste de liens absolus par page HTML (base = <link rel=canonical> ou nom de fichier)"""
+    pages = []
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.extend(os.path.join(root, name) for name in names if name.endswith((".html", ".htm")))
+        else:
+            files.append(path)
+    for file_path in sorted(files):
+        with open(file_path, "rb") as handle:
+            soup = BeautifulSoup(handle.read(), "html.parser")
+        base = soup.find("link", rel="canonical", href=True)
+        base_url = base["href"] if base else "https://localhost/"
+        pages.append([urljoin(base_url, a["href"]) for a in soup.find_all("a", href=True)])
+    return pages
+
+
+def links_from_mongo(limit):
+    """Les URLs stockées, découpées en pages de 100 liens"""
+    from config.settings import DATABASE_NAME, MONGODB_URI
+    import pymongo
+
+    client = pymongo.MongoClient(MONGODB_URI, serverSelectionTimeoutMS=3000)
+    db = client[DATABASE_NAME]
+    urls = [doc["url"] for doc in db["crawled_data"].find({}, {"url": 1}).limit(limit) if doc.get("url")]
+    urls += [doc["url"] for doc in db["url_history"].find({}, {"url": 1}).limit(limit) if doc.get("url")]
+    client.close()
+    return [urls[i:i + 100] for i in range(0, len(urls), 100)]
+
+
+def timed(func, pages, repeat):
+    keys = set()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for links in pages:
+            for link in links:
+                keys.add(func(link))
+    return time.perf_counter() - started, keys
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--html", nargs="*", default=[], help="fichiers ou dossiers de pages HTML")
+    parser.add_argument("--mongo", action="store_true", help="utiliser les URLs stockées dans MongoDB")
+    parser.add_argument("--limit", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3, help="passes (menus répétés d'une page à l'autre)")
+    args = parser.parse_args()
+
+    pages = links_from_html(args.html) if args.html else []
+    if args.mongo:
+        pages += links_from_mongo(args.limit)
+    total = sum(len(links) for links in pages)
+    if not total:
+        print("❌ Aucun lien: passez --html <pages> ou --mongo")
+        return 1
+
+    uncached_normalize = AdvancedAntiBlockingStrategy.normalize_url.__wrapped__
+    canonicalizer = UrlCanonicalizer()
+    cases = [
+        ("normalize_url (sans cache)", uncached_normalize),
+        ("canonicalizer (sans cache)", canonicalizer._canonicalize),
+        ("canonicalizer (LRU)", UrlCanonicalizer().canonicalize),
+    ]
+
+    print(f"{len(pages)} pages, {total} liens, {args.repeat} passes\n")
+    print(f"{'méthode':<28} {'µs/lien':>8} {'clés':>8}")
+    for label, func in cases:
+        elapsed, keys = timed(func, pages, args.repeat)
+        print(f"{label:<28} {elapsed / (total * args.repeat) * 1e6:>8.2f} {len(keys):>8}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,201 @@
+"""
+Benchmark de capacité du flux SSE: serveur Flask threadé vs mode ASGI (server/asgi.py).
+
+Démarre chaque serveur dans un sous-processus sur un port local, ouvre N abonnés
+/api/stream simultanés (httpx asynchrone), puis mesure: abonnés connectés (snapshot reçu),
+threads et mémoire du serveur, latence de /api/jobs pendant que les flux sont ouverts et
+délai de diffusion d'un événement (job lancé sur une URL injoignable) à tous les abonnés.
+
+Usage: python benchmarks/bench_sse.py [--clients 500] [--modes flask,asgi]
+Dépendances: pip install hypercorn httpx
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FLASK_CMD = (
+    "import sys; sys.path.insert(0, {base!r}); from server.app import app; "
+    "app.run(host='127.0.0.1', port={port}, threaded=True)"
+)
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for_port(port, timeout=30.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Serveur de benchmark indisponible sur le port {port}")
+
+
+def start_server(mode, port):
+    if mode == "flask":
+        cmd = [sys.executable, "-c", FLASK_CMD.format(base=BASE_DIR, port=port)]
+    else:
+        cmd = [sys.executable, "-m", "server.asgi", "--host", "127.0.0.1", "--port", str(port)]
+    env = dict(os.environ, CRAWLER_SSE_HEARTBEAT="5", PYTHONPATH=BASE_DIR)
+    process = subprocess.Popen(cmd, cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    _wait_for_port(port)
+    return process
+
+
+def process_usage(pid):
+    """(threads, RSS en Mo) lus dans /proc (Linux), (None, None) ailleurs"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            fields = dict(line.split(":", 1) for line in f if ":" in line)
+    except OSError:
+        return None, None
+    return int(fields["Threads"]), int(fields["VmRSS"].split()[0]) / 1024
+
+
+class Subscriber:
+    def __init__(self):
+        self.connected_at = None
+        self.events = []  # (instant de réception, message décodé)
+
+    async def run(self, client, url, started):
+        try:
+            async with client.stream("GET", url) as response:
+                async for line in response.aiter_lines():
+                    if not line.startswith("data: "):
+                        continue
+                    message = json.loads(line[6:])
+                    if self.connected_at is None:
+                        self.connected_at = time.perf_counter() - started
+                    else:
+                        self.events.append((time.perf_counter(), message))
+        except Exception:
+            pass
+
+    def received(self, job_id):
+        for at, message in self.events:
+            if (message.get("job") or {}).get("job_id") == job_id or job_id in (message.get("jobs") or {}):
+                return at
+        return None
+
+
+async def run_case(mode, clients, connect_timeout):
+    import httpx
+
+    port = _free_port()
+    server = start_server(mode, port)
+    base = f"http://127.0.0.1:{port}"
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    timeout = httpx.Timeout(connect_timeout, read=None)
+    idle_threads, idle_rss = process_usage(server.pid)
+    try:
+        async with httpx.AsyncClient(limits=limits, timeout=timeout) as stream_client, \
+                httpx.AsyncClient(timeout=10) as api:
+            subscribers = [Subscriber() for _ in range(clients)]
+            started = time.perf_counter()
+            tasks = [asyncio.create_task(s.run(stream_client, base + "/api/stream", started)) for s in subscribers]
+            deadline = started + connect_timeout
+            while time.perf_counter() < deadline and any(s.connected_at is None for s in subscribers):
+                await asyncio.sleep(0.1)
+            connected = [s for s in subscribers if s.connected_at is not None]
+            threads, rss = process_usage(server.pid)
+
+            latencies = []
+            for _ in range(20):
+                t0 = time.perf_counter()
+                try:
+                    (await api.get(base + "/api/jobs")).raise_for_status()
+                    latencies.append((time.perf_counter() - t0) * 1000)
+                except httpx.HTTPError:
+                    pass
+
+            # Un job sur une URL injoignable: son événement job_queued part vers tous les abonnés
+            t0 = time.perf_counter()
+            response = await api.post(base + "/api/crawl/start", json={"url": "http://127.0.0.1:9/", "max_pages": 1})
+            job_id = response.json().get("job_id")
+            delivered = []
+            fanout_deadline = time.perf_counter() + 10
+            while time.perf_counter() < fanout_deadline:
+                delivered = [at for at in (s.received(job_id) for s in connected) if at is not None]
+                if len(delivered) == len(connected):
+                    break
+                await asyncio.sleep(0.05)
+
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+    return {
+        "mode": mode,
+        "clients": clients,
+        "connected": len(connected),
+        "connect_p95_ms": _percentile([s.connected_at * 1000 for s in connected], 95),
+        "threads": f"{idle_threads}->{threads}",
+        "rss_mb": f"{idle_rss or 0:.0f}->{rss or 0:.0f}",
+        "jobs_p50_ms": _percentile(latencies, 50),
+        "delivered": len(delivered),
+        "fanout_ms": (max(delivered) - t0) * 1000 if delivered else None,
+    }
+
+
+def _percentile(values, pct):
+    if not values:
+        return None
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100)[pct - 1]
+
+
+def _fmt(value):
+    return "-" if value is None else f"{value:.0f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--modes", default="flask,asgi")
+    parser.add_argument("--connect-timeout", type=float, default=20.0)
+    args = parser.parse_args()
+
+    try:
+        import hypercorn  # noqa: F401
+        import httpx  # noqa: F401
+    except ImportError as exc:
+        print(f"❌ Dépendance manquante: {exc.name} (pip install hypercorn httpx)")
+        return 1
+
+    results = [asyncio.run(run_case(mode.strip(), args.clients, args.connect_timeout))
+               for mode in args.modes.split(",")]
+
+    header = f"{'mode':<6} {'clients':>7} {'connectés':>9} {'conn p95 ms':>11} {'threads':>11} {'RSS Mo':>9} {'/api/jobs p50 ms':>16} {'reçu':>6} {'diffusion ms':>12}"
+    print(header)
+    print("-" * len(header))
+    for row in results:
+        print(
+            f"{row['mode']:<6} {row['clients']:>7} {row['connected']:>9} {_fmt(row['connect_p95_ms']):>11} "
+            f"{row['threads']:>11} {row['rss_mb']:>9} {_fmt(row['jobs_p50_ms']):>16} "
+            f"{row['delivered']:>6} {_fmt(row['fanout_ms']):>12}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
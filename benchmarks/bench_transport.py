@@ -0,0 +1,240 @@
+"""
+Benchmark des transports du crawler: requests (HTTP/1.1, gzip) vs httpx (HTTP/2, br/zstd).
+
+Lance un serveur HTTP/2 local (hypercorn, h2c) qui sert des pages HTML compressées
+selon Accept-Encoding, puis compare le temps, les octets transférés et le nombre de
+connexions ouvertes par chaque transport.
+
+Usage: python benchmarks/bench_transport.py [--pages 200] [--concurrency 8]
+Dépendances: pip install hypercorn 'httpx[http2,brotli,zstd]'
+"""
+import argparse
+import asyncio
+import gzip
+import os
+import random
+import socket
+import sys
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from crawler.web_crawler import AdvancedAntiBlockingStrategy  # noqa: E402
+from crawler.transport import supported_encodings  # noqa: E402
+
+WORDS = (
+    "maroc economie croissance banque marche investissement education universite sante "
+    "hopital gouvernement ministre region agriculture campagne saison pluie export tourisme "
+    "energie solaire port tanger casablanca rabat marrakech emploi jeunes startup budget"
+).split()
+
+
+def build_page(index):
+    rng = random.Random(index)
+    paragraphs = []
+    for _ in range(40):
+        sentence = " ".join(rng.choice(WORDS) for _ in range(rng.randint(25, 60)))
+        paragraphs.append(f"<p>{sentence.capitalize()}.</p>")
+    links = "".join(f'<li><a href="/article/{index * 10 + i}">Article {i}</a></li>' for i in range(30))
+    return (
+        f"<!doctype html><html><head><title>Article {index}</title>"
+        f'<meta name="description" content="Page de test {index}"></head>'
+        f"<body><nav><ul>{links}</ul></nav><article>{''.join(paragraphs)}</article></body></html>"
+    ).encode("utf-8")
+
+
+def compress(body, accept_encoding):
+    accepted = [item.split(";")[0].strip() for item in (accept_encoding or "").split(",")]
+    if "zstd" in accepted:
+        try:
+            import zstandard
+            return "zstd", zstandard.ZstdCompressor(level=3).compress(body)
+        except ImportError:
+            pass
+    if "br" in accepted:
+        try:
+            import brotli
+            return "br", brotli.compress(body, quality=5)
+        except ImportError:
+            pass
+    if "gzip" in accepted:
+        return "gzip", gzip.compress(body, compresslevel=6)
+    if "deflate" in accepted:
+        return "deflate", zlib.compress(body)
+    return None, body
+
+
+class BenchServer:
+    """Serveur ASGI local qui compte octets envoyés et connexions par client"""
+
+    def __init__(self):
+        self.pages = {}
+        self.bytes_sent = 0
+        self.connections = set()
+        self.lock = threading.Lock()
+        self.port = _free_port()
+        self._loop = None
+        self._shutdown = None
+        self._thread = None
+
+    def reset(self):
+        with self.lock:
+            self.bytes_sent = 0
+            self.connections = set()
+
+    async def app(self, scope, receive, send):
+        if scope["type"] != "http":
+            return
+        headers = {key.decode().lower(): value.decode() for key, value in scope["headers"]}
+        index = int(scope["path"].rsplit("/", 1)[-1] or 0)
+        if index not in self.pages:
+            self.pages[index] = build_page(index)
+        encoding, body = compress(self.pages[index], headers.get("accept-encoding"))
+        response_headers = [
+            (b"content-type", b"text/html; charset=utf-8"),
+            (b"content-length", str(len(body)).encode()),
+        ]
+        if encoding:
+            response_headers.append((b"content-encoding", encoding.encode()))
+        with self.lock:
+            self.bytes_sent += len(body)
+            self.connections.add(tuple(scope.get("client") or ()))
+        await send({"type": "http.response.start", "status": 200, "headers": response_headers})
+        await send({"type": "http.response.body", "body": body})
+
+    def start(self):
+        from hypercorn.asyncio import serve
+        from hypercorn.config import Config
+
+        config = Config()
+        config.bind = [f"127.0.0.1:{self.port}"]
+        config.loglevel = "WARNING"
+        ready = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            self._shutdown = asyncio.Event()
+            ready.set()
+            self._loop.run_until_complete(serve(self.app, config, shutdown_trigger=self._shutdown.wait))
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        ready.wait()
+        _wait_for_port(self.port)
+
+    def stop(self):
+        if self._loop and self._shutdown:
+            self._loop.call_soon_threadsafe(self._shutdown.set)
+        if self._thread:
+            self._thread.join(timeout=5)
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for_port(port, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"Serveur de benchmark indisponible sur le port {port}")
+
+
+def make_session(transport):
+    strategy = AdvancedAntiBlockingStrategy()
+    if transport == "httpx":
+        from crawler.transport import HttpxSession
+        # h2c "prior knowledge": HTTP/2 en clair, comme derrière un CDN en TLS
+        return HttpxSession(verify=False, http1=False)
+    return strategy.create_advanced_session(verify_ssl=False, transport=transport)
+
+
+def run_case(server, transport, pages, concurrency):
+    server.reset()
+    session = make_session(transport)
+    strategy = AdvancedAntiBlockingStrategy()
+    accept_encoding = supported_encodings(transport)
+    base = f"http://127.0.0.1:{server.port}/article/"
+    versions = set()
+    decoded = 0
+
+    def fetch(index):
+        headers = strategy.get_advanced_headers(accept_encoding=accept_encoding)
+        response = session.get(base + str(index), headers=headers, timeout=10)
+        response.raise_for_status()
+        versions.add(getattr(response, "http_version", None) or "HTTP/1.1")
+        return len(response.content)
+
+    started = time.perf_counter()
+    if concurrency <= 1:
+        for index in range(pages):
+            decoded += fetch(index)
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            decoded = sum(pool.map(fetch, range(pages)))
+    elapsed = time.perf_counter() - started
+    session.close()
+
+    return {
+        "transport": transport,
+        "concurrency": concurrency,
+        "protocol": ",".join(sorted(versions)),
+        "encoding": accept_encoding,
+        "seconds": elapsed,
+        "req_per_sec": pages / elapsed if elapsed else 0.0,
+        "wire_kb": server.bytes_sent / 1024,
+        "decoded_kb": decoded / 1024,
+        "connections": len(server.connections),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    try:
+        import hypercorn  # noqa: F401
+        import httpx  # noqa: F401
+    except ImportError as exc:
+        print(f"❌ Dépendance manquante: {exc.name} (pip install hypercorn 'httpx[http2,brotli,zstd]')")
+        return 1
+
+    server = BenchServer()
+    server.start()
+    try:
+        results = []
+        for concurrency in (1, args.concurrency):
+            for transport in ("requests", "httpx"):
+                run_case(server, transport, min(args.pages, 10), concurrency)  # warm-up
+                results.append(run_case(server, transport, args.pages, concurrency))
+    finally:
+        server.stop()
+
+    header = f"{'transport':<9} {'conc':>4} {'proto':<9} {'encodings':<24} {'s':>7} {'req/s':>8} {'wire KB':>9} {'html KB':>9} {'conns':>5}"
+    print(header)
+    print("-" * len(header))
+    for row in results:
+        print(
+            f"{row['transport']:<9} {row['concurrency']:>4} {row['protocol']:<9} {row['encoding']:<24} "
+            f"{row['seconds']:>7.2f} {row['req_per_sec']:>8.1f} {row['wire_kb']:>9.1f} "
+            f"{row['decoded_kb']:>9.1f} {row['connections']:>5}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
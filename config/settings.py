@@ -16,4 +16,46 @@ TEMPERATURE = float(os.getenv("TEMPERATURE", 0.1))
 
 # Crawler
 MAX_PAGES = 50
-TIMEOUT = 10
\ No newline at end of file
+TIMEOUT = 10
+# Transport HTTP du crawler: "requests" (HTTP/1.1) ou "httpx" (HTTP/2, br/zstd)
+CRAWLER_TRANSPORT = os.getenv("CRAWLER_TRANSPORT", "requests")
+# Archive brute des réponses (segments WARC gzip), désactivée si vide
+CRAWLER_ARCHIVE_DIR = os.getenv("CRAWLER_ARCHIVE_DIR") or None
+# Frontière: URLs max par gabarit de chemin (/calendrier/{date}...); 0 = illimité.
+# Les gabarits d'articles (dernier segment numérique ou ID, sans paramètres) ne sont pas plafonnés
+CRAWLER_MAX_URLS_PER_TEMPLATE = int(os.getenv("CRAWLER_MAX_URLS_PER_TEMPLATE", 100))
+# Stockage local SQLite quand MongoDB est indisponible (vide: désactivé)
+CRAWLER_LOCAL_DB = os.getenv("CRAWLER_LOCAL_DB", "data/crawler_local.db") or None
+# Spool disque des écritures MongoDB, vidé en arrière-plan (vide: écritures synchrones)
+CRAWLER_SPOOL_DIR = os.getenv("CRAWLER_SPOOL_DIR", "data/spool") or None
+# File de jobs du serveur: crawls simultanés et jobs en attente max
+CRAWLER_MAX_WORKERS = int(os.getenv("CRAWLER_MAX_WORKERS", 3))
+CRAWLER_MAX_QUEUED = int(os.getenv("CRAWLER_MAX_QUEUED", 50))
+# Exécution des jobs du serveur: "thread" (dans le processus Flask) ou "process" (sous-processus isolé)
+CRAWLER_EXECUTOR = os.getenv("CRAWLER_EXECUTOR", "thread")
+# Limites d'un sous-processus de crawl (0: sans limite)
+CRAWLER_WORKER_MEMORY_MB = int(os.getenv("CRAWLER_WORKER_MEMORY_MB", 2048))
+CRAWLER_WORKER_CPU_SECONDS = int(os.getenv("CRAWLER_WORKER_CPU_SECONDS", 0))
+# Registre des jobs (collection jobs): jobs passés renvoyés par /api/jobs, relance des jobs interrompus au démarrage
+CRAWLER_JOB_HISTORY = int(os.getenv("CRAWLER_JOB_HISTORY", 20))
+CRAWLER_REQUEUE_INTERRUPTED = os.getenv("CRAWLER_REQUEUE_INTERRUPTED", "0").lower() in ("1", "true", "yes")
+# Fréquence de publication des statistiques SSE (deltas par job); 0: à chaque événement
+CRAWLER_STATS_HZ = float(os.getenv("CRAWLER_STATS_HZ", 4))
+# Clients SSE: messages en attente par client, politique de débordement ("resync" ou "drop-oldest"),
+# commentaire keepalive (s) et déconnexion d'un client qui ne lit plus (s)
+CRAWLER_SSE_BUFFER = int(os.getenv("CRAWLER_SSE_BUFFER", 256))
+CRAWLER_SSE_POLICY = os.getenv("CRAWLER_SSE_POLICY", "resync")
+CRAWLER_SSE_HEARTBEAT = float(os.getenv("CRAWLER_SSE_HEARTBEAT", 15))
+CRAWLER_SSE_IDLE_TIMEOUT = float(os.getenv("CRAWLER_SSE_IDLE_TIMEOUT", 120))
+# Mode ASGI (server/asgi.py): threads pour les routes Flask (rapports LLM...), le flux SSE n'en prend aucun
+CRAWLER_ASGI_THREADS = int(os.getenv("CRAWLER_ASGI_THREADS", 16))
+# Planificateur des sources: crawls simultanés, étalement des départs (fraction de l'intervalle, 30 min max)
+# et exécutions manquées pendant un arrêt ("run-once": rattrapées une fois, "skip": ignorées)
+CRAWLER_SCHEDULER_WORKERS = int(os.getenv("CRAWLER_SCHEDULER_WORKERS", 4))
+CRAWLER_SCHEDULER_JITTER = float(os.getenv("CRAWLER_SCHEDULER_JITTER", 0.1))
+CRAWLER_SCHEDULER_MISSED = os.getenv("CRAWLER_SCHEDULER_MISSED", "run-once")
+# Sources adaptatives: fraîcheur moyenne visée, bornes de l'intervalle (s) et lissage du taux de changement
+CRAWLER_ADAPTIVE_FRESHNESS = float(os.getenv("CRAWLER_ADAPTIVE_FRESHNESS", 0.8))
+CRAWLER_ADAPTIVE_MIN_INTERVAL = int(os.getenv("CRAWLER_ADAPTIVE_MIN_INTERVAL", 900))
+CRAWLER_ADAPTIVE_MAX_INTERVAL = int(os.getenv("CRAWLER_ADAPTIVE_MAX_INTERVAL", 30 * 86400))
+CRAWLER_ADAPTIVE_ALPHA = float(os.getenv("CRAWLER_ADAPTIVE_ALPHA", 0.3))
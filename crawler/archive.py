@@ -0,0 +1,270 @@
+"""
+Archive brute des réponses (format WARC, un membre gzip par enregistrement) et retraitement hors ligne.
+
+Chaque segment `*.warc.gz` est en ajout seul; l'index `index.jsonl` donne pour chaque réponse
+le segment, l'offset et la longueur compressée, ce qui permet de relire un enregistrement sans
+décompresser le segment entier.
+
+Usage:
+  python -m crawler.archive reprocess --archive archive/ --keywords finance,banque --workers 8
+  python -m crawler.archive list --archive archive/ --domain example.com
+"""
+import argparse
+import base64
+import gzip
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+from http import HTTPStatus
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = "index.jsonl"
+SEGMENT_BYTES = 256 * 1024 * 1024
+HOP_BY_HOP = {"content-encoding", "transfer-encoding", "content-length", "connection"}
+
+
+class ResponseArchive:
+    """Écrit les réponses HTTP en segments WARC gzip avec un index JSONL des offsets"""
+
+    def __init__(self, directory: str, segment_bytes: int = SEGMENT_BYTES) -> None:
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self._lock = threading.Lock()
+        self._segment = None
+        self._segment_name = None
+        self._index = None
+        os.makedirs(directory, exist_ok=True)
+
+    def _open_segment(self) -> None:
+        if self._segment is not None:
+            self._segment.close()
+        stamp = datetime.now().strftime("%Y%m%d%H%M%S")
+        self._segment_name = f"crawl-{stamp}-{os.getpid()}-{uuid.uuid4().hex[:6]}.warc.gz"
+        self._segment = open(os.path.join(self.directory, self._segment_name), "ab")
+        if self._index is None:
+            self._index = open(os.path.join(self.directory, INDEX_FILE), "a", encoding="utf-8")
+
+    def write(self, url: str, status: int, headers: Dict[str, str], body: bytes,
+              http_version: str = "HTTP/1.1") -> Dict:
+        """Ajoute une réponse (corps déjà décodé) et retourne son entrée d'index"""
+        content_type = headers.get("Content-Type", headers.get("content-type", ""))
+        try:
+            reason = HTTPStatus(status).phrase
+        except ValueError:
+            reason = ""
+        header_lines = [f"{http_version} {status} {reason}".rstrip()]
+        header_lines += [f"{name}: {value}" for name, value in headers.items() if name.lower() not in HOP_BY_HOP]
+        header_lines.append(f"Content-Length: {len(body)}")
+        http_block = ("\r\n".join(header_lines) + "\r\n\r\n").encode("utf-8", "replace") + body
+
+        date = datetime.now(timezone.utc)
+        sha1 = hashlib.sha1(body)
+        digest = sha1.hexdigest()
+        warc_headers = [
+            "WARC/1.1",
+            "WARC-Type: response",
+            f"WARC-Record-ID: <urn:uuid:{uuid.uuid4()}>",
+            f"WARC-Date: {date.strftime('%Y-%m-%dT%H:%M:%SZ')}",
+            f"WARC-Target-URI: {url}",
+            # Format WARC: SHA-1 en base32 (lu tel quel par les outils de dédoublonnage)
+            f"WARC-Payload-Digest: sha1:{base64.b32encode(sha1.digest()).decode('ascii')}",
+            "Content-Type: application/http;msgtype=response",
+            f"Content-Length: {len(http_block)}",
+        ]
+        record = ("\r\n".join(warc_headers) + "\r\n\r\n").encode("utf-8") + http_block + b"\r\n\r\n"
+        compressed = gzip.compress(record, compresslevel=6)
+
+        with self._lock:
+            if self._segment is None or self._segment.tell() + len(compressed) > self.segment_bytes:
+                self._open_segment()
+            offset = self._segment.tell()
+            self._segment.write(compressed)
+            self._segment.flush()
+            entry = {
+                "url": url,
+                "segment": self._segment_name,
+                "offset": offset,
+                "length": len(compressed),
+                "status": status,
+                "content_type": content_type,
+                "sha1": digest,
+                "date": date.isoformat(),
+            }
+            self._index.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._index.flush()
+        return entry
+
+    def close(self) -> None:
+        with self._lock:
+            for handle in (self._segment, self._index):
+                if handle is not None:
+                    handle.close()
+            self._segment = self._index = None
+
+
+def in_domain(url: str, domain: str) -> bool:
+    """Hôte égal au domaine ou sous-domaine (www.example.com, pas notexample.com)"""
+    host = (urlparse(url).hostname or "").rstrip(".")
+    domain = domain.lower().strip(".")
+    return host == domain or host.endswith("." + domain)
+
+
+def iter_index(directory: str, domain: Optional[str] = None, since: Optional[datetime] = None,
+               latest_only: bool = True) -> Iterator[Dict]:
+    """Entrées de l'index (la plus récente par URL si latest_only)"""
+    path = os.path.join(directory, INDEX_FILE)
+    if not os.path.exists(path):
+        return
+    entries: Dict[str, Dict] = {}
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # ligne tronquée par un arrêt brutal
+            if domain and not in_domain(entry["url"], domain):
+                continue
+            if since and datetime.fromisoformat(entry["date"]).replace(tzinfo=None) < since:
+                continue
+            if not latest_only:
+                yield entry
+            else:
+                entries[entry["url"]] = entry
+    yield from entries.values()
+
+
+def read_record(directory: str, entry: Dict) -> Tuple[str, int, Dict[str, str], bytes]:
+    """Relit un enregistrement: (url, status, headers, body)"""
+    with open(os.path.join(directory, entry["segment"]), "rb") as handle:
+        handle.seek(entry["offset"])
+        record = gzip.decompress(handle.read(entry["length"]))
+    _, _, http_block = record.partition(b"\r\n\r\n")
+    head, _, body = http_block.partition(b"\r\n\r\n")
+    lines = head.decode("utf-8", "replace").split("\r\n")
+    status = int(lines[0].split(" ")[1])
+    headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        headers[name.strip()] = value.strip()
+    length = int(headers.get("Content-Length", len(body)))
+    return entry["url"], status, headers, body[:length]
+
+
+_worker_crawler = None
+
+
+def _init_worker() -> None:
+    global _worker_crawler
+    from crawler.web_crawler import WebCrawler
+
+    logging.getLogger().setLevel(logging.WARNING)
+    _worker_crawler = WebCrawler(use_mongo=False, use_browser_fallback=False, archive_dir=None)
+
+
+def _reprocess_batch(directory: str, entries: List[Dict], keywords: List[str]) -> Tuple[List[Dict], int]:
+    """Parse + pertinence d'un lot d'enregistrements (processus de travail, sans réseau ni MongoDB)"""
+    results = []
+    errors = 0
+    for entry in entries:
+        try:
+            url, _, headers, body = read_record(directory, entry)
+            data = _worker_crawler.process_body(url, body, headers.get("Content-Type", ""), keywords)
+        except Exception as e:
+            logger.debug(f"Enregistrement illisible {entry.get('url')}: {e}")
+            errors += 1
+            continue
+        if data:
+            results.append(data)
+    return results, errors
+
+
+def reprocess(directory: str, keywords: Optional[List[str]] = None, workers: Optional[int] = None,
+              domain: Optional[str] = None, since: Optional[datetime] = None, source_id: str = "reprocess",
+              batch_size: int = 50, dry_run: bool = False) -> Dict[str, int]:
+    """Rejoue l'archive dans le pipeline actuel (parse, pertinence, stockage) en parallèle
+
+    Le stockage passe par store_results comme un crawl: new/changed (révision archivée)/unchanged,
+    spool ou stockage local SQLite si MongoDB est injoignable. Sans aucun stockage (et hors dry_run),
+    lève RuntimeError avant de parser quoi que ce soit.
+    """
+    from crawler.web_crawler import WebCrawler
+
+    crawler = WebCrawler(use_browser_fallback=False, archive_dir=None)
+    if not dry_run and not crawler.storage_available:
+        crawler.close()
+        raise RuntimeError("aucun stockage disponible (MongoDB injoignable, CRAWLER_LOCAL_DB vide)")
+    keywords = crawler._expand_keywords([k.strip().lower() for k in (keywords or []) if k.strip()])
+    entries = [entry for entry in iter_index(directory, domain=domain, since=since) if 200 <= entry["status"] < 300]
+    batches = [entries[i:i + batch_size] for i in range(0, len(entries), batch_size)]
+    stats = {"records": len(entries), "relevant": 0, "stored": 0, "errors": 0, "new": 0, "changed": 0, "unchanged": 0,
+             "spooled": 0, "failed": 0}
+    logger.info(f"♻️  Retraitement de {len(entries)} réponses archivées ({len(batches)} lots)")
+    started = time.time()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        futures = [pool.submit(_reprocess_batch, directory, batch, keywords) for batch in batches]
+        for future in as_completed(futures):
+            results, errors = future.result()
+            stats["errors"] += errors
+            stats["relevant"] += len(results)
+            if dry_run:
+                continue
+            outcomes = crawler.store_results(results, source_id)
+            for outcome, count in outcomes.items():
+                stats[outcome] += count
+            stats["stored"] += len(results) - outcomes["failed"]
+
+    crawler.close()
+    logger.info(f"✅ Retraitement terminé en {time.time() - started:.1f}s: {stats}")
+    return stats
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Archive brute des réponses du crawler")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name in ("reprocess", "list"):
+        cmd = sub.add_parser(name)
+        cmd.add_argument("--archive", default=os.getenv("CRAWLER_ARCHIVE_DIR", "archive"))
+        cmd.add_argument("--domain", default=None)
+        cmd.add_argument("--since", default=None, help="date ISO (ex: 2026-01-01)")
+    reprocess_cmd = sub.choices["reprocess"]
+    reprocess_cmd.add_argument("--keywords", default="", help="mots-clés séparés par des virgules")
+    reprocess_cmd.add_argument("--workers", type=int, default=None)
+    reprocess_cmd.add_argument("--source-id", default="reprocess")
+    reprocess_cmd.add_argument("--dry-run", action="store_true", help="parser sans écrire dans MongoDB")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    since = datetime.fromisoformat(args.since) if args.since else None
+    if args.command == "list":
+        for entry in iter_index(args.archive, domain=args.domain, since=since):
+            print(f"{entry['date']}  {entry['status']}  {entry['length']:>8}  {entry['url']}")
+        return 0
+    try:
+        stats = reprocess(
+            args.archive,
+            keywords=[k for k in args.keywords.split(",") if k.strip()],
+            workers=args.workers,
+            domain=args.domain,
+            since=since,
+            source_id=args.source_id,
+            dry_run=args.dry_run,
+        )
+    except RuntimeError as e:
+        logger.error(f"❌ Retraitement impossible: {e}")
+        return 2
+    return 0 if stats["records"] and not stats["failed"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""
+Budgets d'un crawl (durée, octets, nombre de requêtes) et attentes interruptibles.
+
+Toutes les attentes du crawler (Retry-After, pause après erreur, rate limiter) passent par un
+CrawlBudget: elles se terminent dès que le job est arrêté (stop_event du contrôle) ou que l'échéance
+est atteinte, au lieu de dormir jusqu'au bout. Une requête HTTP en cours n'est pas coupée: ses
+timeouts socket sont bornés par l'échéance et le corps est lu par blocs, le stop est vu entre deux.
+"""
+import time
+from typing import Any, Callable, Dict, Optional
+
+# Granularité des attentes quand aucun événement d'arrêt n'est disponible
+POLL_SECONDS = 0.2
+
+
+class CrawlInterrupted(Exception):
+    """Levée par une attente interrompue: arrêt demandé ("stopped") ou budget épuisé (raison)"""
+
+    def __init__(self, reason: str) -> None:
+        super().__init__(reason)
+        self.reason = reason
+
+
+def _event(control: Any, name: str):
+    if control is None:
+        return None
+    event = getattr(control, name, None)
+    if event is None and isinstance(control, dict):
+        event = control.get(name)
+    return event
+
+
+class CrawlBudget:
+    """Limites d'un job: max_seconds (échéance murale), max_bytes (corps lus), max_fetches (requêtes)"""
+
+    def __init__(self, max_seconds: Optional[float] = None, max_bytes: Optional[int] = None,
+                 max_fetches: Optional[int] = None, control: Any = None) -> None:
+        self.max_seconds = max_seconds or None
+        self.max_bytes = max_bytes or None
+        self.max_fetches = max_fetches or None
+        self.control = control
+        self.started = time.monotonic()
+        self.bytes = 0
+        self.fetches = 0
+
+    @classmethod
+    def from_options(cls, options: Optional[Dict[str, Any]], control: Any = None) -> "CrawlBudget":
+        options = options or {}
+        return cls(options.get("max_seconds"), options.get("max_bytes"), options.get("max_fetches"), control)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"max_seconds": self.max_seconds, "max_bytes": self.max_bytes, "max_fetches": self.max_fetches,
+                "elapsed": round(self.elapsed(), 1), "bytes": self.bytes, "fetches": self.fetches}
+
+    # ----- état ---------------------------------------------------------------
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def remaining(self) -> Optional[float]:
+        """Secondes avant l'échéance (None: pas d'échéance)"""
+        if self.max_seconds is None:
+            return None
+        return max(self.max_seconds - self.elapsed(), 0.0)
+
+    def stop_requested(self) -> bool:
+        stop_event = _event(self.control, "stop_event")
+        return bool(stop_event is not None and stop_event.is_set())
+
+    def exhausted(self) -> Optional[str]:
+        """Raison de fin ("time", "bytes", "fetches") ou None"""
+        if self.max_seconds is not None and self.elapsed() >= self.max_seconds:
+            return "time"
+        if self.max_bytes is not None and self.bytes >= self.max_bytes:
+            return "bytes"
+        if self.max_fetches is not None and self.fetches >= self.max_fetches:
+            return "fetches"
+        return None
+
+    def check(self) -> None:
+        """Lève CrawlInterrupted si le job est arrêté ou le budget épuisé"""
+        if self.stop_requested():
+            raise CrawlInterrupted("stopped")
+        reason = self.exhausted()
+        if reason:
+            raise CrawlInterrupted(reason)
+
+    def add_fetch(self, size: int = 0) -> None:
+        self.fetches += 1
+        self.bytes += size
+
+    def cap_timeout(self, timeout: float) -> float:
+        """Timeout HTTP borné par l'échéance (au moins 1 s pour laisser une chance à la requête)"""
+        remaining = self.remaining()
+        return timeout if remaining is None else max(min(timeout, remaining), 1.0)
+
+    # ----- attentes -----------------------------------------------------------
+    def sleep(self, seconds: float) -> None:
+        """time.sleep interruptible; lève CrawlInterrupted si l'attente a été coupée"""
+        remaining = self.remaining()
+        wait = seconds if remaining is None else min(seconds, remaining)
+        stop_event = _event(self.control, "stop_event")
+        if stop_event is not None:
+            stop_event.wait(max(wait, 0))
+        elif wait > 0:
+            time.sleep(wait)
+        self.check()
+
+    def wait_if_paused(self) -> None:
+        """Attend la reprise d'un job en pause (l'échéance continue de courir)"""
+        pause_event = _event(self.control, "pause_event")
+        if pause_event is None:
+            return
+        while not pause_event.wait(POLL_SECONDS if self.max_seconds is not None else None):
+            self.check()
+
+    def call(self, fn: Callable[[], Any]) -> Any:
+        """Exécute fn (requête bloquante, timeout borné par cap_timeout) dans le thread du crawl.
+
+        Une erreur survenue alors que le job est arrêté ou hors délai remonte en CrawlInterrupted.
+        """
+        self.check()
+        try:
+            return fn()
+        except Exception:
+            if self.stop_requested():
+                raise CrawlInterrupted("stopped")
+            if self.max_seconds is not None and self.remaining() <= 0:
+                raise CrawlInterrupted("time")
+            raise
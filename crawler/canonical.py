@@ -0,0 +1,95 @@
+"""
+Canonicalisation d'URLs mémoïsée: http/https, www, paramètres de suivi, variantes AMP, rel=canonical.
+"""
+import re
+import threading
+from functools import lru_cache
+from typing import Dict, Iterable, Optional
+from urllib.parse import parse_qsl, urlencode, urlparse
+
+from crawler.frontier import DEFAULT_TRACKING_PARAMS, TrapDetector
+
+# Préfixes d'hôte qui servent le même contenu que l'hôte nu
+HOST_PREFIXES = ("www.", "amp.", "m.")
+# Paramètres qui ne font que sélectionner la variante AMP
+AMP_PARAMS = {"amp": None, "outputtype": "amp", "output": "amp", "format": "amp"}
+_AMP_SUFFIX = re.compile(r"/amp/?$", re.I)
+_AMP_EXTENSION = re.compile(r"\.amp(\.html?)$", re.I)
+DEFAULT_PORTS = {"http": "80", "https": "443"}
+
+
+def url_domain(url: str) -> str:
+    """Domaine d'une URL ou d'un nom d'hôte nu, sans port ni "www." (exclusivité et budgets par domaine)"""
+    url = url or ""
+    host = urlparse(url if "//" in url else "//" + url).netloc.lower().split("@")[-1].split(":")[0]
+    return host[4:] if host.startswith("www.") else host
+
+
+class UrlCanonicalizer:
+    """Réduit les variantes d'une même page à une clé unique (cache LRU + alias rel=canonical)"""
+
+    def __init__(self, cache_size: int = 65536, tracking_params: Optional[Iterable[str]] = None,
+                 fold_scheme: bool = True, fold_hosts: bool = True) -> None:
+        self.fold_scheme = fold_scheme
+        self.fold_hosts = fold_hosts
+        self._tracking = TrapDetector(
+            tracking_params=DEFAULT_TRACKING_PARAMS if tracking_params is None else tracking_params
+        )
+        self._aliases: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._cached = lru_cache(maxsize=cache_size)(self._canonicalize)
+
+    def canonicalize(self, url: str) -> str:
+        """Clé canonique de l'URL (alias rel=canonical résolus)"""
+        key = self._cached(url)
+        return self._aliases.get(key, key)
+
+    def register_alias(self, alias_url: str, canonical_url: str) -> Optional[str]:
+        """Enregistre alias -> canonique; retourne la clé canonique si elle diffère de l'alias"""
+        alias_key = self._cached(alias_url)
+        canonical_key = self.canonicalize(canonical_url)
+        if alias_key == canonical_key:
+            return None
+        with self._lock:
+            self._aliases[alias_key] = canonical_key
+        return canonical_key
+
+    def is_alias(self, url: str) -> bool:
+        return self._cached(url) in self._aliases
+
+    def cache_info(self):
+        return self._cached.cache_info()
+
+    def _canonicalize(self, url: str) -> str:
+        parsed = urlparse(url.strip())
+        original_scheme = (parsed.scheme or "https").lower()
+        scheme = "https" if self.fold_scheme and original_scheme == "http" else original_scheme
+
+        host = (parsed.hostname or "").lower().rstrip(".")
+        if self.fold_hosts:
+            for prefix in HOST_PREFIXES:
+                if host.startswith(prefix) and host.count(".") >= 2:
+                    host = host[len(prefix):]
+                    break
+        port = parsed.port
+        netloc = host if not port or str(port) == DEFAULT_PORTS.get(original_scheme) else f"{host}:{port}"
+
+        path = re.sub(r"/{2,}", "/", parsed.path or "/")
+        path = _AMP_EXTENSION.sub(r"\1", _AMP_SUFFIX.sub("", path)) or "/"
+        if len(path) > 1 and path.endswith("/"):
+            path = path.rstrip("/")
+
+        params = []
+        for name, value in parse_qsl(parsed.query, keep_blank_values=True):
+            lowered = name.lower()
+            if self._tracking.is_tracking(lowered):
+                continue
+            if lowered in AMP_PARAMS and AMP_PARAMS[lowered] in (None, value.lower()):
+                continue
+            params.append((name, value))
+        params.sort()
+
+        canonical = f"{scheme}://{netloc}{path}"
+        if params:
+            canonical += "?" + urlencode(params, doseq=True)
+        return canonical
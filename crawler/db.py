@@ -0,0 +1,222 @@
+"""
+Connexion MongoDB partagée par processus et schéma (index) versionné.
+
+Un seul MongoClient (pool de connexions) par URI pour tous les WebCrawler, le reporting, le
+GraphBuilder et le spool; le ping est mis en cache quelques secondes. Les index sont créés par
+des migrations numérotées, appliquées une fois (version dans la collection schema_meta) au
+premier accès du processus ou explicitement au déploiement:
+
+  python -m crawler.db migrate
+  python -m crawler.db status
+"""
+import argparse
+import logging
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Tuple
+
+import pymongo
+from pymongo import ReturnDocument
+from pymongo.database import Database
+from pymongo.errors import DuplicateKeyError
+
+from config.settings import DATABASE_NAME, MONGODB_URI
+
+logger = logging.getLogger(__name__)
+
+PING_TTL = 30.0
+META_COLLECTION = "schema_meta"
+LOCK_SECONDS = 300
+# Registre des jobs (server.jobs), où crawl_source consigne aussi chaque crawl de source
+JOBS_COLLECTION = "jobs"
+
+_lock = threading.Lock()
+_clients: Dict[str, pymongo.MongoClient] = {}
+_last_ping: Dict[str, float] = {}
+_schema_checked: Dict[Tuple[str, str], int] = {}
+
+
+def get_client(uri: str = MONGODB_URI) -> pymongo.MongoClient:
+    """Client partagé pour cette URI (ne pas le fermer: il sert à tout le processus)"""
+    with _lock:
+        client = _clients.get(uri)
+        if client is None:
+            client = _clients[uri] = pymongo.MongoClient(uri, serverSelectionTimeoutMS=5000)
+        return client
+
+
+def connect(uri: str = MONGODB_URI, db_name: str = DATABASE_NAME, timeout_ms: int = 2000,
+            bootstrap: bool = True) -> Database:
+    """Base prête à l'emploi: ping (en cache PING_TTL secondes) puis schéma à jour. Lève si injoignable."""
+    client = get_client(uri)
+    if time.monotonic() - _last_ping.get(uri, float("-inf")) > PING_TTL:
+        with pymongo.timeout(timeout_ms / 1000):
+            client.admin.command("ping")
+        _last_ping[uri] = time.monotonic()
+    db = client[db_name]
+    if bootstrap:
+        ensure_schema(db, uri)
+    return db
+
+
+def close_all() -> None:
+    with _lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
+        _last_ping.clear()
+        _schema_checked.clear()
+
+
+# ----- migrations -------------------------------------------------------------
+def _ignore_errors(create: Callable[[], object], label: str) -> None:
+    try:
+        create()
+    except Exception as e:
+        logger.warning(f"⚠️  Index {label} non créé: {e}")
+
+
+def _v1_initial_indexes(db: Database) -> None:
+    """Index historiquement créés à chaque WebCrawler() et GraphBuilder()"""
+    from crawler.storage import DocumentStore
+
+    data = db["crawled_data"]
+    _ignore_errors(lambda: data.create_index([("title", "text"), ("content", "text")]), "texte")
+    _ignore_errors(lambda: data.create_index("source_id"), "source_id")
+    _ignore_errors(lambda: data.create_index("timestamp"), "timestamp")
+    try:
+        existing = data.index_information()
+        if "url_1" in existing and not existing["url_1"].get("unique", False):
+            logger.info("🔄 Recréation de l'index URL avec contrainte unique...")
+            data.drop_index("url_1")
+        if "url_1" not in data.index_information():
+            data.create_index("url", unique=True, sparse=True, name="url_unique_idx")
+    except DuplicateKeyError:
+        logger.warning("⚠️  Doublons détectés, index URL sans contrainte unique")
+        _ignore_errors(lambda: data.create_index("url", name="url_idx"), "URL")
+    except Exception as e:
+        logger.warning(f"⚠️  Index URL non créé: {e}")
+
+    history = db["url_history"]
+    _ignore_errors(lambda: history.create_index("url", unique=True, sparse=True), "url_history.url")
+    _ignore_errors(lambda: history.create_index("last_crawled"), "url_history.last_crawled")
+    _ignore_errors(lambda: db["extraction_templates"].create_index([("domain", 1), ("pattern", 1)], unique=True),
+                   "extraction_templates")
+    _ignore_errors(lambda: DocumentStore(db).ensure_indexes(), "documents versionnés")
+    _ignore_errors(lambda: db["graphs"].create_index("source_url"), "graphs.source_url")
+    _ignore_errors(lambda: db["graphs"].create_index("created_at"), "graphs.created_at")
+
+
+def _v2_jobs_indexes(db: Database) -> None:
+    """Registre des jobs du serveur (historique, reprise après arrêt, liste des sessions)"""
+    jobs = db[JOBS_COLLECTION]
+    _ignore_errors(lambda: jobs.create_index([("created_at", -1)]), "jobs.created_at")
+    _ignore_errors(lambda: jobs.create_index("status"), "jobs.status")
+    _ignore_errors(lambda: jobs.create_index([("finished_at", -1)]), "jobs.finished_at")
+
+
+def _v3_scheduler_indexes(db: Database) -> None:
+    """Planificateur: sources échues par date de prochaine exécution"""
+    _ignore_errors(lambda: db["sources"].create_index([("enabled", 1), ("next_run_at", 1)]), "sources.next_run_at")
+
+
+def _v4_canonical_url_history(db: Database) -> None:
+    """Clés d'url_history passées de normalize_url à UrlCanonicalizer; les doublons sont fusionnés"""
+    from crawler.canonical import UrlCanonicalizer
+
+    canonicalizer = UrlCanonicalizer()
+    history = db["url_history"]
+    rewritten = merged = 0
+    # Les alias (champ canonical) sont déjà enregistrés sous la clé canonique
+    for doc in history.find({"canonical": {"$exists": False}}):
+        key = canonicalizer.canonicalize(doc.get("url") or "")
+        if not doc.get("url") or key == doc["url"]:
+            continue
+        target = history.find_one({"url": key}, {"_id": 1})
+        if target is None:
+            history.update_one({"_id": doc["_id"]}, {"$set": {"url": key}})
+            rewritten += 1
+            continue
+        update = {"$inc": {"crawl_count": doc.get("crawl_count", 0)}}
+        latest = {field: doc[field] for field in ("last_crawled", "success") if doc.get(field) is not None}
+        if latest:
+            update["$max"] = latest
+        history.update_one({"_id": target["_id"]}, update)
+        history.delete_one({"_id": doc["_id"]})
+        merged += 1
+    logger.info(f"🔑 url_history: {rewritten} clés réécrites, {merged} doublons fusionnés")
+
+
+# (version, description, fonction): ajouter les nouvelles migrations à la fin
+MIGRATIONS: List[Tuple[int, str, Callable[[Database], None]]] = [
+    (1, "index initiaux", _v1_initial_indexes),
+    (2, "index du registre des jobs", _v2_jobs_indexes),
+    (3, "index du planificateur", _v3_scheduler_indexes),
+    (4, "clés canoniques d'url_history", _v4_canonical_url_history),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version(db: Database) -> int:
+    meta = db[META_COLLECTION].find_one({"_id": "schema"}) or {}
+    return meta.get("version", 0)
+
+
+def ensure_schema(db: Database, uri: str = MONGODB_URI) -> int:
+    """Applique les migrations manquantes une seule fois (verrou en base entre processus)"""
+    key = (uri, db.name)
+    if _schema_checked.get(key) == SCHEMA_VERSION:
+        return SCHEMA_VERSION
+    meta = db[META_COLLECTION]
+    version = schema_version(db)
+    if version < SCHEMA_VERSION:
+        now = datetime.now()
+        try:
+            claimed = meta.find_one_and_update(
+                {"_id": "schema", "$or": [{"locked_until": {"$exists": False}}, {"locked_until": {"$lt": now}}]},
+                {"$set": {"locked_until": now + timedelta(seconds=LOCK_SECONDS)}, "$setOnInsert": {"version": 0}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
+            claimed = None  # verrou tenu par un autre processus
+        if claimed is None:
+            logger.info("⏳ Migration du schéma en cours dans un autre processus, on continue avec l'existant")
+            return version
+        try:
+            for number, description, migrate in MIGRATIONS:
+                if number <= version:
+                    continue
+                logger.info(f"🧱 Migration du schéma v{number}: {description}")
+                migrate(db)
+                meta.update_one({"_id": "schema"}, {"$set": {"version": number, f"applied.v{number}": datetime.now()}})
+                version = number
+        finally:
+            meta.update_one({"_id": "schema"}, {"$unset": {"locked_until": ""}})
+    _schema_checked[key] = version
+    return version
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Schéma MongoDB du crawler")
+    parser.add_argument("command", choices=("migrate", "status"))
+    parser.add_argument("--mongo-uri", default=MONGODB_URI)
+    parser.add_argument("--db", default=DATABASE_NAME)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    try:
+        db = connect(args.mongo_uri, args.db, timeout_ms=5000, bootstrap=False)
+    except Exception as e:
+        print(f"MongoDB injoignable: {e}")
+        return 1
+    if args.command == "migrate":
+        ensure_schema(db, args.mongo_uri)
+    print(f"schéma v{schema_version(db)} (code: v{SCHEMA_VERSION})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
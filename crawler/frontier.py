@@ -0,0 +1,135 @@
+"""
+Détection des pièges à crawler (calendriers, recherche à facettes, IDs de session).
+"""
+import fnmatch
+import logging
+import re
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, Optional
+from urllib.parse import parse_qsl, urlencode, urlparse, urlsplit, urlunsplit
+
+logger = logging.getLogger(__name__)
+
+# Paramètres de suivi/session retirés des URLs avant mise en file
+DEFAULT_TRACKING_PARAMS = (
+    "utm_*", "fbclid", "gclid", "dclid", "gbraid", "wbraid", "msclkid", "yclid", "igshid",
+    "mc_cid", "mc_eid", "_ga", "_gl", "_hsenc", "_hsmi", "mkt_tok", "ref_src",
+    "phpsessid", "jsessionid", "sid", "sessionid", "session_id", "cfid", "cftoken", "aspsessionid*",
+)
+
+_NUMERIC_SEGMENT = re.compile(r"^\d+$")
+_DATE_SEGMENT = re.compile(r"^\d{4}-\d{1,2}(-\d{1,2})?$")
+_ID_SEGMENT = re.compile(r"^(?:[0-9a-f]{16,}|[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})$", re.I)
+_PATH_SESSION = re.compile(r";(?:jsessionid|phpsessid|sid)=[^/?#]*", re.I)
+
+MAX_URL_LENGTH = 2000
+MAX_SEGMENT_REPEAT = 3
+# Dernier segment d'un gabarit d'article (/article/{n}): un site d'actualité en a des milliers
+ITEM_LEAVES = ("{n}", "{id}")
+# Verdicts qui dépendent du lien (profondeur) et pas seulement de l'URL: jamais mis en cache
+UNCACHED_REASONS = ("depth",)
+
+
+class TrapDetector:
+    """Limite l'explosion de la frontière: profondeur, gabarits de chemins, cardinalité des paramètres"""
+
+    def __init__(self, max_depth: Optional[int] = None, max_per_template: int = 100,
+                 max_param_values: int = 20, tracking_params: Optional[Iterable[str]] = None) -> None:
+        self.max_depth = max_depth
+        self.max_per_template = max_per_template
+        self.max_param_values = max_param_values
+        patterns = DEFAULT_TRACKING_PARAMS if tracking_params is None else tracking_params
+        self.tracking_params = [p.lower() for p in patterns]
+        self.template_counts: Counter = Counter()
+        self.param_values: Dict[tuple, set] = defaultdict(set)
+        self.suppressed: Counter = Counter()
+        self._rejected: Dict[str, str] = {}
+        self._capped: set = set()
+
+    def is_tracking(self, name: str) -> bool:
+        name = name.lower()
+        return any(fnmatch.fnmatchcase(name, pattern) for pattern in self.tracking_params)
+
+    def strip_tracking(self, url: str) -> str:
+        """Retire les paramètres de suivi et les IDs de session (query et ;jsessionid=)"""
+        parsed = urlsplit(url)  # pas urlparse: il sortirait ";jsessionid=" du chemin
+        path = _PATH_SESSION.sub("", parsed.path)
+        if not parsed.query and path == parsed.path:
+            return url
+        params = [(k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True) if not self.is_tracking(k)]
+        return urlunsplit(parsed._replace(path=path, query=urlencode(params, doseq=True)))
+
+    @staticmethod
+    def path_template(url: str) -> str:
+        """Forme générique d'une URL: segments numériques/dates/IDs remplacés, noms de paramètres triés"""
+        parsed = urlparse(url)
+        segments = []
+        for segment in parsed.path.split("/"):
+            if _NUMERIC_SEGMENT.match(segment):
+                segments.append("{n}")
+            elif _DATE_SEGMENT.match(segment):
+                segments.append("{date}")
+            elif _ID_SEGMENT.match(segment):
+                segments.append("{id}")
+            else:
+                segments.append(segment)
+        names = sorted({k for k, _ in parse_qsl(parsed.query, keep_blank_values=True)})
+        template = f"{parsed.netloc.lower()}{'/'.join(segments)}"
+        return f"{template}?{'&'.join(names)}" if names else template
+
+    @staticmethod
+    def is_item_template(template: str) -> bool:
+        """Gabarit d'articles (/article/{n}, /news/{id}): exempté du plafond par gabarit.
+
+        Seul le dernier segment est variable et il n'y a pas de paramètres; /{n}/{n}/{n} (calendrier)
+        ou /agenda/{date} restent plafonnés.
+        """
+        path, _, query = template.partition("?")
+        segments = path.rstrip("/").split("/")
+        return not query and segments[-1] in ITEM_LEAVES and not any("{" in segment for segment in segments[1:-1])
+
+    def check(self, url: str, depth: int) -> Optional[str]:
+        """Retourne la raison de suppression, ou None si l'URL peut entrer dans la frontière"""
+        if url in self._rejected:
+            return self._rejected[url]
+        reason = self._violation(url, depth)
+        if reason:
+            if reason not in UNCACHED_REASONS:
+                self._rejected[url] = reason
+            self.suppressed[reason] += 1
+            return reason
+        parsed = urlparse(url)
+        self.template_counts[self.path_template(url)] += 1
+        for name, value in parse_qsl(parsed.query, keep_blank_values=True):
+            self.param_values[(parsed.netloc, parsed.path, name)].add(value)
+        return None
+
+    def _violation(self, url: str, depth: int) -> Optional[str]:
+        if self.max_depth is not None and depth > self.max_depth:
+            return "depth"
+        if len(url) > MAX_URL_LENGTH:
+            return "url_length"
+        parsed = urlparse(url)
+        segments = [s for s in parsed.path.split("/") if s]
+        if segments and Counter(segments).most_common(1)[0][1] >= MAX_SEGMENT_REPEAT:
+            return "repeated_path"
+        if self.max_per_template:
+            template = self.path_template(url)
+            if self.template_counts[template] >= self.max_per_template and not self.is_item_template(template):
+                if template not in self._capped:
+                    self._capped.add(template)
+                    logger.info(f"🪤 Gabarit plafonné à {self.max_per_template} URLs: {template}")
+                return "path_template"
+        if self.max_param_values:
+            for name, value in parse_qsl(parsed.query, keep_blank_values=True):
+                seen = self.param_values.get((parsed.netloc, parsed.path, name))
+                if seen and value not in seen and len(seen) >= self.max_param_values:
+                    return "param_cardinality"
+        return None
+
+    def stats(self) -> Dict[str, int]:
+        return dict(self.suppressed)
+
+    @property
+    def total_suppressed(self) -> int:
+        return sum(self.suppressed.values())
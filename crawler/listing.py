@@ -0,0 +1,136 @@
+"""
+Pages de liste (rubriques d'actualité): bloc de liens d'articles et pagination.
+"""
+import re
+from typing import List, Optional
+from urllib.parse import parse_qsl, urljoin, urlparse
+
+# Conteneurs de navigation jamais considérés comme bloc d'articles
+CHROME_TAGS = ["nav", "header", "footer", "aside"]
+CHROME_CLASS = re.compile(r"(^|[-_ ])(menu|nav|navbar|footer|header|sidebar|breadcrumb|social|share|widget|tags?)([-_ ]|$)", re.I)
+# Classes typiques des éléments d'une liste d'articles
+ITEM_CLASS = re.compile(r"(post|article|story|entry|card|item|teaser|news)", re.I)
+PAGINATION_CLASS = re.compile(r"(pagination|pager|page-numbers|nav-links|paging)", re.I)
+LOAD_MORE_TEXT = re.compile(r"(load more|more articles|show more|voir plus|charger plus|plus d'articles|afficher plus|المزيد)", re.I)
+LOAD_MORE_ATTRS = ("data-href", "data-url", "data-next", "data-next-page", "data-load-more", "data-endpoint")
+PAGE_PARAMS = ("page", "paged", "p", "pg", "start", "offset")
+_PAGE_IN_PATH = re.compile(r"/(?:page|p)/(\d+)/?$", re.I)
+
+MIN_ARTICLE_LINKS = 3
+
+
+def looks_like_article(url: str) -> bool:
+    """Heuristique d'URL d'article: slug long, identifiant numérique ou extension .html"""
+    path = urlparse(url).path.rstrip("/")
+    if not path:
+        return False
+    last = path.rsplit("/", 1)[-1]
+    if _PAGE_IN_PATH.search(path + "/"):
+        return False
+    if last.endswith((".html", ".htm", ".php")) and len(last) > 12:
+        return True
+    if re.search(r"\d{4,}", last):
+        return True
+    return last.count("-") >= 3
+
+
+def _in_chrome(tag) -> bool:
+    for parent in tag.parents:
+        if parent.name in CHROME_TAGS:
+            return True
+        if parent.name in ("body", "html", "[document]"):
+            return False
+        classes = " ".join(parent.get("class", []) or []) + " " + (parent.get("id") or "")
+        if classes.strip() and CHROME_CLASS.search(classes):
+            return True
+    return False
+
+
+def _block_of(tag):
+    """Conteneur de la liste: premier ancêtre dont la classe évoque un élément d'article, sinon le parent de liste"""
+    item = None
+    for parent in tag.parents:
+        if parent.name in ("body", "html", "[document]"):
+            break
+        classes = " ".join(parent.get("class", []) or [])
+        if parent.name in ("article", "li") or (classes and ITEM_CLASS.search(classes)):
+            item = parent
+            continue
+        if item is not None:
+            return parent
+    return item.parent if item is not None else tag.parent
+
+
+def find_article_links(soup, page_url: str) -> List[str]:
+    """Liens d'articles du bloc principal de la page de liste, dans l'ordre du document"""
+    blocks = {}
+    order = []
+    for link in soup.find_all("a", href=True):
+        href = link["href"].strip()
+        if not href or href.startswith(("#", "javascript:", "mailto:")):
+            continue
+        absolute = urljoin(page_url, href)
+        if not looks_like_article(absolute) or _in_chrome(link):
+            continue
+        block = _block_of(link)
+        key = id(block)
+        if key not in blocks:
+            blocks[key] = []
+            order.append(key)
+        if absolute not in blocks[key]:
+            blocks[key].append(absolute)
+    if not blocks:
+        return []
+
+    # Le bloc le plus fourni est la liste principale; on garde aussi les blocs comparables
+    best = max(len(links) for links in blocks.values())
+    threshold = max(MIN_ARTICLE_LINKS, best // 3)
+    result = []
+    for key in order:
+        if len(blocks[key]) >= threshold:
+            result.extend(url for url in blocks[key] if url not in result)
+    return result
+
+
+def page_number(url: str) -> int:
+    """Numéro de page d'une URL de liste (1 par défaut)"""
+    parsed = urlparse(url)
+    match = _PAGE_IN_PATH.search(parsed.path)
+    if match:
+        return int(match.group(1))
+    for name, value in parse_qsl(parsed.query):
+        if name.lower() in ("page", "paged", "pg") and value.isdigit():
+            return int(value)
+    return 1
+
+
+def find_next_page(soup, page_url: str) -> Optional[str]:
+    """Page suivante: rel=next, puis pagination numérotée, puis bouton « load more »"""
+    for tag in soup.find_all(["link", "a"], rel=True, href=True):
+        if "next" in [value.lower() for value in tag.get("rel", [])]:
+            return urljoin(page_url, tag["href"])
+
+    current = page_number(page_url)
+    numbered = {}
+    for container in soup.find_all(class_=PAGINATION_CLASS):
+        for link in container.find_all("a", href=True):
+            absolute = urljoin(page_url, link["href"])
+            text = link.get_text(strip=True)
+            number = int(text) if text.isdigit() else page_number(absolute)
+            if number > current:
+                numbered.setdefault(number, absolute)
+            if link.get_text(strip=True).lower() in ("»", "›", "next", "suivant", "suivante", "التالي"):
+                numbered.setdefault(current + 1, absolute)
+    if numbered:
+        return numbered[min(numbered)]
+
+    for tag in soup.find_all(["a", "button", "div"]):
+        text = tag.get_text(" ", strip=True)
+        classes = " ".join(tag.get("class", []) or [])
+        if not (LOAD_MORE_TEXT.search(text[:80]) or "load-more" in classes or "loadmore" in classes):
+            continue
+        for attr in LOAD_MORE_ATTRS + ("href",):
+            target = tag.get(attr)
+            if target and not target.startswith(("#", "javascript:")):
+                return urljoin(page_url, target)
+    return None
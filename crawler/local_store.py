@@ -0,0 +1,509 @@
+"""
+Stockage local embarqué (SQLite + FTS5) utilisé quand MongoDB est indisponible.
+
+Couvre les opérations du crawler (url_history, robots_cache, sources, documents versionnés,
+recherche plein texte) et les lectures du reporting. Les écritures sont regroupées en
+transactions (batch_size opérations ou flush_interval secondes): un thread valide les écritures en
+attente toutes les flush_interval secondes et à la sortie du processus, si bien qu'un arrêt brutal
+(kill -9, crash) perd au plus les flush_interval dernières secondes. Les données locales sont
+reversées dans MongoDB avec:
+
+  python -m crawler.local_store sync [--path data/crawler_local.db]
+"""
+import argparse
+import atexit
+import json
+import logging
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from bson import ObjectId, json_util
+
+from crawler.storage import compress_delta, content_hash
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    url TEXT UNIQUE NOT NULL,
+    source_id TEXT,
+    seen_in TEXT NOT NULL DEFAULT '[]',
+    title TEXT,
+    description TEXT,
+    content TEXT,
+    content_type TEXT,
+    timestamp TEXT,
+    last_seen TEXT,
+    content_hash TEXT,
+    content_length INTEGER,
+    version INTEGER NOT NULL DEFAULT 1,
+    doc TEXT NOT NULL,
+    synced INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS documents_source ON documents(source_id);
+CREATE INDEX IF NOT EXISTS documents_timestamp ON documents(timestamp);
+CREATE INDEX IF NOT EXISTS documents_synced ON documents(synced);
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(title, content, content='documents', content_rowid='id');
+CREATE TRIGGER IF NOT EXISTS documents_ai AFTER INSERT ON documents BEGIN
+    INSERT INTO documents_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS documents_ad AFTER DELETE ON documents BEGIN
+    INSERT INTO documents_fts(documents_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+END;
+CREATE TRIGGER IF NOT EXISTS documents_au AFTER UPDATE OF title, content ON documents BEGIN
+    INSERT INTO documents_fts(documents_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+    INSERT INTO documents_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+END;
+CREATE TABLE IF NOT EXISTS revisions (
+    doc_id INTEGER NOT NULL,
+    url TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    content_hash TEXT,
+    title TEXT,
+    timestamp TEXT,
+    replaced_at TEXT,
+    codec TEXT,
+    data BLOB,
+    length INTEGER
+);
+CREATE INDEX IF NOT EXISTS revisions_doc ON revisions(doc_id, version);
+CREATE TABLE IF NOT EXISTS url_history (
+    url TEXT PRIMARY KEY,
+    last_crawled TEXT,
+    success INTEGER,
+    crawl_count INTEGER NOT NULL DEFAULT 0,
+    canonical TEXT,
+    synced INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS robots_cache (
+    url TEXT PRIMARY KEY,
+    allowed INTEGER,
+    timestamp TEXT
+);
+CREATE TABLE IF NOT EXISTS sources (
+    id TEXT PRIMARY KEY,
+    enabled INTEGER NOT NULL DEFAULT 1,
+    doc TEXT NOT NULL,
+    synced INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+_stores: Dict[str, "LocalStore"] = {}
+_stores_lock = threading.Lock()
+
+
+def open_local_store(path: str) -> "LocalStore":
+    """Instance partagée par chemin (une seule connexion d'écriture par processus)"""
+    path = os.path.abspath(path)
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = LocalStore(path)
+            atexit.register(store.close)
+        return store
+
+
+def _iso(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _parse(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+def _dumps(doc: Dict[str, Any]) -> str:
+    return json_util.dumps(doc, ensure_ascii=False)
+
+
+def _loads(raw: str) -> Dict[str, Any]:
+    return json_util.loads(raw)
+
+
+class LocalStore:
+    """Sous-ensemble SQLite des collections MongoDB du crawler, écritures groupées"""
+
+    def __init__(self, path: str, batch_size: int = 200, flush_interval: float = 2.0) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._lock = threading.RLock()
+        self._pending = 0
+        self._last_commit = time.monotonic()
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.create_function("REGEXP", 2, lambda pattern, value: bool(value and re.search(pattern, value)))
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+        threading.Thread(target=self._flush_loop, name="local-store-flush", daemon=True).start()
+
+    def _flush_loop(self) -> None:
+        """Valide les écritures restées en attente faute d'écriture suivante"""
+        while True:
+            time.sleep(self.flush_interval)
+            with self._lock:
+                if self._pending and time.monotonic() - self._last_commit >= self.flush_interval:
+                    self.flush()
+
+    # ----- transactions ------------------------------------------------------
+    def _write(self, sql: str, params: Iterable = ()) -> sqlite3.Cursor:
+        with self._lock:
+            cursor = self.conn.execute(sql, tuple(params))
+            self._pending += 1
+            if self._pending >= self.batch_size or time.monotonic() - self._last_commit >= self.flush_interval:
+                self.flush()
+            return cursor
+
+    def _read(self, sql: str, params: Iterable = ()) -> List[sqlite3.Row]:
+        with self._lock:
+            return self.conn.execute(sql, tuple(params)).fetchall()
+
+    def flush(self) -> None:
+        with self._lock:
+            self.conn.commit()
+            self._pending = 0
+            self._last_commit = time.monotonic()
+
+    def close(self) -> None:
+        """Valide les écritures en attente (la connexion partagée reste ouverte)"""
+        self.flush()
+
+    # ----- url_history / robots_cache ---------------------------------------
+    def recently_crawled(self, url: str, since: datetime) -> bool:
+        return bool(self._read("SELECT 1 FROM url_history WHERE url = ? AND last_crawled >= ?", (url, _iso(since))))
+
+    def mark_crawled(self, url: str, success: bool = True) -> None:
+        self._write(
+            "INSERT INTO url_history(url, last_crawled, success, crawl_count) VALUES (?, ?, ?, 1) "
+            "ON CONFLICT(url) DO UPDATE SET last_crawled = excluded.last_crawled, success = excluded.success, "
+            "crawl_count = crawl_count + 1, synced = 0",
+            (url, _iso(datetime.now()), int(success)),
+        )
+
+    def known_urls(self, keys: List[str]) -> Set[str]:
+        known: Set[str] = set()
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            marks = ",".join("?" * len(chunk))
+            known.update(row["url"] for row in self._read(
+                f"SELECT url FROM url_history WHERE success = 1 AND url IN ({marks})", chunk))
+        return known
+
+    def record_alias(self, alias_key: str, canonical_key: str) -> None:
+        self._write(
+            "INSERT INTO url_history(url, last_crawled, canonical) VALUES (?, ?, ?) "
+            "ON CONFLICT(url) DO UPDATE SET canonical = excluded.canonical, last_crawled = excluded.last_crawled, synced = 0",
+            (alias_key, _iso(datetime.now()), canonical_key),
+        )
+
+    def aliases(self, prefix: str) -> List[Dict[str, str]]:
+        rows = self._read(
+            "SELECT url, canonical FROM url_history WHERE canonical IS NOT NULL AND substr(url, 1, ?) = ?",
+            (len(prefix), prefix),
+        )
+        return [{"url": row["url"], "canonical": row["canonical"]} for row in rows]
+
+    def robots_get(self, url: str) -> Optional[Dict[str, Any]]:
+        rows = self._read("SELECT allowed, timestamp FROM robots_cache WHERE url = ?", (url,))
+        if not rows:
+            return None
+        return {"url": url, "allowed": bool(rows[0]["allowed"]), "timestamp": _parse(rows[0]["timestamp"])}
+
+    def robots_put(self, url: str, allowed: bool) -> None:
+        self._write(
+            "INSERT OR REPLACE INTO robots_cache(url, allowed, timestamp) VALUES (?, ?, ?)",
+            (url, int(allowed), _iso(datetime.now())),
+        )
+
+    # ----- sources -----------------------------------------------------------
+    def add_source(self, source: Dict[str, Any]) -> str:
+        source_id = ObjectId()
+        doc = dict(source, _id=source_id)
+        self._write("INSERT INTO sources(id, enabled, doc) VALUES (?, ?, ?)",
+                    (str(source_id), int(bool(doc.get("enabled", True))), _dumps(doc)))
+        self.flush()
+        return str(source_id)
+
+    def get_source(self, source_id: str) -> Optional[Dict[str, Any]]:
+        rows = self._read("SELECT doc FROM sources WHERE id = ?", (str(source_id),))
+        return _loads(rows[0]["doc"]) if rows else None
+
+    def list_sources(self, enabled_only: bool = False) -> List[Dict[str, Any]]:
+        sql = "SELECT doc FROM sources" + (" WHERE enabled = 1" if enabled_only else "")
+        return [_loads(row["doc"]) for row in self._read(sql)]
+
+    def update_source(self, source_id: str, set_fields: Optional[Dict[str, Any]] = None,
+                      inc_fields: Optional[Dict[str, int]] = None) -> None:
+        with self._lock:
+            source = self.get_source(source_id)
+            if source is None:
+                return
+            source.update(set_fields or {})
+            for name, amount in (inc_fields or {}).items():
+                source[name] = source.get(name, 0) + amount
+            self._write("UPDATE sources SET enabled = ?, doc = ?, synced = 0 WHERE id = ?",
+                        (int(bool(source.get("enabled", True))), _dumps(source), str(source_id)))
+
+    def delete_source(self, source_id: str) -> bool:
+        with self._lock:
+            self._write("DELETE FROM revisions WHERE doc_id IN (SELECT id FROM documents WHERE source_id = ?)",
+                        (str(source_id),))
+            self._write("DELETE FROM documents WHERE source_id = ?", (str(source_id),))
+            deleted = self._write("DELETE FROM sources WHERE id = ?", (str(source_id),)).rowcount
+            self.flush()
+            return deleted > 0
+
+    # ----- documents ---------------------------------------------------------
+    def save(self, data: Dict[str, Any], source_id: Optional[str] = None,
+             extra: Optional[Dict[str, Any]] = None) -> str:
+        """Même sémantique que DocumentStore.save: "new", "changed" ou "unchanged" """
+        now = datetime.now()
+        doc = dict(data)
+        doc.pop("_id", None)
+        doc.pop("source_id", None)
+        doc.update(extra or {})
+        content = doc.pop("content", None) or ""
+        digest = content_hash(doc.get("title"), content)
+        doc.update({"content_hash": digest, "content_length": len(content), "last_seen": now})
+        source_id = str(source_id) if source_id else None
+
+        with self._lock:
+            rows = self._read("SELECT id, seen_in, content, content_hash, title, timestamp, version, doc FROM documents "
+                              "WHERE url = ?", (doc["url"],))
+            if not rows:
+                doc.update({"first_seen": now, "version": 1})
+                self._write(
+                    "INSERT INTO documents(url, source_id, seen_in, title, description, content, content_type, "
+                    "timestamp, last_seen, content_hash, content_length, version, doc) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1, ?)",
+                    (doc["url"], source_id, json.dumps([source_id] if source_id else []), doc.get("title"),
+                     doc.get("description"), content, doc.get("content_type"), _iso(doc.get("timestamp")),
+                     _iso(now), digest, len(content), _dumps(doc)),
+                )
+                return "new"
+
+            existing = rows[0]
+            seen_in = json.loads(existing["seen_in"])
+            if source_id and source_id not in seen_in:
+                seen_in.append(source_id)
+            if existing["content_hash"] == digest:
+                self._write("UPDATE documents SET last_seen = ?, seen_in = ?, synced = 0 WHERE id = ?",
+                            (_iso(now), json.dumps(seen_in), existing["id"]))
+                return "unchanged"
+
+            previous = existing["content"] or ""
+            codec, blob = compress_delta(previous, content)
+            self._write(
+                "INSERT INTO revisions(doc_id, url, version, content_hash, title, timestamp, replaced_at, codec, data, "
+                "length) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (existing["id"], doc["url"], existing["version"], existing["content_hash"], existing["title"],
+                 existing["timestamp"], _iso(now), codec, blob, len(previous)),
+            )
+            doc = {**_loads(existing["doc"]), **doc, "version": existing["version"] + 1}  # comme $set
+            self._write(
+                "UPDATE documents SET seen_in = ?, title = ?, description = ?, content = ?, content_type = ?, "
+                "timestamp = ?, last_seen = ?, content_hash = ?, content_length = ?, version = ?, doc = ?, synced = 0 "
+                "WHERE id = ?",
+                (json.dumps(seen_in), doc.get("title"), doc.get("description"), content, doc.get("content_type"),
+                 _iso(doc.get("timestamp")), _iso(now), digest, len(content), doc["version"], _dumps(doc),
+                 existing["id"]),
+            )
+            return "changed"
+
+    def _row_to_doc(self, row: sqlite3.Row, with_content: bool = True) -> Dict[str, Any]:
+        doc = _loads(row["doc"])
+        doc.update({"_id": row["id"], "url": row["url"], "source_id": row["source_id"],
+                    "seen_in": json.loads(row["seen_in"])})
+        if with_content:
+            doc["content"] = row["content"]
+        return doc
+
+    def find_document(self, url: str, session_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        sql, params = "SELECT * FROM documents WHERE url = ?", [url]
+        if session_id:
+            clause, session_params = self._session_clause(session_id)
+            sql += f" AND {clause}"
+            params += session_params
+        rows = self._read(sql, params)
+        return self._row_to_doc(rows[0]) if rows else None
+
+    def search(self, query: str, limit: int = 50) -> List[Dict[str, Any]]:
+        """Recherche plein texte (FTS5, classement bm25)"""
+        terms = " OR ".join(f'"{term}"' for term in re.findall(r"\w+", query, flags=re.UNICODE))
+        if not terms:
+            return []
+        rows = self._read(
+            "SELECT documents.*, bm25(documents_fts) AS rank FROM documents_fts "
+            "JOIN documents ON documents.id = documents_fts.rowid WHERE documents_fts MATCH ? "
+            "ORDER BY rank LIMIT ?",
+            (terms, limit),
+        )
+        results = []
+        for row in rows:
+            doc = self._row_to_doc(row)
+            doc["score"] = -row["rank"]
+            results.append(doc)
+        return results
+
+    def statistics(self) -> Dict[str, int]:
+        def count(sql):
+            return self._read(sql)[0][0]
+        return {
+            "total_sources": count("SELECT COUNT(*) FROM sources"),
+            "active_sources": count("SELECT COUNT(*) FROM sources WHERE enabled = 1"),
+            "failed_sources": count("SELECT COUNT(*) FROM sources WHERE json_extract(doc, '$.status') = 'failed'"),
+            "total_data": count("SELECT COUNT(*) FROM documents"),
+            "urls_crawled": count("SELECT COUNT(*) FROM url_history"),
+        }
+
+    # ----- lectures du reporting ---------------------------------------------
+    @staticmethod
+    def _session_clause(session_id: str):
+        return ("(source_id = ? OR EXISTS (SELECT 1 FROM json_each(documents.seen_in) WHERE value = ?))",
+                [session_id, session_id])
+
+    def recent_documents(self, limit: int) -> List[Dict[str, Any]]:
+        rows = self._read("SELECT * FROM documents ORDER BY timestamp DESC LIMIT ?", (limit,))
+        return [self._row_to_doc(row, with_content=False) for row in rows]
+
+    def latest_session_id(self) -> Optional[str]:
+        rows = self._read("SELECT source_id FROM documents WHERE source_id IS NOT NULL ORDER BY timestamp DESC LIMIT 1")
+        return rows[0]["source_id"] if rows else None
+
+    def session_data(self, session_id: str, article_regex: str, sample_limit: int) -> Dict[str, Any]:
+        """Agrégats de summarize_session calculés en SQL"""
+        clause, params = self._session_clause(session_id)
+        total_docs = self._read(f"SELECT COUNT(*) FROM documents WHERE {clause}", params)[0][0]
+        news_clause = f"{clause} AND url REGEXP ?"
+        news_docs = self._read(f"SELECT COUNT(*) FROM documents WHERE {news_clause}", params + [article_regex])[0][0]
+        where, where_params = (news_clause, params + [article_regex]) if news_docs else (clause, params)
+
+        def rows(sql, extra=()):
+            return self._read(sql.format(where=where), where_params + list(extra))
+
+        bounds = rows("SELECT MIN(timestamp), MAX(timestamp) FROM documents WHERE {where}")[0]
+        domains: Dict[str, int] = {}
+        for row in rows("SELECT url FROM documents WHERE {where}"):
+            parts = row["url"].split("/")
+            domain = parts[2] if len(parts) > 2 else None
+            domains[domain] = domains.get(domain, 0) + 1
+        lengths = rows(
+            "SELECT AVG(length(COALESCE(description, ''))) AS avg_desc_len, "
+            "AVG(COALESCE(content_length, length(COALESCE(content, '')))) AS avg_content_len, "
+            "SUM(length(COALESCE(title, '')) <= 5) AS missing_title, "
+            "SUM(length(COALESCE(description, '')) <= 30) AS missing_desc, "
+            "SUM(COALESCE(content_length, length(COALESCE(content, ''))) <= 500) AS thin_content "
+            "FROM documents WHERE {where}"
+        )[0]
+        return {
+            "total_docs": total_docs,
+            "news_docs": news_docs,
+            "start_ts": _parse(bounds[0]),
+            "end_ts": _parse(bounds[1]),
+            "content_types": [
+                {"_id": row[0], "count": row[1]}
+                for row in rows("SELECT content_type, COUNT(*) AS count FROM documents WHERE {where} "
+                                "GROUP BY content_type ORDER BY count DESC")
+            ],
+            "domains": [
+                {"_id": domain, "count": count}
+                for domain, count in sorted(domains.items(), key=lambda item: -item[1])[:15]
+            ],
+            "time_histogram": [
+                {"_id": row[0], "count": row[1]}
+                for row in rows("SELECT replace(substr(timestamp, 1, 13), 'T', ' ') || ':00' AS bucket, COUNT(*) "
+                                "FROM documents WHERE {where} GROUP BY bucket ORDER BY bucket")
+            ],
+            "topic_docs": [
+                {"title": row["title"], "description": row["description"]}
+                for row in rows("SELECT title, description FROM documents WHERE {where} LIMIT 400")
+            ],
+            "length_stats": dict(lengths),
+            "unique_titles": rows("SELECT COUNT(DISTINCT title) FROM documents WHERE {where} AND title IS NOT NULL")[0][0],
+            "latest_items": [
+                self._row_to_doc(row, with_content=False)
+                for row in rows("SELECT * FROM documents WHERE {where} ORDER BY timestamp DESC LIMIT ?", [sample_limit])
+            ],
+        }
+
+    # ----- synchronisation ---------------------------------------------------
+    def sync_to_mongo(self, db, batch: int = 500) -> Dict[str, int]:
+        """Reverse sources, url_history et documents non synchronisés dans MongoDB"""
+        from crawler.storage import DocumentStore
+
+        stats = {"sources": 0, "url_history": 0, "documents": 0}
+        self.flush()
+        for row in self._read("SELECT id, doc FROM sources WHERE synced = 0"):
+            doc = _loads(row["doc"])
+            db["sources"].replace_one({"_id": doc["_id"]}, doc, upsert=True)
+            self._write("UPDATE sources SET synced = 1 WHERE id = ?", (row["id"],))
+            stats["sources"] += 1
+
+        for row in self._read("SELECT * FROM url_history WHERE synced = 0"):
+            fields = {"last_crawled": _parse(row["last_crawled"])}
+            if row["success"] is not None:
+                fields["success"] = bool(row["success"])
+            if row["canonical"]:
+                fields["canonical"] = row["canonical"]
+            db["url_history"].update_one({"url": row["url"]}, {"$set": fields}, upsert=True)
+            self._write("UPDATE url_history SET synced = 1 WHERE url = ?", (row["url"],))
+            stats["url_history"] += 1
+
+        store = DocumentStore(db)
+        while True:
+            rows = self._read("SELECT * FROM documents WHERE synced = 0 LIMIT ?", (batch,))
+            if not rows:
+                break
+            for row in rows:
+                doc = self._row_to_doc(row)
+                doc.pop("_id")
+                seen_in = doc.pop("seen_in") or []
+                source_id = doc.pop("source_id")
+                for session_id in [source_id] + [sid for sid in seen_in if sid != source_id]:
+                    store.save(dict(doc), source_id=session_id)
+                self._write("UPDATE documents SET synced = 1 WHERE id = ?", (row["id"],))
+                stats["documents"] += 1
+            self.flush()
+        self.flush()
+        return stats
+
+
+def main() -> int:
+    from config.settings import CRAWLER_LOCAL_DB, DATABASE_NAME, MONGODB_URI
+    from crawler.db import connect
+
+    parser = argparse.ArgumentParser(description="Stockage local SQLite du crawler")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sync = sub.add_parser("sync", help="reverser les données locales dans MongoDB")
+    sync.add_argument("--path", default=CRAWLER_LOCAL_DB)
+    sync.add_argument("--mongo-uri", default=MONGODB_URI)
+    sync.add_argument("--db", default=DATABASE_NAME)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    if not os.path.exists(args.path):
+        logger.error(f"❌ Base locale introuvable: {args.path}")
+        return 1
+    try:
+        db = connect(args.mongo_uri, args.db, timeout_ms=5000)
+    except Exception as e:
+        logger.error(f"❌ MongoDB indisponible: {e}")
+        return 1
+    stats = open_local_store(args.path).sync_to_mongo(db)
+    logger.info(f"✅ Synchronisation terminée: {stats}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+"""
+Premier niveau de parsing: texte brut, titre/meta par regex et préfiltre de mots-clés,
+avant l'extraction DOM complète de _process_html.
+"""
+import html
+import re
+from typing import Callable, Iterable, Optional
+
+from bs4 import SoupStrainer
+
+_CHARSET = re.compile(rb"<meta[^>]+charset=[\"']?([\w-]+)", re.I)
+_HEADER_CHARSET = re.compile(r"charset=[\"']?([\w-]+)", re.I)
+_JSON_ESCAPE = re.compile(r"\\u([0-9a-fA-F]{4})")
+_TITLE = re.compile(r"<title[^>]*>(.*?)</title>", re.I | re.S)
+_META_CONTENT = re.compile(r"<meta\s[^>]*content\s*=\s*(?:\"([^\"]*)\"|'([^']*)')", re.I)
+_TAG = re.compile(r"<[^>]*>")
+
+# Seuls les liens sont construits par BeautifulSoup pour l'extraction de liens
+LINK_STRAINER = SoupStrainer("a", href=True)
+
+
+def decode_html(content: bytes, content_type: Optional[str] = None) -> str:
+    """Décode le HTML brut: charset de l'en-tête Content-Type, puis <meta charset>, puis utf-8 / cp1252"""
+    if isinstance(content, str):
+        return content
+    header = _HEADER_CHARSET.search(content_type or "")
+    candidates = [header.group(1) if header else None]
+    match = _CHARSET.search(content[:4096])
+    if match:
+        candidates.append(match.group(1).decode("ascii", "ignore"))
+    for candidate in candidates + ["utf-8"]:
+        if not candidate:
+            continue
+        try:
+            return content.decode(candidate)
+        except (LookupError, UnicodeDecodeError):
+            continue
+    return content.decode("cp1252", errors="replace")
+
+
+def page_head(text: str) -> str:
+    """Titre et contenus <meta> (description, keywords, og:*) extraits par regex"""
+    parts = [match.group(1) for match in _TITLE.finditer(text[:200000])]
+    parts += [a or b for a, b in _META_CONTENT.findall(text[:200000])]
+    return html.unescape(" ".join(parts))
+
+
+def raw_text(text: str) -> str:
+    """Texte sans balises ni entités (les scripts JSON-LD restent inclus, échappements \\uXXXX décodés)"""
+    text = html.unescape(_TAG.sub(" ", text))
+    if "\\u" in text:
+        text = _JSON_ESCAPE.sub(lambda match: chr(int(match.group(1), 16)), text)
+    return text
+
+
+class KeywordPrefilter:
+    """Condition nécessaire de _is_relevant: un mot-clé apparaît en sous-chaîne du texte normalisé"""
+
+    def __init__(self, keywords: Iterable[str], normalize: Callable[[str], str]) -> None:
+        self.normalize = normalize
+        terms = sorted({normalize(k) for k in keywords if k and normalize(k)}, key=len, reverse=True)
+        self.pattern = re.compile("|".join(re.escape(term) for term in terms)) if terms else None
+
+    def matches(self, url: str, content: bytes, content_type: Optional[str] = None) -> bool:
+        if self.pattern is None:
+            return True
+        if self.pattern.search(self.normalize(url)):
+            return True
+        text = decode_html(content, content_type)
+        return self.pattern.search(self.normalize(page_head(text) + " " + raw_text(text))) is not None
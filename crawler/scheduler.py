@@ -0,0 +1,434 @@
+"""
+Planificateur des sources: crawls en parallèle, prochaines exécutions stockées dans MongoDB.
+
+Chaque source porte `next_run_at`. Le répartiteur réserve les sources échues une par une
+(find_one_and_update avec un bail `lease_until`, sûr entre plusieurs processus) et les confie à un
+pool borné de threads; une source lente ne retarde plus les autres. Les premières exécutions sont
+étalées (décalage stable par source, `jitter` de l'intervalle) pour que les sources quotidiennes ne
+partent pas toutes à la même `schedule_time`. Après un arrêt, une source en retard d'au moins un
+intervalle est rattrapée une seule fois ("run-once") ou replanifiée sans crawl ("skip").
+
+Les sources ajoutées ou modifiées sont vues par un change stream sur `sources` (replica set), sinon
+par scrutation toutes les poll_interval secondes.
+
+Sources `adaptive`: le taux de changement (contenus nouveaux par heure, mesuré par hash d'un crawl
+à l'autre) est lissé par moyenne mobile exponentielle; l'intervalle suivant est celui qui donne la
+fraîcheur visée (modèle de Poisson: F = (1 - e^-λI) / λI), borné par min/max_interval. Le taux,
+l'intervalle et la fraîcheur prévue sont enregistrés sur la source.
+
+  python -m crawler.scheduler            # lance le planificateur (Ctrl+C pour arrêter)
+  python -m crawler.scheduler status     # prochaines exécutions
+"""
+import argparse
+import hashlib
+import logging
+import math
+import os
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.errors import PyMongoError
+
+from config.settings import (
+    CRAWLER_ADAPTIVE_ALPHA,
+    CRAWLER_ADAPTIVE_FRESHNESS,
+    CRAWLER_ADAPTIVE_MAX_INTERVAL,
+    CRAWLER_ADAPTIVE_MIN_INTERVAL,
+    CRAWLER_SCHEDULER_JITTER,
+    CRAWLER_SCHEDULER_MISSED,
+    CRAWLER_SCHEDULER_WORKERS,
+    DATABASE_NAME,
+    MONGODB_URI,
+)
+from crawler.canonical import url_domain
+
+logger = logging.getLogger(__name__)
+
+FREQUENCIES = {
+    "hourly": timedelta(hours=1),
+    "daily": timedelta(days=1),
+    "weekly": timedelta(weeks=1),
+    "monthly": timedelta(days=30),
+}
+MISSED_POLICIES = ("run-once", "skip")
+# Décalage maximal d'étalement, quelle que soit la fréquence
+MAX_JITTER = timedelta(minutes=30)
+# Champs dont la modification recalcule la prochaine exécution
+SCHEDULE_FIELDS = ("frequency", "schedule_time", "enabled")
+
+
+def freshness(rate: float, hours: float) -> float:
+    """Part moyenne du temps où la copie est à jour, pour λ changements/h re-crawlés toutes les `hours` h"""
+    x = rate * hours
+    if x <= 1e-9:
+        return 1.0
+    return (1 - math.exp(-x)) / x
+
+
+def interval_for_freshness(rate: float, target: float, min_hours: float, max_hours: float) -> float:
+    """Intervalle (h) le plus long qui garde la fraîcheur moyenne >= target, borné"""
+    if rate <= 0:
+        return max_hours
+    low, high = 0.0, 100.0  # F(x) décroît avec x = λI: recherche dichotomique de F(x) = target
+    for _ in range(60):
+        middle = (low + high) / 2
+        if freshness(1.0, middle) >= target:
+            low = middle
+        else:
+            high = middle
+    return min(max(low / rate, min_hours), max_hours)
+
+
+def update_change_rate(previous: Optional[float], changes: int, hours: float, alpha: float,
+                       saturated: bool = False) -> float:
+    """Moyenne mobile exponentielle du taux observé (changements/h)
+
+    saturated: le crawl a atteint max_hits, le nombre de changements est un minimum; le taux ne
+    descend alors pas sous l'observation.
+    """
+    observed = changes / max(hours, 1 / 60)
+    rate = observed if previous is None else alpha * observed + (1 - alpha) * previous
+    return max(rate, observed) if saturated else rate
+
+
+def _stable_fraction(source_id: Any) -> float:
+    """Valeur dans [0, 1) propre à la source (même décalage d'un redémarrage à l'autre)"""
+    digest = hashlib.md5(str(source_id).encode("utf-8")).hexdigest()
+    return int(digest[:8], 16) / 0x100000000
+
+
+class SourceScheduler:
+    """Répartit les sources échues sur `workers` threads, un crawler par thread"""
+
+    def __init__(self, db, crawler_factory: Callable[[], Any], workers: int = CRAWLER_SCHEDULER_WORKERS,
+                 jitter: float = CRAWLER_SCHEDULER_JITTER, missed: str = CRAWLER_SCHEDULER_MISSED,
+                 poll_interval: float = 30.0, lease_seconds: float = 600.0,
+                 target_freshness: float = CRAWLER_ADAPTIVE_FRESHNESS, alpha: float = CRAWLER_ADAPTIVE_ALPHA) -> None:
+        if missed not in MISSED_POLICIES:
+            raise ValueError(f"Politique de rattrapage inconnue: {missed} ({', '.join(MISSED_POLICIES)})")
+        self.sources = db["sources"]
+        self.crawler_factory = crawler_factory
+        self.workers = max(1, workers)
+        self.jitter = max(0.0, jitter)
+        self.missed = missed
+        self.poll_interval = poll_interval
+        self.lease = timedelta(seconds=lease_seconds)
+        self.target_freshness = min(max(target_freshness, 0.05), 0.99)
+        self.alpha = alpha
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self.stats = {"runs": 0, "failures": 0, "missed": 0, "deferred": 0}
+
+        self._slots = threading.BoundedSemaphore(self.workers)
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="source-worker")
+        self._local = threading.local()
+        self._running: Dict[Any, str] = {}  # _id -> domaine des crawls en cours
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+
+    # ----- calendrier -----------------------------------------------------------
+    def interval(self, source: Dict[str, Any]) -> timedelta:
+        """Intervalle adaptatif s'il est déjà estimé, sinon celui de la fréquence fixe"""
+        if source.get("adaptive") and source.get("adaptive_interval"):
+            return timedelta(seconds=source["adaptive_interval"])
+        return FREQUENCIES.get(source.get("frequency"), FREQUENCIES["daily"])
+
+    def _bounds(self, source: Dict[str, Any]):
+        min_seconds = source.get("min_interval") or CRAWLER_ADAPTIVE_MIN_INTERVAL
+        max_seconds = source.get("max_interval") or CRAWLER_ADAPTIVE_MAX_INTERVAL
+        return min_seconds / 3600, max(max_seconds, min_seconds) / 3600
+
+    def observe(self, source: Dict[str, Any], started: datetime) -> Dict[str, Any]:
+        """Met à jour le taux de changement d'une source adaptative après un crawl réussi (champs à enregistrer)
+
+        L'intervalle observé court depuis le dernier crawl réussi: last_changes compare à ses hashes.
+        """
+        crawled = self.sources.find_one({"_id": source["_id"]}, {"last_changes": 1, "last_collected": 1,
+                                                                  "max_hits": 1, "change_rate": 1})
+        previous_run = source.get("last_success_at") or source.get("last_run_at")
+        if not crawled or crawled.get("last_changes") is None or previous_run is None:
+            return {}  # premier crawl: pas encore de référence
+        hours = (started - previous_run).total_seconds() / 3600
+        saturated = bool(crawled.get("max_hits")) and crawled.get("last_collected", 0) >= crawled["max_hits"]
+        rate = update_change_rate(crawled.get("change_rate"), crawled["last_changes"], hours, self.alpha, saturated)
+        min_hours, max_hours = self._bounds(source)
+        interval_hours = interval_for_freshness(rate, self.target_freshness, min_hours, max_hours)
+        return {
+            "change_rate": rate,
+            "adaptive_interval": interval_hours * 3600,
+            "predicted_freshness": freshness(rate, interval_hours),
+        }
+
+    def _offset(self, source: Dict[str, Any]) -> timedelta:
+        span = min(self.interval(source) * self.jitter, MAX_JITTER)
+        return span * _stable_fraction(source["_id"])
+
+    def first_run(self, source: Dict[str, Any], now: datetime) -> datetime:
+        """Prochaine schedule_time (ou maintenant pour hourly), plus le décalage de la source"""
+        start = now
+        if source.get("frequency") != "hourly":
+            try:
+                hour, minute = (int(part) for part in str(source.get("schedule_time") or "09:00").split(":")[:2])
+                start = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+                if start < now:
+                    start += timedelta(days=1)
+            except ValueError:
+                start = now
+        return start + self._offset(source)
+
+    def next_run(self, source: Dict[str, Any], now: datetime) -> datetime:
+        """Créneau suivant, ancré sur le précédent (pas de dérive, décalage conservé)"""
+        interval = self.interval(source)
+        if source.get("adaptive"):
+            return now + interval
+        previous = source.get("next_run_at") or now
+        if previous + interval > now:
+            return previous + interval
+        periods = (now - previous) // interval + 1
+        return previous + interval * periods
+
+    def prepare(self, now: Optional[datetime] = None) -> int:
+        """Planifie les sources sans next_run_at (nouvelles, ou fréquence modifiée)"""
+        now = now or datetime.now()
+        prepared = 0
+        for source in self.sources.find({"enabled": True, "next_run_at": None}):
+            self.sources.update_one({"_id": source["_id"], "next_run_at": None},
+                                    {"$set": {"next_run_at": self.first_run(source, now)}})
+            prepared += 1
+        return prepared
+
+    def catch_up(self, now: Optional[datetime] = None) -> int:
+        """Au démarrage: sources en retard d'au moins un intervalle, rattrapées une fois ou replanifiées"""
+        now = now or datetime.now()
+        late = 0
+        overdue = self.sources.find({"enabled": True, "next_run_at": {"$lt": now}, "lease_until": None})
+        for source in overdue:
+            missed = int((now - source["next_run_at"]) // self.interval(source))
+            if missed < 1:
+                continue
+            late += 1
+            self._count("missed", missed)
+            if self.missed == "skip":
+                logger.info(f"⏭️  {source.get('url')}: {missed} exécution(s) manquée(s), replanifiée")
+                self.sources.update_one({"_id": source["_id"]},
+                                        {"$set": {"next_run_at": self.next_run(source, now), "missed_runs": missed}})
+            else:
+                logger.info(f"♻️  {source.get('url')}: {missed} exécution(s) manquée(s), rattrapage unique")
+                self.sources.update_one({"_id": source["_id"]}, {"$set": {"missed_runs": missed}})
+        return late
+
+    # ----- réservation ----------------------------------------------------------
+    def _claim(self, now: datetime) -> Optional[Dict[str, Any]]:
+        return self.sources.find_one_and_update(
+            {
+                "enabled": True,
+                "next_run_at": {"$lte": now},
+                "$or": [{"lease_until": None}, {"lease_until": {"$lt": now}}],
+            },
+            {"$set": {"lease_until": now + self.lease, "lease_owner": self.owner}},
+            sort=[("next_run_at", ASCENDING)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    def _defer(self, source: Dict[str, Any], seconds: float = 60.0) -> None:
+        """Rend une source réservée dont le domaine est déjà en cours de crawl"""
+        self._count("deferred")
+        self.sources.update_one(
+            {"_id": source["_id"], "lease_owner": self.owner},
+            {"$set": {"next_run_at": datetime.now() + timedelta(seconds=seconds)},
+             "$unset": {"lease_until": "", "lease_owner": ""}},
+        )
+
+    def _renew_leases(self) -> None:
+        with self._lock:
+            running = list(self._running)
+        if running:
+            self.sources.update_many({"_id": {"$in": running}, "lease_owner": self.owner},
+                                     {"$set": {"lease_until": datetime.now() + self.lease}})
+
+    def _seconds_to_next(self) -> float:
+        upcoming = self.sources.find_one({"enabled": True, "next_run_at": {"$ne": None}},
+                                         {"next_run_at": 1}, sort=[("next_run_at", ASCENDING)])
+        if not upcoming:
+            return self.poll_interval
+        return min(max((upcoming["next_run_at"] - datetime.now()).total_seconds(), 0.1), self.poll_interval)
+
+    # ----- exécution -------------------------------------------------------------
+    def _dispatch(self) -> None:
+        last_renew = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                self.prepare()
+                if time.monotonic() - last_renew > self.lease.total_seconds() / 3:
+                    self._renew_leases()
+                    last_renew = time.monotonic()
+                while self._slots.acquire(timeout=1):
+                    source = self._claim(datetime.now())
+                    if source is None:
+                        self._slots.release()
+                        break
+                    domain = url_domain(source.get("url"))
+                    with self._lock:
+                        busy = domain in self._running.values()
+                        if not busy:
+                            self._running[source["_id"]] = domain
+                    if busy:
+                        self._slots.release()
+                        self._defer(source)
+                        continue
+                    self._pool.submit(self._run, source)
+                wait = self._seconds_to_next()
+            except PyMongoError as e:
+                logger.warning(f"⚠️  Planificateur: MongoDB indisponible ({type(e).__name__}), nouvel essai")
+                wait = self.poll_interval
+            self._wakeup.wait(wait)
+            self._wakeup.clear()
+
+    def _crawler(self):
+        crawler = getattr(self._local, "crawler", None)
+        if crawler is None:
+            crawler = self._local.crawler = self.crawler_factory()
+        return crawler
+
+    def _count(self, key: str, value: int = 1) -> None:
+        with self._lock:
+            self.stats[key] += value
+
+    def _succeeded(self, source: Dict[str, Any], started: datetime) -> bool:
+        """crawl_source journalise ses erreurs sans lever: le résultat se lit sur la source"""
+        crawled = self.sources.find_one({"_id": source["_id"]}, {"status": 1, "last_crawl": 1})
+        started = started.replace(microsecond=started.microsecond // 1000 * 1000)  # dates BSON à la ms
+        return bool(crawled and crawled.get("status") == "completed"
+                    and crawled.get("last_crawl") and crawled["last_crawl"] >= started)
+
+    def _run(self, source: Dict[str, Any]) -> None:
+        started = datetime.now()
+        succeeded = False
+        try:
+            logger.info(f"⏰ Crawl planifié: {source.get('url')}")
+            self._crawler().crawl_source(str(source["_id"]))
+            succeeded = self._succeeded(source, started)
+        except Exception as e:
+            logger.error(f"❌ Crawl planifié en échec {source.get('url')}: {e}")
+        finally:
+            self._count("runs" if succeeded else "failures")
+            finished = datetime.now()
+            try:
+                fields = {"last_run_at": started, "last_duration": (finished - started).total_seconds()}
+                if succeeded:
+                    fields["last_success_at"] = started
+                    if source.get("adaptive"):
+                        # Un crawl en échec ne mesure rien: le taux n'est mis à jour qu'après un succès
+                        fields.update(self.observe(source, started))
+                fields["next_run_at"] = self.next_run({**source, **fields}, finished)
+                self.sources.update_one(
+                    {"_id": source["_id"]},
+                    {"$set": fields, "$unset": {"lease_until": "", "lease_owner": "", "missed_runs": ""}},
+                )
+            except PyMongoError as e:
+                logger.warning(f"Prochaine exécution non enregistrée {source.get('url')}: {e}")
+            with self._lock:
+                self._running.pop(source["_id"], None)
+            self._slots.release()
+            self._wakeup.set()
+
+    def _watch(self) -> None:
+        """Réveille le répartiteur à chaque ajout/modification de source (change stream)"""
+        try:
+            with self.sources.watch() as stream:
+                logger.info("👀 Planificateur: suivi des sources par change stream")
+                for change in stream:
+                    if self._stop.is_set():
+                        return
+                    updated = (change.get("updateDescription") or {}).get("updatedFields") or {}
+                    if any(field in updated for field in SCHEDULE_FIELDS):
+                        # Fréquence/heure changée: recalculée par prepare()
+                        self.sources.update_one({"_id": change["documentKey"]["_id"], "lease_until": None},
+                                                {"$unset": {"next_run_at": ""}})
+                    if change.get("operationType") in ("insert", "replace") or updated:
+                        self._wakeup.set()
+        except PyMongoError as e:
+            logger.info(f"Change streams indisponibles ({e}), scrutation toutes les {self.poll_interval:.0f}s")
+
+    def start(self) -> "SourceScheduler":
+        try:
+            self.prepare()
+            self.catch_up()
+        except PyMongoError as e:
+            logger.warning(f"⚠️  Planificateur: rattrapage impossible ({e})")
+        for target, name in ((self._dispatch, "source-scheduler"), (self._watch, "source-watch")):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"✓ Planificateur démarré ({self.workers} crawls simultanés)")
+        return self
+
+    def stop(self, wait: bool = True) -> None:
+        self._stop.set()
+        self._wakeup.set()
+        self._pool.shutdown(wait=wait)
+
+    def upcoming(self, limit: int = 20):
+        return list(self.sources.find({"enabled": True}, {"url": 1, "frequency": 1, "next_run_at": 1,
+                                                          "last_run_at": 1, "lease_until": 1, "adaptive": 1,
+                                                          "change_rate": 1, "adaptive_interval": 1,
+                                                          "predicted_freshness": 1})
+                    .sort("next_run_at", ASCENDING).limit(limit))
+
+
+def freshness_now(source: Dict[str, Any], now: Optional[datetime] = None) -> Optional[float]:
+    """Probabilité que la copie d'une source adaptative soit encore à jour (aucun changement depuis)"""
+    last_success = source.get("last_success_at") or source.get("last_run_at")
+    if source.get("change_rate") is None or not last_success:
+        return None
+    hours = ((now or datetime.now()) - last_success).total_seconds() / 3600
+    return math.exp(-source["change_rate"] * max(hours, 0.0))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Planificateur des sources du crawler")
+    parser.add_argument("command", nargs="?", default="run", choices=("run", "status"))
+    parser.add_argument("--workers", type=int, default=CRAWLER_SCHEDULER_WORKERS)
+    parser.add_argument("--missed", choices=MISSED_POLICIES, default=CRAWLER_SCHEDULER_MISSED)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    from crawler.db import connect
+    from crawler.web_crawler import WebCrawler
+
+    try:
+        db = connect(MONGODB_URI, DATABASE_NAME, timeout_ms=5000)
+    except Exception as e:
+        print(f"MongoDB injoignable: {e}")
+        return 1
+    scheduler = SourceScheduler(db, WebCrawler, workers=args.workers, missed=args.missed)
+    if args.command == "status":
+        scheduler.prepare()
+        for source in scheduler.upcoming():
+            state = "en cours" if source.get("lease_until") else (source.get("next_run_at") or "-")
+            frequency = "adaptive" if source.get("adaptive") else source.get("frequency", "-")
+            line = f"{str(source['_id'])}  {frequency:<8} {state}  {source.get('url')}"
+            if source.get("change_rate") is not None:
+                line += (f"  λ={source['change_rate']:.2f}/h  intervalle {source['adaptive_interval'] / 3600:.1f}h"
+                         f"  fraîcheur prévue {source['predicted_freshness']:.0%}, actuelle {freshness_now(source):.0%}")
+            print(line)
+        return 0
+    scheduler.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("\n⏹️  Arrêt du planificateur (crawls en cours terminés)")
+        scheduler.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,348 @@
+"""
+Spool d'écriture sur disque entre le crawler et MongoDB.
+
+Le crawler ajoute ses écritures (url_history, robots_cache, documents) à un segment JSONL local
+(bson.json_util: dates et ObjectId conservés) et continue sans attendre la base; un thread les
+reverse dans MongoDB par bulk_write, avec reprises tant que la base ne répond pas. L'offset validé
+de chaque segment est écrit à côté (`<segment>.offset`): après un arrêt, les enregistrements non
+reversés sont rejoués au démarrage suivant (livraison au moins une fois).
+
+Un enregistrement refusé pour une autre raison qu'une panne passagère (forme invalide, document
+rejeté par la base) est écarté dans `dead-letter.jsonl` avec son erreur: le vidage continue derrière.
+"""
+import atexit
+import glob
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import json_util
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, ConnectionFailure, ExecutionTimeout, WTimeoutError
+
+from crawler.db import get_client
+from crawler.storage import DocumentStore
+
+try:
+    import fcntl
+except ImportError:  # Windows: un seul processus par répertoire de spool
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_BYTES = 64 * 1024 * 1024
+DEAD_LETTER = "dead-letter.jsonl"
+# Erreurs passagères (élection, failover, réseau): on réessaie le même lot
+TRANSIENT_ERRORS = (ConnectionFailure, ExecutionTimeout, WTimeoutError)
+
+_spools: Dict[str, "WriteSpool"] = {}
+_spools_lock = threading.Lock()
+
+
+def open_spool(directory: str, mongo_uri: str) -> "WriteSpool":
+    """Spool partagé par répertoire (un thread de vidage par processus)"""
+    directory = os.path.abspath(directory)
+    with _spools_lock:
+        spool = _spools.get(directory)
+        if spool is None:
+            spool = _spools[directory] = WriteSpool(directory, mongo_uri)
+            atexit.register(spool.close)
+        return spool
+
+
+class _Segment:
+    def __init__(self, path: str, handle) -> None:
+        self.path = path
+        self.handle = handle  # porte le verrou du segment
+        self.offset = 0
+        self.reader = None
+        offset_path = path + ".offset"
+        if os.path.exists(offset_path):
+            with open(offset_path) as f:
+                self.offset = int(f.read().strip() or 0)
+
+    @property
+    def size(self) -> int:
+        return os.path.getsize(self.path)
+
+    def commit(self, offset: int) -> None:
+        self.offset = offset
+        tmp = f"{self.path}.offset.tmp"
+        with open(tmp, "w") as f:
+            f.write(str(offset))
+        os.replace(tmp, self.path + ".offset")
+
+    def remove(self) -> None:
+        for handle in (self.reader, self.handle):
+            if handle is not None:
+                handle.close()
+        for path in (self.path, self.path + ".offset"):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def _try_lock(handle) -> bool:
+    if fcntl is None:
+        return True
+    try:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except OSError:
+        return False
+
+
+class WriteSpool:
+    """Journal d'écritures en ajout seul, vidé vers MongoDB par un thread de fond"""
+
+    def __init__(self, directory: str, mongo_uri: str, segment_bytes: int = SEGMENT_BYTES,
+                 batch_size: int = 500, flush_interval: float = 0.5, max_backoff: float = 30.0,
+                 fsync: bool = False) -> None:
+        self.directory = directory
+        self.mongo_uri = mongo_uri
+        self.segment_bytes = segment_bytes
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_backoff = max_backoff
+        self.fsync = fsync
+        self.stats = {"written": 0, "flushed": 0, "retries": 0, "dropped": 0, "recovered": 0}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._stores: Dict[str, DocumentStore] = {}
+        self._unflushed = 0
+        os.makedirs(directory, exist_ok=True)
+
+        self._segments: List[_Segment] = self._recover()
+        self._active = self._open_segment()
+        self._thread = threading.Thread(target=self._run, name="mongo-spool", daemon=True)
+        self._thread.start()
+
+    # ----- écriture (thread du crawler) --------------------------------------
+    def update(self, db_name: str, collection: str, filter: Dict[str, Any], update: Dict[str, Any],
+               upsert: bool = True) -> None:
+        self._append({"op": "update", "db": db_name, "c": collection, "f": filter, "u": update, "upsert": upsert})
+
+    def save(self, db_name: str, data: Dict[str, Any], source_id: Optional[str] = None,
+             extra: Optional[Dict[str, Any]] = None) -> None:
+        """Différé de DocumentStore.save (versionnement calculé au moment du vidage)"""
+        self._append({"op": "save", "db": db_name, "data": data, "source_id": source_id, "extra": extra})
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        line = (json_util.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        with self._lock:
+            self._active.handle.write(line)
+            self._active.handle.flush()
+            if self.fsync:
+                os.fsync(self._active.handle.fileno())
+            self._unflushed += 1
+            self.stats["written"] += 1
+            if self._unflushed >= self.batch_size:
+                self._wakeup.set()
+
+    # ----- segments -----------------------------------------------------------
+    def _open_segment(self) -> _Segment:
+        stamp = datetime.now().strftime("%Y%m%d%H%M%S")
+        path = os.path.join(self.directory, f"spool-{stamp}-{os.getpid()}-{uuid.uuid4().hex[:6]}.jsonl")
+        handle = open(path, "ab")
+        _try_lock(handle)
+        segment = _Segment(path, handle)
+        self._segments.append(segment)
+        return segment
+
+    def _recover(self) -> List[_Segment]:
+        """Segments laissés par un processus arrêté (verrou libre), rejoués en premier"""
+        segments = []
+        for path in sorted(glob.glob(os.path.join(self.directory, "spool-*.jsonl"))):
+            handle = open(path, "ab")
+            if not _try_lock(handle):
+                handle.close()  # segment actif d'un autre processus
+                continue
+            segment = _Segment(path, handle)
+            if segment.offset >= segment.size:
+                segment.remove()
+                continue
+            self.stats["recovered"] += 1
+            segments.append(segment)
+        if segments:
+            logger.info(f"♻️  Spool: {len(segments)} segment(s) non reversé(s) repris")
+        return segments
+
+    def _read_batch(self, segment: _Segment) -> List[Tuple[int, Optional[Dict[str, Any]]]]:
+        """(offset de fin, enregistrement) des lignes complètes suivant l'offset validé"""
+        if segment.reader is None:
+            segment.reader = open(segment.path, "rb")
+        segment.reader.seek(segment.offset)
+        batch = []
+        while len(batch) < self.batch_size:
+            line = segment.reader.readline()
+            if not line.endswith(b"\n"):
+                if line and segment is not self._active:
+                    batch.append((segment.reader.tell(), None))  # ligne tronquée par un arrêt brutal
+                break
+            try:
+                record = json_util.loads(line)
+            except ValueError:
+                record = None
+            batch.append((segment.reader.tell(), record))
+        return batch
+
+    # ----- vidage (thread de fond) ---------------------------------------------
+    def _run(self) -> None:
+        backoff = self.flush_interval
+        while True:
+            try:
+                progressed = self._flush_once()
+                backoff = self.flush_interval
+            except TRANSIENT_ERRORS as e:
+                self.stats["retries"] += 1
+                logger.warning(f"⏳ Spool: MongoDB indisponible ({type(e).__name__}), nouvel essai dans {backoff:.1f}s")
+                if self._stop.wait(backoff):
+                    return
+                backoff = min(backoff * 2, self.max_backoff)
+                continue
+            except Exception as e:
+                logger.error(f"Spool: erreur de vidage: {e}")
+                progressed = False
+            if self._stop.is_set() and not progressed:
+                return
+            if not progressed:
+                self._wakeup.wait(self.flush_interval)
+                self._wakeup.clear()
+
+    def _flush_once(self) -> bool:
+        segment = self._segments[0]
+        batch = self._read_batch(segment)
+        if batch:
+            self._apply(segment, batch)
+            return True
+        with self._lock:
+            if segment is not self._active:
+                self._segments.pop(0)
+                segment.remove()
+                return True
+            if segment.offset >= self.segment_bytes and segment.offset >= segment.size:
+                self._active = self._open_segment()
+                self._segments.pop(0)
+                segment.remove()
+        return False
+
+    def _apply(self, segment: _Segment, batch: List[Tuple[int, Optional[Dict[str, Any]]]]) -> None:
+        """Updates consécutifs en bulk_write, saves un par un; l'offset avance après chaque groupe"""
+        run: List[Tuple[int, Dict[str, Any]]] = []
+        for end, record in batch:
+            if record is None:
+                self.stats["dropped"] += 1
+                logger.warning(f"Spool: enregistrement illisible ignoré ({os.path.basename(segment.path)})")
+                segment.commit(end)
+                continue
+            if record.get("op") == "update":
+                run.append((end, record))
+                continue
+            if run:
+                self._bulk(segment, run)
+                run = []
+            try:
+                if record.get("op") != "save":
+                    raise ValueError(f"opération inconnue: {record.get('op')}")
+                self._store(record["db"]).save(record["data"], source_id=record.get("source_id"),
+                                               extra=record.get("extra"))
+            except TRANSIENT_ERRORS:
+                raise
+            except Exception as e:
+                self._dead_letter(segment, record, e)
+            self._done(segment, end, 1)
+        if run:
+            self._bulk(segment, run)
+
+    def _bulk(self, segment: _Segment, run: List[Tuple[int, Dict[str, Any]]]) -> None:
+        groups: Dict[Tuple[str, str], List[Tuple[Dict[str, Any], UpdateOne]]] = {}
+        for _, record in run:
+            try:
+                operation = UpdateOne(record["f"], record["u"], upsert=record.get("upsert", True))
+                groups.setdefault((record["db"], record["c"]), []).append((record, operation))
+            except Exception as e:
+                self._dead_letter(segment, record, e)
+        for (db_name, collection), entries in groups.items():
+            try:
+                self._db(db_name)[collection].bulk_write([operation for _, operation in entries], ordered=False)
+            except TRANSIENT_ERRORS:
+                raise
+            except BulkWriteError as e:
+                errors = e.details.get("writeErrors", [])
+                for error in errors:
+                    self._dead_letter(segment, entries[error["index"]][0], error.get("errmsg", "write error"))
+                logger.warning(f"Spool: {len(errors)} écriture(s) rejetée(s) dans {collection}")
+            except Exception:
+                # Lot refusé en bloc: rejoué une écriture à la fois pour isoler la fautive
+                for record, _ in entries:
+                    try:
+                        self._db(db_name)[collection].update_one(record["f"], record["u"],
+                                                                 upsert=record.get("upsert", True))
+                    except TRANSIENT_ERRORS:
+                        raise
+                    except Exception as e:
+                        self._dead_letter(segment, record, e)
+        self._done(segment, run[-1][0], len(run))
+
+    def _dead_letter(self, segment: _Segment, record: Dict[str, Any], error: Any) -> None:
+        """Écarte un enregistrement refusé (avec son erreur) pour ne pas bloquer la suite du spool"""
+        self.stats["dropped"] += 1
+        data = record.get("data")
+        url = data.get("url") if isinstance(data, dict) else None
+        logger.warning(f"Spool: enregistrement rejeté {url or record.get('c') or ''} ({error}), mis de côté dans {DEAD_LETTER}")
+        entry = {"record": record, "error": str(error), "segment": os.path.basename(segment.path),
+                 "at": datetime.now()}
+        try:
+            with open(os.path.join(self.directory, DEAD_LETTER), "ab") as f:
+                f.write((json_util.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8"))
+        except (OSError, TypeError, ValueError) as e:
+            logger.error(f"Spool: dead letter non écrit: {e}")
+
+    def _done(self, segment: _Segment, offset: int, count: int) -> None:
+        segment.commit(offset)
+        with self._lock:
+            self._unflushed = max(self._unflushed - count, 0)
+        self.stats["flushed"] += count
+
+    def _db(self, db_name: str):
+        return get_client(self.mongo_uri)[db_name]
+
+    def _store(self, db_name: str) -> DocumentStore:
+        if db_name not in self._stores:
+            self._stores[db_name] = DocumentStore(self._db(db_name))
+        return self._stores[db_name]
+
+    # ----- contrôle -----------------------------------------------------------
+    def pending(self) -> int:
+        """Octets écrits et pas encore reversés dans MongoDB"""
+        with self._lock:
+            return sum(max(segment.size - segment.offset, 0) for segment in self._segments)
+
+    def drain(self, timeout: float = 30.0) -> bool:
+        """Attend que tout soit reversé (False si le délai expire)"""
+        deadline = time.monotonic() + timeout
+        while self.pending():
+            if time.monotonic() >= deadline or not self._thread.is_alive():
+                return False
+            self._wakeup.set()
+            time.sleep(0.05)
+        return True
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Vide ce qui peut l'être; le reste sera rejoué au prochain démarrage"""
+        if not self._thread.is_alive():
+            return
+        if not self.drain(timeout):
+            logger.warning(f"💾 Spool: {self.pending()} octets en attente, repris au prochain démarrage")
+        self._stop.set()
+        self._wakeup.set()
+        self._thread.join(timeout=5)
+        with self._lock:
+            if not any(segment.size > segment.offset for segment in self._segments):
+                for segment in self._segments:
+                    segment.remove()
+                self._segments = []
@@ -0,0 +1,241 @@
+"""
+Stockage des documents crawlés: aperçu + métadonnées dans crawled_data,
+texte complet compressé (zstd, repli zlib) dans crawled_content, chargé à la demande.
+
+Versionnement: chaque document porte un hash du contenu normalisé. Un re-crawl inchangé ne fait
+que mettre à jour last_seen; un contenu modifié archive la version précédente dans
+crawled_revisions, compressée en delta inverse (dictionnaire = texte de la version suivante).
+"""
+import hashlib
+import logging
+import zlib
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+try:
+    import zstandard
+except ImportError:  # optionnel: zlib sinon
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+PREVIEW_CHARS = 2000
+CONTENT_COLLECTION = "crawled_content"
+REVISIONS_COLLECTION = "crawled_revisions"
+
+
+def content_hash(title: Optional[str], content: Optional[str]) -> str:
+    """Hash du titre + contenu normalisés (casse et espaces ignorés)"""
+    normalized = " ".join(f"{title or ''}\n{content or ''}".lower().split())
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+def top_keywords(docs: List[Dict[str, Any]], keywords_filter: Optional[List[str]] = None,
+                 limit: int = 8) -> List[Dict[str, Any]]:
+    """Mots-clés les plus fréquents d'un crawl (filtre du job, sinon mots-clés des pages), pour le registre"""
+    counts: Counter = Counter()
+    for doc in docs:
+        for keyword in keywords_filter or doc.get("keywords") or []:
+            if isinstance(keyword, str) and keyword.strip():
+                counts[keyword.strip()] += 1
+    return [{"keyword": keyword, "count": count} for keyword, count in counts.most_common(limit)]
+
+
+def compress_text(text: str) -> Tuple[str, bytes]:
+    raw = text.encode("utf-8")
+    if zstandard is not None:
+        return "zstd", zstandard.ZstdCompressor(level=10).compress(raw)
+    return "zlib", zlib.compress(raw, 6)
+
+
+def compress_delta(text: str, reference: str) -> Tuple[str, bytes]:
+    """Compresse text avec reference comme dictionnaire (quasi nul si les versions se ressemblent)"""
+    raw, ref = text.encode("utf-8"), reference.encode("utf-8")
+    if zstandard is not None and ref:
+        dictionary = zstandard.ZstdCompressionDict(ref, dict_type=zstandard.DICT_TYPE_RAWCONTENT)
+        return "zstd-delta", zstandard.ZstdCompressor(level=10, dict_data=dictionary).compress(raw)
+    compressor = zlib.compressobj(6, zdict=ref[-32768:]) if ref else zlib.compressobj(6)
+    return "zlib-delta", compressor.compress(raw) + compressor.flush()
+
+
+def decompress_delta(codec: str, blob: bytes, reference: str) -> str:
+    ref = reference.encode("utf-8")
+    if codec == "zstd-delta":
+        if zstandard is None:
+            raise RuntimeError("Révision zstd: installez zstandard (pip install zstandard)")
+        dictionary = zstandard.ZstdCompressionDict(ref, dict_type=zstandard.DICT_TYPE_RAWCONTENT)
+        return zstandard.ZstdDecompressor(dict_data=dictionary).decompress(blob).decode("utf-8")
+    if codec == "zlib-delta":
+        decompressor = zlib.decompressobj(zdict=ref[-32768:]) if ref else zlib.decompressobj()
+        return (decompressor.decompress(blob) + decompressor.flush()).decode("utf-8")
+    return decompress_text(codec, blob)
+
+
+def decompress_text(codec: str, blob: bytes) -> str:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("Contenu zstd: installez zstandard (pip install zstandard)")
+        return zstandard.ZstdDecompressor().decompress(blob).decode("utf-8")
+    if codec == "zlib":
+        return zlib.decompress(blob).decode("utf-8")
+    raise ValueError(f"Codec inconnu: {codec}")
+
+
+class DocumentStore:
+    """Écrit et relit les documents de crawled_data en séparant le texte complet compressé"""
+
+    def __init__(self, db, preview_chars: int = PREVIEW_CHARS) -> None:
+        self.documents = db["crawled_data"]
+        self.contents = db[CONTENT_COLLECTION]
+        self.revisions = db[REVISIONS_COLLECTION]
+        self.preview_chars = preview_chars
+
+    def _split(self, data: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[str]]:
+        """(document avec aperçu, texte complet à compresser ou None s'il tient dans l'aperçu)"""
+        doc = dict(data)
+        doc.pop("_id", None)
+        content = doc.get("content") or ""
+        doc["content_length"] = len(content)
+        doc["content_hash"] = content_hash(doc.get("title"), content)
+        if len(content) <= self.preview_chars:
+            doc["content_stored"] = False
+            return doc, None
+        doc["content"] = content[:self.preview_chars]
+        doc["content_stored"] = True
+        return doc, content
+
+    def _save_content(self, doc_id, text: Optional[str]) -> None:
+        if text is None:
+            self.contents.delete_one({"_id": doc_id})
+            return
+        codec, blob = compress_text(text)
+        self.contents.replace_one(
+            {"_id": doc_id},
+            {"_id": doc_id, "codec": codec, "data": blob, "length": len(text), "updated_at": datetime.now()},
+            upsert=True,
+        )
+
+    def upsert(self, data: Dict[str, Any], set_on_insert: Optional[Dict[str, Any]] = None):
+        """Remplace les champs du document de même URL (ou le crée)"""
+        doc, text = self._split(data)
+        update = {"$set": doc}
+        if set_on_insert:
+            update["$setOnInsert"] = set_on_insert
+        saved = self.documents.find_one_and_update(
+            {"url": doc["url"]}, update, projection={"_id": 1}, upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        self._save_content(saved["_id"], text)
+        return saved["_id"]
+
+    def save(self, data: Dict[str, Any], source_id: Optional[str] = None,
+             extra: Optional[Dict[str, Any]] = None) -> str:
+        """Enregistre un résultat de crawl: "new", "changed" (révision archivée) ou "unchanged" (last_seen seul)"""
+        now = datetime.now()
+        doc, text = self._split(data)
+        doc.pop("source_id", None)
+        doc.update(extra or {})
+        doc["last_seen"] = now
+        seen_in = {"$addToSet": {"seen_in": source_id}} if source_id else {}
+
+        existing = self.documents.find_one(
+            {"url": doc["url"]},
+            {"content": 1, "content_stored": 1, "content_hash": 1, "title": 1, "version": 1, "timestamp": 1, "url": 1},
+        )
+        if existing is None:
+            doc.update({"first_seen": now, "version": 1, "source_id": source_id, "seen_in": [source_id] if source_id else []})
+            try:
+                doc_id = self.documents.insert_one(doc).inserted_id
+            except DuplicateKeyError:
+                return self.save(data, source_id, extra)  # inséré entre-temps par un autre job
+            if text is not None:
+                self._save_content(doc_id, text)
+            return "new"
+
+        previous = None
+        previous_hash = existing.get("content_hash")
+        if previous_hash is None:  # document antérieur au versionnement
+            previous = self.load_content(existing)
+            previous_hash = content_hash(existing.get("title"), previous)
+        if previous_hash == doc["content_hash"]:
+            self.documents.update_one({"_id": existing["_id"]}, {"$set": {"last_seen": now}, **seen_in})
+            return "unchanged"
+
+        if previous is None:
+            previous = self.load_content(existing)
+        version = existing.get("version", 1)
+        codec, blob = compress_delta(previous, data.get("content") or "")
+        self.revisions.insert_one({
+            "doc_id": existing["_id"],
+            "url": doc["url"],
+            "version": version,
+            "content_hash": previous_hash,
+            "title": existing.get("title"),
+            "timestamp": existing.get("timestamp"),
+            "replaced_at": now,
+            "codec": codec,
+            "data": blob,
+            "length": len(previous),
+        })
+        doc["version"] = version + 1
+        self.documents.update_one({"_id": existing["_id"]}, {"$set": doc, **seen_in})
+        self._save_content(existing["_id"], text)
+        return "changed"
+
+    def history(self, url: str) -> List[Dict[str, Any]]:
+        """Versions d'une URL, de la plus récente à la plus ancienne, textes reconstruits à rebours"""
+        doc = self.documents.find_one({"url": url})
+        if not doc:
+            return []
+        text = self.load_content(doc)
+        versions = [{"version": doc.get("version", 1), "title": doc.get("title"),
+                     "timestamp": doc.get("timestamp"), "content": text}]
+        for revision in self.revisions.find({"doc_id": doc["_id"]}).sort("version", -1):
+            text = decompress_delta(revision["codec"], revision["data"], text)
+            versions.append({"version": revision["version"], "title": revision.get("title"),
+                             "timestamp": revision.get("timestamp"), "content": text})
+        return versions
+
+    def changed_since(self, since: datetime, limit: int = 100) -> List[Dict[str, Any]]:
+        """URLs modifiées depuis une date (une révision archivée après since)"""
+        pipeline = [
+            {"$match": {"replaced_at": {"$gte": since}}},
+            {"$group": {"_id": "$url", "changes": {"$sum": 1}, "last_change": {"$max": "$replaced_at"}}},
+            {"$sort": {"last_change": -1}},
+            {"$limit": limit},
+        ]
+        return [
+            {"url": item["_id"], "changes": item["changes"], "last_change": item["last_change"]}
+            for item in self.revisions.aggregate(pipeline)
+        ]
+
+    def ensure_indexes(self) -> None:
+        self.documents.create_index("content_hash")
+        self.documents.create_index("seen_in")
+        self.revisions.create_index([("doc_id", 1), ("version", -1)])
+        self.revisions.create_index("replaced_at")
+
+    def load_content(self, doc: Dict[str, Any]) -> str:
+        """Texte complet d'un document de crawled_data (l'aperçu si le blob est absent)"""
+        preview = doc.get("content") or ""
+        if not doc.get("content_stored") or "_id" not in doc:
+            return preview
+        blob = self.contents.find_one({"_id": doc["_id"]})
+        if not blob:
+            return preview
+        try:
+            return decompress_text(blob["codec"], blob["data"])
+        except Exception as e:
+            logger.warning(f"Contenu illisible {doc.get('url')}: {e}")
+            return preview
+
+    def delete_many(self, query: Dict[str, Any]) -> int:
+        ids = [doc["_id"] for doc in self.documents.find(query, {"_id": 1})]
+        if ids:
+            self.contents.delete_many({"_id": {"$in": ids}})
+            self.revisions.delete_many({"doc_id": {"$in": ids}})
+        return self.documents.delete_many(query).deleted_count
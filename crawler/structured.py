@@ -0,0 +1,143 @@
+"""
+Données structurées d'articles: JSON-LD (NewsArticle...), OpenGraph et API REST WordPress.
+"""
+import html
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from bs4 import BeautifulSoup
+
+ARTICLE_TYPES = {
+    "newsarticle", "article", "blogposting", "reportagenewsarticle", "analysisnewsarticle",
+    "opinionnewsarticle", "reviewnewsarticle", "backgroundnewsarticle", "techarticle", "report",
+}
+WP_POSTS_ENDPOINT = "/wp-json/wp/v2/posts"
+
+
+def parse_date(value: Any) -> Optional[datetime]:
+    """Date ISO 8601 (JSON-LD, OpenGraph, WordPress) -> datetime"""
+    if not value or not isinstance(value, str):
+        return None
+    try:
+        return datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
+def html_to_text(markup: str) -> str:
+    if not markup:
+        return ""
+    if "<" not in markup:
+        return " ".join(html.unescape(markup).split())
+    return BeautifulSoup(markup, "html.parser").get_text(separator=" ", strip=True)
+
+
+def _names(value: Any) -> List[str]:
+    """Noms d'auteurs/rubriques: chaîne, objet {name}, ou liste des deux"""
+    if isinstance(value, list):
+        names = []
+        for item in value:
+            names.extend(_names(item))
+        return names
+    if isinstance(value, dict):
+        value = value.get("name")
+    if isinstance(value, str) and value.strip():
+        return [html.unescape(value.strip())]
+    return []
+
+
+def _iter_jsonld_objects(payload: Any):
+    if isinstance(payload, list):
+        for item in payload:
+            yield from _iter_jsonld_objects(item)
+    elif isinstance(payload, dict):
+        yield payload
+        for item in payload.get("@graph", []) or []:
+            yield from _iter_jsonld_objects(item)
+
+
+def _is_article(obj: Dict) -> bool:
+    types = obj.get("@type")
+    types = types if isinstance(types, list) else [types]
+    return any(isinstance(t, str) and t.lower() in ARTICLE_TYPES for t in types)
+
+
+def from_json_ld(soup) -> Dict[str, Any]:
+    for script in soup.find_all("script", type="application/ld+json"):
+        raw = script.string or script.get_text() or ""
+        try:
+            payload = json.loads(raw.strip())
+        except ValueError:
+            continue
+        for obj in _iter_jsonld_objects(payload):
+            if not _is_article(obj):
+                continue
+            return {
+                "title": html_to_text(obj.get("headline") or obj.get("name") or ""),
+                "body": html_to_text(obj.get("articleBody") or ""),
+                "description": html_to_text(obj.get("description") or ""),
+                "published_at": parse_date(obj.get("datePublished") or obj.get("dateCreated")),
+                "modified_at": parse_date(obj.get("dateModified")),
+                "author": ", ".join(_names(obj.get("author"))),
+                "section": ", ".join(_names(obj.get("articleSection"))),
+                "source": "json-ld",
+            }
+    return {}
+
+
+def from_open_graph(soup) -> Dict[str, Any]:
+    def meta(*names):
+        for name in names:
+            tag = soup.find("meta", attrs={"property": name}) or soup.find("meta", attrs={"name": name})
+            if tag and tag.get("content"):
+                return tag["content"].strip()
+        return ""
+
+    if not meta("og:title", "article:published_time"):
+        return {}
+    return {
+        "title": html.unescape(meta("og:title")),
+        "body": "",
+        "description": html.unescape(meta("og:description", "description")),
+        "published_at": parse_date(meta("article:published_time", "og:published_time", "datePublished")),
+        "modified_at": parse_date(meta("article:modified_time", "og:updated_time")),
+        "author": html.unescape(meta("article:author", "author")),
+        "section": html.unescape(meta("article:section")),
+        "source": "opengraph",
+    }
+
+
+def extract_structured(soup) -> Dict[str, Any]:
+    """Fusionne JSON-LD (prioritaire) et OpenGraph; à appeler avant la suppression des <script>"""
+    json_ld = from_json_ld(soup)
+    open_graph = from_open_graph(soup)
+    if not json_ld:
+        return open_graph
+    for key, value in open_graph.items():
+        if not json_ld.get(key):
+            json_ld[key] = value
+    return json_ld
+
+
+def wp_post_to_data(post: Dict[str, Any]) -> Dict[str, Any]:
+    """Post de l'API REST WordPress -> document au format de _process_html"""
+    embedded = post.get("_embedded") or {}
+    terms = embedded.get("wp:term") or []
+    categories = [term for group in terms for term in (group or []) if term.get("taxonomy") == "category"]
+    tags = [term for group in terms for term in (group or []) if term.get("taxonomy") == "post_tag"]
+    date_gmt = post.get("date_gmt")
+    content = html_to_text((post.get("content") or {}).get("rendered", ""))
+    return {
+        "url": post.get("link"),
+        "title": html_to_text((post.get("title") or {}).get("rendered", ""))[:200] or "Sans titre",
+        "description": html_to_text((post.get("excerpt") or {}).get("rendered", ""))[:500],
+        "content": content,
+        "content_type": "html",
+        "keywords": _names(tags)[:10],
+        "published_at": parse_date(f"{date_gmt}+00:00" if date_gmt else post.get("date")),
+        "author": ", ".join(_names(embedded.get("author"))),
+        "section": ", ".join(_names(categories)),
+        "extraction": "wp-json",
+        "timestamp": datetime.now(),
+    }
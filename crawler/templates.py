@@ -0,0 +1,128 @@
+"""
+Gabarits d'extraction appris: sélecteur du contenu principal par domaine et forme de chemin.
+"""
+import logging
+import re
+import threading
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+_NUMERIC_SEGMENT = re.compile(r"^\d+$")
+_LISTING_SEGMENTS = {"category", "categorie", "tag", "tags", "rubrique", "section", "page", "topics", "author"}
+
+
+def path_pattern(url: str) -> str:
+    """Forme du chemin: premier segment conservé, suivants réduits à {n} ou *"""
+    segments = [s for s in urlparse(url).path.split("/") if s]
+    if not segments:
+        return "/"
+    pattern = []
+    for index, segment in enumerate(segments):
+        if _NUMERIC_SEGMENT.match(segment):
+            pattern.append("{n}")
+        elif index == 0 or segment.lower() in _LISTING_SEGMENTS:
+            pattern.append(segment.lower())
+        else:
+            pattern.append("*")
+    return "/" + "/".join(pattern)
+
+
+class ExtractionTemplates:
+    """Cache (domaine, forme de chemin) -> sélecteur gagnant, persistant dans extraction_templates"""
+
+    def __init__(self, collection=None, revalidate_every: int = 50, max_misses: int = 3) -> None:
+        self.collection = collection
+        self.revalidate_every = revalidate_every
+        self.max_misses = max_misses
+        self._templates: Dict[Tuple[str, str], Dict] = {}
+        self._loaded_domains = set()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "learned": 0, "revalidated": 0}
+
+    @staticmethod
+    def key(url: str) -> Tuple[str, str]:
+        return urlparse(url).netloc.lower(), path_pattern(url)
+
+    def _load_domain(self, domain: str) -> None:
+        if domain in self._loaded_domains:
+            return
+        self._loaded_domains.add(domain)
+        if self.collection is None:
+            return
+        try:
+            for doc in self.collection.find({"domain": domain}, {"pattern": 1, "selector": 1}):
+                self._templates[(domain, doc["pattern"])] = {
+                    "selector": doc["selector"], "uses": 0, "misses": 0, "pending_hits": 0
+                }
+        except Exception as e:
+            logger.debug(f"Gabarits non chargés ({domain}): {e}")
+
+    def lookup(self, url: str) -> Optional[str]:
+        """Sélecteur appris, ou None si inconnu ou si une revalidation complète est due"""
+        key = self.key(url)
+        with self._lock:
+            self._load_domain(key[0])
+            template = self._templates.get(key)
+            if not template:
+                return None
+            template["uses"] += 1
+            if self.revalidate_every and template["uses"] % self.revalidate_every == 0:
+                self.stats["revalidated"] += 1
+                return None
+            return template["selector"]
+
+    def hit(self, url: str) -> None:
+        with self._lock:
+            template = self._templates.get(self.key(url))
+            if template:
+                template["misses"] = 0
+                template["pending_hits"] += 1
+                self.stats["hits"] += 1
+
+    def miss(self, url: str) -> None:
+        """Résultat trop court avec le sélecteur appris: abandon après max_misses échecs consécutifs"""
+        key = self.key(url)
+        with self._lock:
+            template = self._templates.get(key)
+            if not template:
+                return
+            self.stats["misses"] += 1
+            template["misses"] += 1
+            if template["misses"] < self.max_misses:
+                return
+            del self._templates[key]
+        logger.info(f"🧹 Gabarit obsolète {key[0]}{key[1]}: {template['selector']}")
+        if self.collection is not None:
+            try:
+                self.collection.delete_one({"domain": key[0], "pattern": key[1]})
+            except Exception as e:
+                logger.debug(f"Gabarit non supprimé: {e}")
+
+    def learn(self, url: str, selector: str) -> None:
+        """Enregistre le sélecteur gagnant d'un sondage complet (nouveau gabarit ou revalidation)"""
+        key = self.key(url)
+        with self._lock:
+            template = self._templates.get(key)
+            pending = template["pending_hits"] if template else 0
+            if not template or template["selector"] != selector:
+                self.stats["learned"] += 1
+                template = {"selector": selector, "uses": 0, "misses": 0}
+                self._templates[key] = template
+            template["pending_hits"] = 0
+        if self.collection is None:
+            return
+        try:
+            self.collection.update_one(
+                {"domain": key[0], "pattern": key[1]},
+                {
+                    "$set": {"selector": selector, "last_validated": datetime.now()},
+                    "$inc": {"hits": pending + 1},
+                    "$setOnInsert": {"created_at": datetime.now()},
+                },
+                upsert=True,
+            )
+        except Exception as e:
+            logger.debug(f"Gabarit non enregistré: {e}")
@@ -0,0 +1,180 @@
+"""
+Transport HTTP/2 (httpx) compatible avec l'interface requests utilisée par crawl_url.
+"""
+import logging
+from typing import Dict, Iterator, Optional
+
+import requests
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - dépendance optionnelle
+    httpx = None
+
+# httpx journalise chaque requête en INFO; le crawler a déjà ses propres logs
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+# En-têtes interdits en HTTP/2 (connexion gérée par le multiplexage)
+HOP_BY_HOP_HEADERS = {"connection", "keep-alive", "proxy-connection", "transfer-encoding", "upgrade"}
+
+TRANSPORTS = ("requests", "httpx")
+
+
+def httpx_available() -> bool:
+    return httpx is not None
+
+
+def _importable(*modules: str) -> bool:
+    for module in modules:
+        try:
+            __import__(module)
+            return True
+        except ImportError:
+            continue
+    return False
+
+
+def supported_encodings(transport: str = "requests") -> str:
+    """Valeur Accept-Encoding que le transport sait décoder
+
+    httpx décode br et zstd dès que leurs bibliothèques (brotli/brotlicffi, zstandard) sont installées.
+    """
+    if transport != "httpx" or httpx is None:
+        return "gzip, deflate"
+    encodings = ["gzip", "deflate"]
+    if _importable("brotli", "brotlicffi"):
+        encodings.append("br")
+    if _importable("zstandard"):
+        encodings.append("zstd")
+    return ", ".join(encodings)
+
+
+class HttpxResponse:
+    """Adapte httpx.Response à l'interface requests.Response utilisée par le crawler"""
+
+    def __init__(self, response: "httpx.Response", stream: bool = False) -> None:
+        self._response = response
+        self._content: Optional[bytes] = None
+        if not stream:
+            self._content = response.content
+
+    @property
+    def status_code(self) -> int:
+        return self._response.status_code
+
+    @property
+    def headers(self):
+        return self._response.headers
+
+    @property
+    def url(self) -> str:
+        return str(self._response.url)
+
+    @property
+    def http_version(self) -> str:
+        return self._response.http_version
+
+    @property
+    def encoding(self) -> Optional[str]:
+        return self._response.encoding
+
+    @property
+    def content(self) -> bytes:
+        if self._content is None:
+            try:
+                self._content = self._response.read()
+            except httpx.HTTPError as exc:
+                raise _translate_error(exc) from exc
+        return self._content
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+    def iter_content(self, chunk_size: int = 65536) -> Iterator[bytes]:
+        if self._content is not None:
+            for start in range(0, len(self._content), chunk_size):
+                yield self._content[start:start + chunk_size]
+            return
+        try:
+            yield from self._response.iter_bytes(chunk_size)
+        except httpx.HTTPError as exc:
+            raise _translate_error(exc) from exc
+
+    def raise_for_status(self) -> None:
+        if 400 <= self.status_code < 600:
+            raise requests.exceptions.HTTPError(
+                f"{self.status_code} Error for url: {self.url}", response=self
+            )
+
+    def close(self) -> None:
+        self._response.close()
+
+
+class HttpxCookies:
+    """Vue des cookies httpx avec get_dict()/update() comme requests"""
+
+    def __init__(self, cookies: "httpx.Cookies") -> None:
+        self._cookies = cookies
+
+    def get_dict(self) -> Dict[str, str]:
+        return {cookie.name: cookie.value for cookie in self._cookies.jar}
+
+    def update(self, values: Dict[str, str]) -> None:
+        for name, value in (values or {}).items():
+            self._cookies.set(name, value)
+
+
+class HttpxSession:
+    """Session HTTP/2 (multiplexage par hôte, décodage br/zstd) au format requests.Session"""
+
+    def __init__(self, verify: bool = True, proxy: Optional[Dict[str, str]] = None,
+                 http2: bool = True, http1: bool = True, **client_kwargs) -> None:
+        if httpx is None:
+            raise ImportError("httpx n'est pas installé: pip install 'httpx[http2,brotli,zstd]'")
+        limits = httpx.Limits(max_connections=50, max_keepalive_connections=20)
+        mounts = None
+        if proxy:
+            mounts = {
+                f"{scheme}://": httpx.HTTPTransport(
+                    proxy=target, http1=http1, http2=http2, verify=verify, limits=limits
+                )
+                for scheme, target in proxy.items()
+            }
+        self.verify = verify
+        self._client = httpx.Client(
+            http2=http2,
+            verify=verify,
+            limits=limits,
+            mounts=mounts,
+            transport=httpx.HTTPTransport(http1=http1, http2=http2, verify=verify, limits=limits, retries=2),
+            **client_kwargs,
+        )
+        self.cookies = HttpxCookies(self._client.cookies)
+
+    def get(self, url: str, headers: Optional[Dict[str, str]] = None, timeout: Optional[float] = None,
+            allow_redirects: bool = True, stream: bool = False) -> HttpxResponse:
+        clean_headers = {
+            key: value for key, value in (headers or {}).items()
+            if key.lower() not in HOP_BY_HOP_HEADERS
+        }
+        try:
+            request = self._client.build_request("GET", url, headers=clean_headers, timeout=timeout)
+            response = self._client.send(request, stream=stream, follow_redirects=allow_redirects)
+        except httpx.HTTPError as exc:
+            raise _translate_error(exc) from exc
+        return HttpxResponse(response, stream=stream)
+
+    def close(self) -> None:
+        self._client.close()
+
+
+def _translate_error(exc: Exception) -> Exception:
+    """Convertit une erreur httpx en exception requests (gérées par crawl_url)"""
+    if isinstance(exc, httpx.TimeoutException):
+        return requests.exceptions.Timeout(str(exc))
+    if isinstance(exc, httpx.TooManyRedirects):
+        return requests.exceptions.TooManyRedirects(str(exc))
+    if isinstance(exc, (httpx.NetworkError, httpx.RemoteProtocolError, httpx.ProxyError)):
+        return requests.exceptions.ConnectionError(str(exc))
+    return requests.exceptions.RequestException(str(exc))
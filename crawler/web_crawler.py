@@ -1,6 +1,5 @@
 import requests
 from bs4 import BeautifulSoup
-import pymongo
 from datetime import datetime, timedelta
 import schedule
 import time
@@ -16,8 +15,24 @@ import json
 import re
 from requests.adapters import HTTPAdapter
 from requests.packages.urllib3.util.retry import Retry
-from collections import defaultdict
-from config.settings import MONGODB_URI, DATABASE_NAME
+from collections import defaultdict, deque
+from functools import lru_cache
+from config.settings import (MONGODB_URI, DATABASE_NAME, CRAWLER_TRANSPORT, CRAWLER_ARCHIVE_DIR, CRAWLER_LOCAL_DB,
+                             CRAWLER_SPOOL_DIR, CRAWLER_MAX_URLS_PER_TEMPLATE)
+from crawler.archive import ResponseArchive
+from crawler.budget import CrawlBudget, CrawlInterrupted
+from crawler.canonical import UrlCanonicalizer, url_domain
+from crawler.db import JOBS_COLLECTION, connect
+from crawler.frontier import TrapDetector
+from crawler.local_store import open_local_store
+from crawler.scheduler import SourceScheduler
+from crawler.listing import MIN_ARTICLE_LINKS, find_article_links, find_next_page
+from crawler.templates import ExtractionTemplates
+from crawler.prefilter import LINK_STRAINER, KeywordPrefilter, decode_html
+from crawler.spool import open_spool
+from crawler.storage import DocumentStore, content_hash, top_keywords
+from crawler.structured import WP_POSTS_ENDPOINT, extract_structured, wp_post_to_data
+from crawler.transport import TRANSPORTS, httpx_available, supported_encodings
 
 logging.basicConfig(
     level=logging.INFO,
@@ -91,13 +106,13 @@ class AdvancedAntiBlockingStrategy:
             return random.choice(AdvancedAntiBlockingStrategy.PROXIES)
         return None
     
-    def get_advanced_headers(self, url=None, referer=None):
+    def get_advanced_headers(self, url=None, referer=None, accept_encoding='gzip, deflate'):
         """Génère des headers avancés et réalistes"""
         headers = {
             'User-Agent': self.get_random_user_agent(),
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
             'Accept-Language': random.choice(self.LANGUAGES),
-            'Accept-Encoding': 'gzip, deflate',
+            'Accept-Encoding': accept_encoding,
             'DNT': '1',
             'Connection': 'keep-alive',
             'Upgrade-Insecure-Requests': '1',
@@ -143,8 +158,11 @@ class AdvancedAntiBlockingStrategy:
         
         return base_delay + human_variance
     
-    def create_advanced_session(self, use_proxy=False, verify_ssl=True):
+    def create_advanced_session(self, use_proxy=False, verify_ssl=True, transport='requests'):
         """Crée une session avec configuration avancée"""
+        if transport == 'httpx':
+            return self._create_httpx_session(use_proxy, verify_ssl)
+
         session = requests.Session()
         session.trust_env = False  # Ignore system proxy env (can break crawling)
         
@@ -153,14 +171,9 @@ class AdvancedAntiBlockingStrategy:
             import urllib3
             urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
         
-        # Configuration retry sophistiquée
-        retry = Retry(
-            total=5,
-            backoff_factor=2,
-            status_forcelist=[429, 500, 502, 503, 504, 520, 522, 524],
-            allowed_methods=["HEAD", "GET", "OPTIONS", "POST"],
-            raise_on_status=False  # Ne pas lever d'exception
-        )
+        # Aucune tentative dans l'adaptateur: ses backoffs dorment hors budget et retiennent un stop.
+        # 5xx, erreurs de connexion et timeouts sont réessayés par crawl_url (attente interruptible).
+        retry = Retry(total=0, read=False, raise_on_status=False, respect_retry_after_header=False)
         
         adapter = HTTPAdapter(
             max_retries=retry,
@@ -184,14 +197,24 @@ class AdvancedAntiBlockingStrategy:
         session.cookies.update(self.cookies_store.get('default', {}))
         
         return session
+
+    def _create_httpx_session(self, use_proxy=False, verify_ssl=True):
+        """Session HTTP/2 multiplexée (httpx) avec la même interface que requests"""
+        from crawler.transport import HttpxSession
+
+        proxy = self.get_random_proxy() if use_proxy else None
+        session = HttpxSession(verify=verify_ssl, proxy=proxy)
+        session.cookies.update(self.cookies_store.get('default', {}))
+        return session
     
     def save_cookies(self, session, domain='default'):
         """Sauvegarde les cookies pour réutilisation"""
         self.cookies_store[domain] = session.cookies.get_dict()
     
     @staticmethod
+    @lru_cache(maxsize=65536)
     def normalize_url(url):
-        """Normalise une URL pour éviter les doublons"""
+        """Normalise une URL pour éviter les doublons (mémoïsé)"""
         parsed = urlparse(url)
         path = parsed.path or "/"
         
@@ -223,8 +246,13 @@ class AdaptiveRateLimiter:
         self.domain_429_count = defaultdict(int)
         self.lock = threading.Lock()
     
-    def wait_if_needed(self, domain, base_delay=2):
-        """Attend avec délai adaptatif"""
+    def wait_if_needed(self, domain, base_delay=2, sleep=time.sleep):
+        """Attend avec délai adaptatif
+
+        Le créneau est réservé sous le verrou et l'attente se fait hors verrou, avec sleep
+        (CrawlBudget.sleep pour une attente interruptible).
+        """
+        sleep_time = 0
         with self.lock:
             current_time = time.time()
             
@@ -236,9 +264,18 @@ class AdaptiveRateLimiter:
                 if elapsed < adaptive_delay:
                     sleep_time = adaptive_delay - elapsed
                     logger.debug(f"Rate limiting {domain}: {sleep_time:.2f}s")
-                    time.sleep(sleep_time)
             
-            self.domain_timers[domain] = time.time()
+            self.domain_timers[domain] = current_time + sleep_time
+        if sleep_time > 0:
+            sleep(sleep_time)
+
+    def time_until_ready(self, domain):
+        """Secondes avant le prochain créneau libre du domaine (0: libre), sans le réserver"""
+        with self.lock:
+            if domain not in self.domain_timers:
+                return 0.0
+            elapsed = time.time() - self.domain_timers[domain]
+            return max(self.domain_delays[domain] - elapsed, 0.0)
     
     def report_429(self, domain):
         """Signale un rate limit et augmente le délai"""
@@ -294,6 +331,37 @@ class JavaScriptChallengeSolver:
 
 class WebCrawler:
     """Crawler web avec stratégies anti-blocage avancées"""
+
+    # Extensions binaires jamais téléchargées (filtrées avant toute requête)
+    BINARY_EXTENSIONS = {
+        'jpg', 'jpeg', 'png', 'gif', 'webp', 'avif', 'bmp', 'ico', 'svg', 'tif', 'tiff',
+        'mp3', 'mp4', 'm4a', 'm4v', 'avi', 'mov', 'mkv', 'webm', 'wav', 'ogg', 'flac',
+        'zip', 'rar', '7z', 'gz', 'tgz', 'bz2', 'xz', 'tar', 'iso', 'dmg', 'exe', 'msi', 'apk',
+        'doc', 'docx', 'xls', 'xlsx', 'ppt', 'pptx', 'odt', 'ods',
+        'woff', 'woff2', 'ttf', 'otf', 'eot', 'css', 'js', 'map',
+    }
+    # Extensions associées à un type de contenu (ignorées si le type n'est pas demandé)
+    TYPED_EXTENSIONS = {'pdf': 'pdf', 'xml': 'xml', 'rss': 'xml', 'txt': 'text', 'csv': 'text'}
+    # Taille max du corps décodé par type de contenu (octets)
+    MAX_BODY_BYTES = {
+        'html': 5 * 1024 * 1024,
+        'xml': 5 * 1024 * 1024,
+        'text': 2 * 1024 * 1024,
+        'pdf': 20 * 1024 * 1024,
+    }
+    # Content-Type trop vagues: on décide sur les premiers octets
+    AMBIGUOUS_CONTENT_TYPES = ('', 'application/octet-stream', 'binary/octet-stream', 'application/unknown')
+    # Content-Type retenu quand le corps d'un type ambigu est reconnu au sondage
+    SNIFFED_CONTENT_TYPES = {'html': 'text/html', 'xml': 'application/xml'}
+    # Erreurs serveur réessayées par crawl_url (plus par l'adaptateur HTTP)
+    RETRY_STATUSES = (500, 502, 503, 504, 520, 522, 524)
+    # Attente avant la 1re nouvelle tentative (s), doublée à chaque échec
+    RETRY_BACKOFF = 2.0
+    # Signatures de fichiers binaires courants
+    BINARY_SIGNATURES = (
+        b'\x89PNG', b'GIF8', b'\xff\xd8\xff', b'RIFF', b'PK\x03\x04', b'\x1f\x8b',
+        b'Rar!', b'7z\xbc\xaf', b'ID3', b'OggS', b'fLaC', b'\x00\x00\x01\x00', b'wOF',
+    )
     
     def __init__(self, mongo_uri=MONGODB_URI, 
                  db_name=DATABASE_NAME,
@@ -304,81 +372,47 @@ class WebCrawler:
                  max_retries_per_url=2,
                  request_timeout=12,
                  use_browser_fallback=True,
-                 mongo_timeout_ms=2000):
-        """Initialise le crawler"""
+                 mongo_timeout_ms=2000,
+                 transport=CRAWLER_TRANSPORT,
+                 max_body_bytes=None,
+                 max_depth=None,
+                 max_urls_per_template=CRAWLER_MAX_URLS_PER_TEMPLATE,
+                 max_param_values=20,
+                 tracking_params=None,
+                 archive_dir=CRAWLER_ARCHIVE_DIR,
+                 use_mongo=True,
+                 local_store_path=CRAWLER_LOCAL_DB,
+                 spool_dir=CRAWLER_SPOOL_DIR):
+        """Initialise le crawler (use_mongo=False: parse seul, sans connexion, pour le retraitement)
+
+        Si MongoDB est injoignable, les données vont dans la base SQLite local_store_path
+        (à reverser ensuite avec `python -m crawler.local_store sync`). Sinon, avec spool_dir,
+        url_history, robots_cache et documents passent par un spool disque vidé en arrière-plan.
+        """
         try:
             self.mongo_available = False
-            self.client = pymongo.MongoClient(mongo_uri, serverSelectionTimeoutMS=mongo_timeout_ms)
-            try:
-                self.client.admin.command('ping')
-                self.mongo_available = True
-            except Exception:
-                logger.warning("⚠️ MongoDB indisponible, mode sans stockage")
+            self.client = None
+            self.db = None
+            if use_mongo:
+                try:
+                    self.db = connect(mongo_uri, db_name, timeout_ms=mongo_timeout_ms)
+                    self.client = self.db.client
+                    self.mongo_available = True
+                except Exception:
+                    logger.warning("⚠️ MongoDB indisponible, mode sans stockage")
             
-            self.db = self.client[db_name] if self.mongo_available else None
+            self.mongo_uri = mongo_uri
             self.sources_collection = self.db['sources'] if self.mongo_available else None
             self.data_collection = self.db['crawled_data'] if self.mongo_available else None
             self.robots_cache = self.db['robots_cache'] if self.mongo_available else None
             self.url_history = self.db['url_history'] if self.mongo_available else None
-            
-            if self.mongo_available:
-                # Index - avec gestion complète des conflits
-                try:
-                    self.data_collection.create_index([('title', 'text'), ('content', 'text')])
-                except:
-                    pass
-                
-                try:
-                    self.data_collection.create_index('source_id')
-                except:
-                    pass
-                
-                try:
-                    self.data_collection.create_index('timestamp')
-                except:
-                    pass
-                
-                # Gestion intelligente de l'index URL
-                try:
-                    # Vérifier si l'index existe déjà
-                    existing_indexes = self.data_collection.index_information()
-                    if 'url_1' in existing_indexes:
-                        # Si l'index existe sans unique, le supprimer et recréer
-                        current_index = existing_indexes['url_1']
-                        if not current_index.get('unique', False):
-                            logger.info("🔄 Recréation de l'index URL avec contrainte unique...")
-                            self.data_collection.drop_index('url_1')
-                            self.data_collection.create_index('url', unique=True, sparse=True, name='url_unique_idx')
-                        # Sinon l'index existe déjà correctement
-                    else:
-                        # Créer l'index
-                        self.data_collection.create_index('url', unique=True, sparse=True, name='url_unique_idx')
-                except pymongo.errors.DuplicateKeyError:
-                    logger.warning("⚠️  Doublons détectés, index URL sans contrainte unique")
-                    try:
-                        self.data_collection.drop_index('url_1')
-                    except:
-                        pass
-                    try:
-                        self.data_collection.drop_index('url_unique_idx')
-                    except:
-                        pass
-                    self.data_collection.create_index('url', name='url_idx')
-                except Exception as e:
-                    logger.warning(f"⚠️  Index URL non créé: {e}")
-                
-                # Index pour url_history
-                try:
-                    existing_history_indexes = self.url_history.index_information()
-                    if 'url_1' not in existing_history_indexes:
-                        self.url_history.create_index('url', unique=True, sparse=True)
-                except:
-                    pass
-                
-                try:
-                    self.url_history.create_index('last_crawled')
-                except:
-                    pass
+            self.templates_collection = self.db['extraction_templates'] if self.mongo_available else None
+            self.store = DocumentStore(self.db) if self.mongo_available else None
+            self.spool = open_spool(spool_dir, mongo_uri) if self.mongo_available and spool_dir else None
+            self.local = None
+            if use_mongo and not self.mongo_available and local_store_path:
+                self.local = open_local_store(local_store_path)
+                logger.warning(f"💾 Stockage local SQLite: {local_store_path}")
             
             # Configuration
             self.use_proxy = use_proxy
@@ -388,6 +422,18 @@ class WebCrawler:
             self.max_retries_per_url = max_retries_per_url
             self.request_timeout = request_timeout
             self.use_browser_fallback = use_browser_fallback
+            self.transport = self._resolve_transport(transport)
+            self.accept_encoding = supported_encodings(self.transport)
+            self.max_body_bytes = {**self.MAX_BODY_BYTES, **(max_body_bytes or {})}
+
+            # Anti-pièges de la frontière (None = paramètres de suivi par défaut)
+            self.max_depth = max_depth
+            self.max_urls_per_template = max_urls_per_template
+            self.max_param_values = max_param_values
+            self.tracking_params = tracking_params
+            self.canonicalizer = UrlCanonicalizer(tracking_params=tracking_params)
+            self.templates = ExtractionTemplates(self.templates_collection)
+            self.archive = ResponseArchive(archive_dir) if archive_dir else None
             
             # Stratégies anti-blocage
             self.rate_limiter = AdaptiveRateLimiter()
@@ -396,12 +442,28 @@ class WebCrawler:
             
             if self.mongo_available:
                 logger.info(f"✓ MongoDB: {db_name}")
-            logger.info(f"✓ Config: proxy={use_proxy}, delay={base_delay}s, SSL={verify_ssl}")
+            logger.info(f"✓ Config: proxy={use_proxy}, delay={base_delay}s, SSL={verify_ssl}, transport={self.transport}")
             logger.info(f"✓ Stratégies avancées activées")
         except Exception as e:
             logger.error(f"Erreur MongoDB: {e}")
             raise
 
+    @property
+    def storage_available(self):
+        """MongoDB ou, à défaut, le stockage local SQLite"""
+        return self.mongo_available or self.local is not None
+
+    @staticmethod
+    def _resolve_transport(transport):
+        """Valide le backend HTTP demandé (repli sur requests si httpx absent)"""
+        transport = (transport or 'requests').lower()
+        if transport not in TRANSPORTS:
+            raise ValueError(f"Transport inconnu: {transport} (choix: {', '.join(TRANSPORTS)})")
+        if transport == 'httpx' and not httpx_available():
+            logger.warning("⚠️ httpx indisponible, repli sur requests (pip install 'httpx[http2,brotli,zstd]')")
+            return 'requests'
+        return transport
+
     @staticmethod
     def _expand_keywords(keywords):
         expanded = set(keywords)
@@ -643,30 +705,121 @@ class WebCrawler:
         last_segment = path.rsplit("/", 1)[-1]
         return "." not in last_segment
 
-    def _extract_main_text(self, soup):
-        candidates = []
-        for tag in ["article", "main"]:
-            node = soup.find(tag)
-            if node:
-                text = node.get_text(separator=" ", strip=True)
-                if len(text) >= 200:
-                    return text
-                candidates.append(text)
+    def _skip_by_extension(self, url, content_types):
+        """Vrai si l'extension de l'URL désigne un contenu non voulu (aucune requête)"""
+        try:
+            last_segment = urlparse(url).path.rsplit("/", 1)[-1]
+        except Exception:
+            return False
+        if "." not in last_segment:
+            return False
+        ext = last_segment.rsplit(".", 1)[-1].lower()
+        if ext in self.BINARY_EXTENSIONS:
+            return True
+        kind = self.TYPED_EXTENSIONS.get(ext)
+        return kind is not None and kind not in content_types
+
+    @staticmethod
+    def _content_kind(content_type, content_types):
+        """Type de traitement pour un Content-Type (même ordre que crawl_url)"""
+        for kind in ('html', 'xml', 'pdf', 'text'):
+            if kind in content_type and kind in content_types:
+                return kind
+        return None
+
+    def _sniff_kind(self, head):
+        """Devine le type à partir des premiers octets du corps"""
+        if head.startswith(b'%PDF'):
+            return 'pdf'
+        if head.startswith(self.BINARY_SIGNATURES) or head[4:8] == b'ftyp':
+            return 'binary'
+        sample = head[:1024].lstrip().lower()
+        if b'<html' in sample or b'<!doctype html' in sample:
+            return 'html'
+        if sample.startswith(b'<?xml') or b'<rss' in sample or b'<feed' in sample:
+            return 'xml'
+        if b'\x00' in sample:
+            return 'binary'
+        return None
+
+    def _read_body(self, response, content_types, check_type=True, budget=None):
+        """Lit le corps en streaming avec filtrage sur en-têtes, premiers octets et taille.
+
+        Retourne (body, content_type, None) ou (None, content_type, raison du rejet).
+        Lève CrawlInterrupted entre deux blocs si le job est arrêté.
+        """
+        content_type = response.headers.get('Content-Type', '').lower()
+        kind = self._content_kind(content_type, content_types)
+        ambiguous = content_type.split(';')[0].strip() in self.AMBIGUOUS_CONTENT_TYPES
+        if check_type and kind is None and not ambiguous:
+            return None, content_type, f"Skipped content-type {content_type.split(';')[0] or 'unknown'}"
+
+        limit = self.max_body_bytes.get(kind or 'html', self.MAX_BODY_BYTES['html'])
+        declared = response.headers.get('Content-Length', '')
+        if declared.isdigit() and int(declared) > limit:
+            return None, content_type, f"Skipped: body too large ({int(declared) // 1024} KB > {limit // 1024} KB)"
+
+        chunks = []
+        size = 0
+        for chunk in response.iter_content(chunk_size=65536):
+            if not chunk:
+                continue
+            if budget is not None and budget.stop_requested():
+                response.close()
+                raise CrawlInterrupted("stopped")
+            if check_type and not chunks and ambiguous:
+                sniffed = self._sniff_kind(chunk[:2048])
+                if sniffed == 'pdf' and 'pdf' in content_types:
+                    content_type = 'application/pdf'
+                    limit = self.max_body_bytes.get('pdf', limit)
+                elif sniffed in ('binary', 'pdf') or (sniffed and sniffed not in content_types):
+                    return None, content_type, f"Skipped: {sniffed} body"
+                elif sniffed in self.SNIFFED_CONTENT_TYPES:
+                    # Type reconnu: crawl_url choisit son traitement d'après content_type
+                    charset = content_type.partition(';')[2]
+                    content_type = self.SNIFFED_CONTENT_TYPES[sniffed] + (';' + charset if charset else '')
+                    limit = self.max_body_bytes.get(sniffed, limit)
+            size += len(chunk)
+            if size > limit:
+                return None, content_type, f"Skipped: body exceeds {limit // 1024} KB"
+            chunks.append(chunk)
+        return b''.join(chunks), content_type, None
+
+    MAIN_TEXT_SELECTORS = [
+        "article",
+        "main",
+        ".post-content",
+        ".article-content",
+        ".entry-content",
+        ".post",
+        ".content",
+        "#content",
+        ".single-content",
+        ".story",
+    ]
+    MIN_MAIN_TEXT = 200
 
-        for selector in [
-            ".post-content",
-            ".article-content",
-            ".entry-content",
-            ".post",
-            ".content",
-            "#content",
-            ".single-content",
-            ".story",
-        ]:
+    def _extract_main_text(self, soup, url=None):
+        """Texte principal: sélecteur appris pour ce domaine/chemin, sinon sondage de MAIN_TEXT_SELECTORS"""
+        if url:
+            selector = self.templates.lookup(url)
+            if selector:
+                node = soup.select_one(selector)
+                if node:
+                    text = node.get_text(separator=" ", strip=True)
+                    if len(text) >= self.MIN_MAIN_TEXT:
+                        self.templates.hit(url)
+                        return text
+                self.templates.miss(url)
+
+        candidates = []
+        for selector in self.MAIN_TEXT_SELECTORS:
             node = soup.select_one(selector)
             if node:
                 text = node.get_text(separator=" ", strip=True)
-                if len(text) >= 200:
+                if len(text) >= self.MIN_MAIN_TEXT:
+                    if url:
+                        self.templates.learn(url, selector)
                     return text
                 candidates.append(text)
 
@@ -684,7 +837,10 @@ class WebCrawler:
             parsed = urlparse(url)
             robots_url = f"{parsed.scheme}://{parsed.netloc}/robots.txt"
             
-            cached = self.robots_cache.find_one({'url': robots_url})
+            if self.local is not None:
+                cached = self.local.robots_get(robots_url)
+            else:
+                cached = self.robots_cache.find_one({'url': robots_url})
             if cached and (datetime.now() - cached['timestamp']).days < 7:
                 return cached['allowed']
             
@@ -694,10 +850,13 @@ class WebCrawler:
                 rp.read()
                 allowed = rp.can_fetch("*", url)
                 
-                self.robots_cache.update_one(
+                if self.local is not None:
+                    self.local.robots_put(robots_url, allowed)
+                    return allowed
+                self._upsert(
+                    self.robots_cache,
                     {'url': robots_url},
-                    {'$set': {'allowed': allowed, 'timestamp': datetime.now()}},
-                    upsert=True
+                    {'$set': {'allowed': allowed, 'timestamp': datetime.now()}}
                 )
                 return allowed
             except:
@@ -708,6 +867,8 @@ class WebCrawler:
     
     def is_url_recently_crawled(self, url, hours=24):
         """Vérifie si l'URL a été crawlée récemment"""
+        if self.local is not None:
+            return self.local.recently_crawled(url, datetime.now() - timedelta(hours=hours))
         if not self.mongo_available:
             return False
         recent = self.url_history.find_one({
@@ -718,9 +879,13 @@ class WebCrawler:
     
     def mark_url_crawled(self, url, success=True):
         """Marque une URL comme crawlée"""
+        if self.local is not None:
+            self.local.mark_crawled(url, success)
+            return
         if not self.mongo_available:
             return
-        self.url_history.update_one(
+        self._upsert(
+            self.url_history,
             {'url': url},
             {
                 '$set': {
@@ -728,15 +893,162 @@ class WebCrawler:
                     'success': success
                 },
                 '$inc': {'crawl_count': 1}
-            },
-            upsert=True
+            }
+        )
+
+    def _upsert(self, collection, filter, update):
+        """update_one(upsert=True), différé via le spool disque s'il est actif"""
+        if self.spool is not None:
+            self.spool.update(self.db.name, collection.name, filter, update)
+        else:
+            collection.update_one(filter, update, upsert=True)
+
+    def known_urls(self, keys):
+        """Sous-ensemble des clés déjà crawlées avec succès (une requête pour toute la page)"""
+        keys = list(set(keys))
+        if self.local is not None and keys:
+            return self.local.known_urls(keys)
+        if not self.mongo_available or not keys:
+            return set()
+        try:
+            return {
+                doc['url'] for doc in self.url_history.find(
+                    {'url': {'$in': keys}, 'success': True},
+                    {'url': 1}
+                )
+            }
+        except Exception as e:
+            logger.debug(f"Historique indisponible: {e}")
+            return set()
+
+    def record_alias(self, alias_key, canonical_key):
+        """Mémorise alias -> canonique pour ne plus refetcher l'alias"""
+        if self.local is not None:
+            self.local.record_alias(alias_key, canonical_key)
+            return
+        if not self.mongo_available:
+            return
+        self._upsert(
+            self.url_history,
+            {'url': alias_key},
+            {'$set': {'canonical': canonical_key, 'last_crawled': datetime.now()}}
         )
+
+    def _load_aliases(self, seed_url):
+        """Charge les alias connus du domaine dans le canonicaliseur"""
+        prefix = self.canonicalizer.canonicalize(seed_url).split('/', 3)[:3]
+        if self.local is not None:
+            for doc in self.local.aliases('/'.join(prefix) + '/'):
+                self.canonicalizer.register_alias(doc['url'], doc['canonical'])
+            return
+        if not self.mongo_available:
+            return
+        try:
+            for doc in self.url_history.find(
+                {'url': {'$regex': '^' + re.escape('/'.join(prefix) + '/')}, 'canonical': {'$exists': True}},
+                {'url': 1, 'canonical': 1}
+            ):
+                self.canonicalizer.register_alias(doc['url'], doc['canonical'])
+        except Exception as e:
+            logger.debug(f"Alias non chargés: {e}")
     
+    def crawl_wp_api(self, session, seed_url, max_hits, keywords, stats_cb=None, should_stop=None,
+                     skip_recent=True, incremental=False, known_stop_run=10, budget=None):
+        """Découverte via l'API REST WordPress (/wp-json/wp/v2/posts), sans télécharger les pages HTML.
+
+        Générateur comme _crawl_domain (à utiliser avec yield from): rend la main avec l'attente du
+        rate limiter avant chaque page de l'API, pour que les autres domaines avancent entre deux.
+        Retourne None si l'API n'est pas exposée: l'appelant bascule alors sur le crawl HTML.
+        """
+        parsed = urlparse(seed_url)
+        endpoint = f"{parsed.scheme}://{parsed.netloc}{WP_POSTS_ENDPOINT}"
+        domain = parsed.netloc
+        per_page = max(1, min(100, max_hits))
+        collected = []
+        known_run = 0
+        page, total_pages = 1, 1
+
+        while page <= total_pages and len(collected) < max_hits:
+            if should_stop and should_stop():
+                break
+            try:
+                # Tour de rôle: les autres domaines avancent pendant le délai de politesse de celui-ci
+                yield self.rate_limiter.time_until_ready(domain)
+                while self.rate_limiter.time_until_ready(domain) > 0.01:
+                    yield self.rate_limiter.time_until_ready(domain)
+                self.rate_limiter.wait_if_needed(domain, self.base_delay, sleep=budget.sleep if budget else time.sleep)
+            except CrawlInterrupted:
+                break
+            if should_stop and should_stop():
+                break
+            query = urlencode({'per_page': per_page, 'page': page, '_embed': 'author,wp:term'})
+            headers = self.anti_blocking.get_advanced_headers(url=endpoint, accept_encoding=self.accept_encoding)
+            headers['Accept'] = 'application/json'
+            try:
+                if budget is not None:
+                    response = budget.call(lambda: session.get(f"{endpoint}?{query}", headers=headers,
+                                                               timeout=budget.cap_timeout(self.request_timeout),
+                                                               allow_redirects=True))
+                    budget.add_fetch(len(response.content))
+                else:
+                    response = session.get(f"{endpoint}?{query}", headers=headers,
+                                           timeout=self.request_timeout, allow_redirects=True)
+                content_type = response.headers.get('Content-Type', '').lower()
+                if response.status_code != 200 or 'json' not in content_type:
+                    raise ValueError(f"HTTP {response.status_code} {content_type or '-'}")
+                posts = json.loads(response.content)
+                if not isinstance(posts, list):
+                    raise ValueError("réponse inattendue")
+            except CrawlInterrupted:
+                break
+            except Exception as e:
+                if page == 1:
+                    logger.info(f"API WordPress indisponible ({e}), crawl HTML: {seed_url}")
+                    return None
+                logger.warning(f"API WordPress interrompue page {page}: {e}")
+                break
+            self.rate_limiter.report_success(domain)
+            total_pages = int(response.headers.get('X-WP-TotalPages') or 1)
+            logger.info(f"🧩 API WordPress page {page}/{total_pages}: {len(posts)} articles")
+
+            items = [wp_post_to_data(post) for post in posts]
+            items = [(self.canonicalizer.canonicalize(data['url']), data) for data in items if data.get('url')]
+            known = self.known_urls(key for key, _ in items) if incremental else set()
+            for key, data in items:
+                if len(collected) >= max_hits:
+                    break
+                if key in known:
+                    known_run += 1
+                    if known_run >= known_stop_run:
+                        logger.info(f"   ⏹️  {known_run} articles connus d'affilée, fin de l'API: {endpoint}")
+                        return collected
+                    continue
+                known_run = 0
+                if skip_recent and self.is_url_recently_crawled(key, hours=1):
+                    continue
+                if stats_cb:
+                    stats_cb("attempt", {"url": data['url'], "queue": 0})
+                if self._is_relevant(data, keywords):
+                    collected.append(data)
+                    self.mark_url_crawled(key, success=True)
+                    if stats_cb:
+                        stats_cb("success", {"url": data['url'], "content_type": "html", "method": "wp-json"})
+                elif stats_cb:
+                    stats_cb("error", {"url": data['url'], "error": "Filtered by keywords"})
+            page += 1
+        return collected
+
     def add_source(self, url, source_type='website',
                    frequency='daily', schedule_time='09:00',
                    max_hits=100, content_types=None, keywords=None,
-                   enabled=True):
-        """Ajoute une source"""
+                   enabled=True, incremental=False, known_stop_run=10, listing_pages=0, wp_api=False,
+                   max_seconds=None, max_bytes=None, max_fetches=None, adaptive=False,
+                   min_interval=None, max_interval=None):
+        """Ajoute une source (max_seconds/max_bytes/max_fetches: budget de chaque crawl, None = sans limite)
+
+        adaptive: intervalle de re-crawl ajusté au rythme de changement observé, entre min_interval et
+        max_interval secondes (défauts du planificateur si None); frequency sert d'intervalle initial.
+        """
         if content_types is None:
             content_types = ['html', 'text']
         if keywords is None:
@@ -751,6 +1063,16 @@ class WebCrawler:
             'content_types': content_types,
             'keywords': keywords,
             'enabled': enabled,
+            'incremental': incremental,
+            'known_stop_run': known_stop_run,
+            'listing_pages': listing_pages,
+            'wp_api': wp_api,
+            'max_seconds': max_seconds,
+            'max_bytes': max_bytes,
+            'max_fetches': max_fetches,
+            'adaptive': adaptive,
+            'min_interval': min_interval,
+            'max_interval': max_interval,
             'last_crawl': None,
             'status': 'pending',
             'created_at': datetime.now(),
@@ -758,6 +1080,10 @@ class WebCrawler:
             'success_count': 0
         }
         
+        if self.local is not None:
+            source_id = self.local.add_source(source)
+            logger.info(f"Source ajoutée (locale): {url}")
+            return source_id
         result = self.sources_collection.insert_one(source)
         logger.info(f"Source ajoutée: {url}")
         return str(result.inserted_id)
@@ -765,16 +1091,74 @@ class WebCrawler:
     def get_sources(self, enabled_only=False):
         """Récupère les sources"""
         query = {'enabled': True} if enabled_only else {}
-        sources = list(self.sources_collection.find(query))
+        if self.local is not None:
+            sources = self.local.list_sources(enabled_only)
+        else:
+            sources = list(self.sources_collection.find(query))
         for source in sources:
             source['_id'] = str(source['_id'])
         return sources
+
+    def _get_source(self, source_id):
+        if self.local is not None:
+            return self.local.get_source(source_id)
+        from bson.objectid import ObjectId
+        return self.sources_collection.find_one({'_id': ObjectId(source_id)})
+
+    def _update_source(self, source_id, set_fields=None, inc_fields=None):
+        if self.local is not None:
+            self.local.update_source(source_id, set_fields, inc_fields)
+            return
+        from bson.objectid import ObjectId
+        update = {'$set': set_fields or {}}
+        if inc_fields:
+            update['$inc'] = inc_fields
+        self.sources_collection.update_one({'_id': ObjectId(source_id)}, update)
     
+    def _record_source_run(self, source_id, source, started, status, collected_data=None, outcomes=None):
+        """Consigne le crawl d'une source dans le registre des jobs (session = source_id) pour le tableau de bord.
+
+        Un crawl en échec ne met à jour que le statut: les chiffres du dernier crawl réussi restent.
+        """
+        if not self.mongo_available or self.local is not None or not source:
+            return
+        finished = datetime.now()
+        fields = {
+            'kind': 'source',
+            'url': source.get('url', ''),
+            'domain': url_domain(source.get('url', '')),
+            'options': {'max_pages': source.get('max_hits', 0), 'keywords': source.get('keywords', [])},
+            'status': status,
+            'created_at': started,
+            'started_at': started,
+            'last_update': finished,
+            'finished_at': finished,
+            'updated_at': finished,
+        }
+        if outcomes is not None:
+            fields.update({
+                'pages_success': len(collected_data),
+                'documents_stored': sum(outcomes.get(key, 0) for key in ('new', 'changed', 'unchanged', 'spooled')),
+                'top_keywords': top_keywords(collected_data),
+            })
+        try:
+            self.db[JOBS_COLLECTION].update_one(
+                {'_id': str(source_id)},
+                {'$set': fields, '$setOnInsert': {'priority': 0}},
+                upsert=True
+            )
+        except Exception as e:
+            logger.warning(f"Crawl de la source {source_id} non consigné dans les jobs: {e}")
+
     def delete_source(self, source_id):
         """Supprime une source"""
         try:
+            if self.local is not None:
+                deleted = self.local.delete_source(source_id)
+                logger.info(f"Source supprimée: {source_id}")
+                return deleted
             from bson.objectid import ObjectId
-            self.data_collection.delete_many({'source_id': source_id})
+            self.store.delete_many({'source_id': source_id})
             result = self.sources_collection.delete_one({'_id': ObjectId(source_id)})
             logger.info(f"Source supprimée: {source_id}")
             return result.deleted_count > 0
@@ -782,14 +1166,165 @@ class WebCrawler:
             logger.error(f"Erreur suppression: {e}")
             return False
     
-    def crawl_url(self, url, content_types, max_hits=100, control=None, stats_cb=None, keywords=None, skip_recent=True, prefer_browser=False):
-        """Crawl avec stratégies anti-blocage avancées"""
+    def crawl_url(self, url, content_types, max_hits=100, control=None, stats_cb=None, keywords=None, skip_recent=True, prefer_browser=False,
+                  incremental=False, known_stop_run=10, listing_pages=0, wp_api=False, budget=None):
+        """Crawl avec stratégies anti-blocage avancées
+
+        budget: CrawlBudget (durée, octets, requêtes) en plus de max_hits. Les attentes (Retry-After,
+        backoff des 5xx / erreurs de connexion, pauses, rate limiter) sont interrompues par un stop ou
+        par l'échéance. Une requête en cours n'est pas coupée: un stop peut attendre jusqu'à
+        request_timeout (borné par l'échéance du budget).
+
+        wp_api: essaie d'abord l'API REST WordPress du site; crawl HTML si elle n'est pas exposée.
+
+        listing_pages: si > 0 et que l'URL de départ est une page de liste, seuls le bloc d'articles
+        et la pagination (rel=next, numéros, « load more ») sont suivis, sur listing_pages pages.
+
+        incremental: les articles déjà stockés (url_history) ne sont pas refetchés, et la lecture
+        d'une page de liste s'arrête après known_stop_run articles connus consécutifs.
+        """
+        budget = self._job_budget(budget, control)
+        crawl = self._crawl_domain(
+            [url], content_types, max_hits, control, stats_cb, keywords, skip_recent, prefer_browser,
+            incremental, known_stop_run, listing_pages, wp_api, budget
+        )
+        return self._interleave([crawl], budget)[0]
+
+    def crawl_seeds(self, seeds, content_types, max_hits=100, domain_budgets=None, control=None, stats_cb=None,
+                    keywords=None, skip_recent=True, incremental=False, known_stop_run=10, listing_pages=0,
+                    wp_api=False, budget=None):
+        """Crawl de plusieurs sites dans un seul job (même session, rate limiter et connexion Mongo)
+
+        Les seeds sont regroupées par domaine; chaque domaine a son propre budget de pages
+        (domain_budgets[domaine], sinon max_hits) et reste confiné à ses URLs. Les domaines avancent
+        à tour de rôle: pendant le délai de politesse d'un site, les autres sont crawlés.
+        budget (durée, octets, requêtes) et stop/pause valent pour le job entier.
+        """
+        budget = self._job_budget(budget, control)
+        domain_budgets = {url_domain(d): n for d, n in (domain_budgets or {}).items()}
+        groups = {}
+        for seed in seeds:
+            groups.setdefault(url_domain(seed), []).append(seed)
+        if stats_cb:
+            stats_cb("start", {"url": seeds[0] if seeds else "", "max_hits": sum(
+                domain_budgets.get(domain, max_hits) for domain in groups), "domains": len(groups)})
+
+        summaries = []
+
+        def domain_stats(event, payload):
+            # Début/fin de chaque domaine: résumés agrégés en un seul cycle de vie du job
+            if event in ("start", "stopped", "budget"):
+                return
+            if event == "done":
+                summaries.append(payload)
+            elif stats_cb:
+                stats_cb(event, payload)
+
+        session = self.anti_blocking.create_advanced_session(
+            use_proxy=self.use_proxy,
+            verify_ssl=self.verify_ssl,
+            transport=self.transport
+        )
+        crawls = [
+            self._crawl_domain(
+                domain_seeds, content_types, domain_budgets.get(domain, max_hits), control, domain_stats, keywords,
+                skip_recent, False, incremental, known_stop_run, listing_pages, wp_api, budget, session=session
+            )
+            for domain, domain_seeds in groups.items()
+        ]
+        logger.info(f"🌐 Job multi-sites: {len(groups)} domaines, {len(seeds)} seeds")
+        try:
+            results = self._interleave(crawls, budget)
+        finally:
+            session.close()
+
+        collected_data = [data for domain_data in results for data in domain_data]
+        stop_reason = "stopped" if budget.stop_requested() else budget.exhausted()
+        if stats_cb:
+            if stop_reason == "stopped":
+                stats_cb("stopped", {"url": seeds[0] if seeds else ""})
+            elif stop_reason:
+                stats_cb("budget", {"url": seeds[0] if seeds else "", "reason": stop_reason, **budget.to_dict()})
+            suppressed = defaultdict(int)
+            for summary in summaries:
+                for reason, count in (summary.get("suppressed") or {}).items():
+                    suppressed[reason] += count
+            stats_cb("done", {
+                "collected": len(collected_data),
+                "failed": sum(summary.get("failed", 0) for summary in summaries),
+                "suppressed": dict(suppressed),
+                "known_skipped": sum(summary.get("known_skipped", 0) for summary in summaries),
+                "domains": {domain: len(domain_data) for domain, domain_data in zip(groups, results)},
+            })
+        logger.info(f"🌐 Résumé multi-sites: {len(collected_data)} pages sur {len(groups)} domaines")
+        return collected_data
+
+    @staticmethod
+    def _job_budget(budget, control):
+        if budget is None:
+            return CrawlBudget(control=control)
+        if budget.control is None:
+            budget.control = control
+        return budget
+
+    def _interleave(self, crawls, budget):
+        """Fait avancer des crawls de domaine (générateurs) à tour de rôle; retourne leurs résultats
+
+        Un crawl rend la main avant chaque requête avec le délai restant avant que son domaine soit
+        libre: le suivant prêt dans l'ordre reprend, et on ne dort que si aucun domaine n'est prêt.
+        Un stop ou l'échéance pendant cette attente est renvoyé à chaque crawl, qui s'arrête proprement.
+        """
+        results = [[] for _ in crawls]
+        ready_at = [0.0] * len(crawls)
+        pending = deque(range(len(crawls)))
+        started = set()
+
+        def advance(index, interrupt=None):
+            try:
+                if interrupt is None:
+                    wait = crawls[index].send(None)
+                elif index in started:
+                    wait = crawls[index].throw(interrupt)
+                else:
+                    crawls[index].close()
+                    return
+                started.add(index)
+                ready_at[index] = time.monotonic() + wait
+                pending.append(index)
+            except StopIteration as done:
+                results[index] = done.value or []
+
+        while pending:
+            now = time.monotonic()
+            index = next((i for i in pending if ready_at[i] <= now), None)
+            if index is not None:
+                pending.remove(index)
+                advance(index)
+                continue
+            try:
+                budget.sleep(min(ready_at[i] for i in pending) - now)
+            except CrawlInterrupted as e:
+                for index in list(pending):
+                    pending.remove(index)
+                    advance(index, e)
+        return results
+
+    def _crawl_domain(self, seeds, content_types, max_hits, control, stats_cb, keywords, skip_recent, prefer_browser,
+                      incremental, known_stop_run, listing_pages, wp_api, budget, session=None):
+        """Crawl d'un domaine (générateur piloté par _interleave, voir crawl_url pour les options)
+
+        Rend (yield) le nombre de secondes à attendre avant la prochaine requête (délai de politesse,
+        Retry-After, pause après erreur) au lieu de dormir; retourne les pages collectées.
+        """
+        url = seeds[0]
         normalized_types = [ct.lower().strip() for ct in (content_types or [])]
         if "rss" in normalized_types and "xml" not in normalized_types:
             normalized_types.append("xml")
         content_types = normalized_types or ["html"]
         keywords = [k.strip().lower() for k in (keywords or []) if k.strip()]
         keywords = self._expand_keywords(keywords)
+        prefilter = KeywordPrefilter(keywords, self._normalize_text)
+        prefiltered = 0
         browser_fetcher = None
         first_fetch = True
 
@@ -804,15 +1339,124 @@ class WebCrawler:
                 stats_cb("error", {"url": target_url, "error": "Using browser fallback"})
             return browser_fetcher.fetch(target_url, timeout_sec=self.request_timeout)
 
-        def extract_links(html_bytes, current_url, depth):
+        def enqueue(candidate_url, candidate_depth):
+            """Ajoute une URL à la frontière si sa clé canonique est nouvelle"""
+            key = self.canonicalizer.canonicalize(candidate_url)
+            if key in visited_urls or key in queued_keys:
+                return False
+            if failed_urls.get(key, (0, ""))[0] >= self.max_retries_per_url:
+                return False
+            if traps.check(candidate_url, candidate_depth):
+                return False
+            urls_to_visit.append((candidate_url, candidate_depth))
+            queued_keys.add(key)
+            return True
+
+        def canonical_seen(data, current_url, normalized_url):
+            """Applique <link rel=canonical>: vrai si la page canonique a déjà été visitée"""
+            canonical_url = data.get('canonical_url')
+            if not canonical_url or not self._is_same_domain(url, canonical_url):
+                return False
+            canonical_key = self.canonicalizer.register_alias(current_url, canonical_url)
+            if not canonical_key:
+                return False
+            self.record_alias(normalized_url, canonical_key)
+            if canonical_key in visited_urls:
+                logger.info(f"🔁 Alias de {canonical_key}, ignoré: {current_url}")
+                if stats_cb:
+                    stats_cb("error", {"url": current_url, "error": "Duplicate of canonical URL"})
+                return True
+            visited_urls.add(canonical_key)
+            return False
+
+        def retry_later(current_url, depth, normalized_url, error):
+            """Compte l'échec; remet l'URL en tête de file s'il lui reste des tentatives et retourne l'attente"""
+            retry_count = failed_urls.get(normalized_url, (0, ""))[0] + 1
+            failed_urls[normalized_url] = (retry_count, error)
+            if stats_cb:
+                stats_cb("error", {"url": current_url, "error": error})
+            if retry_count >= self.max_retries_per_url:
+                return None
+            urls_to_visit.insert(0, (current_url, depth))
+            queued_keys.add(normalized_url)
+            visited_urls.discard(normalized_url)
+            return self.RETRY_BACKOFF * 2 ** (retry_count - 1)
+
+        def queue_page_links(page_links, current_url, depth):
+            """Met en file les liens d'une page; retourne (nb ajoutés, liste arrêtée sur articles connus)"""
+            known = set()
+            if incremental:
+                known = self.known_urls(
+                    self.canonicalizer.canonicalize(link_url)
+                    for link_url in page_links
+                    if not self._looks_like_listing(link_url)
+                )
+            links_found = 0
+            known_run = 0
+            for clean_url in page_links:
+                if incremental and not self._looks_like_listing(clean_url):
+                    if self.canonicalizer.canonicalize(clean_url) in known:
+                        known_run += 1
+                        incremental_stats['known'] += 1
+                        if known_run >= known_stop_run:
+                            # Liste triée du plus récent au plus ancien: la suite est déjà connue
+                            incremental_stats['listings_stopped'] += 1
+                            logger.info(f"   ⏹️  {known_run} articles connus d'affilée, fin de la liste: {current_url}")
+                            return links_found, True
+                        continue
+                    known_run = 0
+                if enqueue(clean_url, depth + 1):
+                    links_found += 1
+            return links_found, False
+
+        def walk_listing(html_bytes, current_url, hop, depth):
+            """Page de liste: met en file le bloc d'articles et la page suivante. Faux si ce n'est pas une liste."""
+            nonlocal listing_mode
             try:
                 soup = BeautifulSoup(html_bytes, 'html.parser')
+                articles = find_article_links(soup, current_url)
+                if len(articles) < MIN_ARTICLE_LINKS:
+                    return False
+                listing_mode = True
+                article_urls = []
+                for article_url in articles:
+                    clean_url = self.anti_blocking.normalize_url(traps.strip_tracking(article_url))
+                    if self._is_same_domain(url, clean_url) and not self._skip_by_extension(clean_url, content_types):
+                        article_urls.append(clean_url)
+                links_found, stopped = queue_page_links(article_urls, current_url, depth)
+
+                next_url = None
+                if not stopped and hop < listing_pages:
+                    next_url = find_next_page(soup, current_url)
+                    if next_url and self._is_same_domain(url, next_url):
+                        next_url = self.anti_blocking.normalize_url(traps.strip_tracking(next_url))
+                        if enqueue(next_url, depth + 1):
+                            listing_hops[self.canonicalizer.canonicalize(next_url)] = hop + 1
+                        else:
+                            next_url = None
+                    else:
+                        next_url = None
+                logger.info(f"   📰 Liste (page {hop + 1}): {links_found} articles, suivante: {next_url or '-'}")
+                if stats_cb:
+                    stats_cb("listing", {"url": current_url, "articles": links_found, "next": next_url})
+                return True
+            except Exception as e:
+                logger.debug(f"Liste non analysée: {e}")
+                return False
+
+        def extract_links(html_bytes, current_url, depth):
+            try:
+                soup = BeautifulSoup(html_bytes, 'html.parser', parse_only=LINK_STRAINER)
                 links_found = 0
+                suppressed_before = traps.total_suppressed
                 allow_first_hop = depth == 0
                 listing_candidates = []
+                page_links = []
                 for link in soup.find_all('a', href=True):
                     absolute_url = urljoin(current_url, link['href'])
-                    clean_url = self.anti_blocking.normalize_url(absolute_url)
+                    clean_url = self.anti_blocking.normalize_url(traps.strip_tracking(absolute_url))
+                    if self._skip_by_extension(clean_url, content_types):
+                        continue
                     link_text = link.get_text(separator=" ", strip=True)
                     if keywords and not allow_first_hop:
                         if not self._link_is_relevant(link_text, clean_url, keywords):
@@ -821,64 +1465,79 @@ class WebCrawler:
                         if self._looks_like_listing(clean_url):
                             listing_candidates.append(clean_url)
                     if self._is_same_domain(url, clean_url):
-                        if clean_url not in visited_urls and clean_url not in [f[0] for f in failed_urls]:
-                            if clean_url not in [u for u, _ in urls_to_visit]:
-                                urls_to_visit.append((clean_url, depth + 1))
-                                links_found += 1
+                        page_links.append(clean_url)
+
+                links_found, _ = queue_page_links(page_links, current_url, depth)
                 if keywords and allow_first_hop and links_found == 0:
                     for candidate in listing_candidates[:10]:
-                        if candidate not in visited_urls and candidate not in [f[0] for f in failed_urls]:
-                            if candidate not in [u for u, _ in urls_to_visit]:
-                                urls_to_visit.append((candidate, depth + 1))
-                                links_found += 1
+                        if enqueue(candidate, depth + 1):
+                            links_found += 1
                 if links_found > 0:
                     logger.info(f"   ?+' {links_found} nouveaux liens")
+                suppressed = traps.total_suppressed - suppressed_before
+                if suppressed:
+                    logger.info(f"   🪤 {suppressed} liens supprimés (pièges: {traps.stats()})")
+                    if stats_cb:
+                        stats_cb("suppressed", {"url": current_url, "count": suppressed, "reasons": traps.stats()})
             except Exception:
                 pass
         
         def should_stop():
-            if control is None:
-                return False
-            stop_event = getattr(control, "stop_event", None)
-            if stop_event is None and isinstance(control, dict):
-                stop_event = control.get("stop_event")
-            return bool(stop_event and stop_event.is_set())
-
-        def wait_if_paused():
-            if control is None:
-                return
-            pause_event = getattr(control, "pause_event", None)
-            if pause_event is None and isinstance(control, dict):
-                pause_event = control.get("pause_event")
-            if pause_event is not None:
-                pause_event.wait()
+            return budget.stop_requested() or budget.exhausted() is not None
 
         if stats_cb:
             stats_cb("start", {"url": url, "max_hits": max_hits})
 
         collected_data = []
-        visited_urls = set()
-        urls_to_visit = [(url, 0)]
+        visited_urls = set()  # clés canoniques
+        urls_to_visit = [(seed, 0) for seed in seeds]
+        queued_keys = {self.canonicalizer.canonicalize(seed) for seed in seeds}
+        incremental_stats = {'known': 0, 'listings_stopped': 0}
+        # Pagination des listes: clé canonique -> nombre de pages déjà parcourues
+        listing_hops = {self.canonicalizer.canonicalize(seed): 0 for seed in seeds} if listing_pages else {}
+        listing_mode = False
+        traps = TrapDetector(
+            max_depth=self.max_depth,
+            max_per_template=self.max_urls_per_template,
+            max_param_values=self.max_param_values,
+            tracking_params=self.tracking_params
+        )
         failed_urls = {}  # URL -> (retry_count, last_error)
         
-        session = self.anti_blocking.create_advanced_session(
-            use_proxy=self.use_proxy,
-            verify_ssl=self.verify_ssl
-        )
+        owns_session = session is None
+        if owns_session:
+            session = self.anti_blocking.create_advanced_session(
+                use_proxy=self.use_proxy,
+                verify_ssl=self.verify_ssl,
+                transport=self.transport
+            )
         
         domain = urlparse(url).netloc
         last_referer = None
+        stop_reason = None
+        self._load_aliases(url)
+
+        if wp_api:
+            wp_results = yield from self.crawl_wp_api(
+                session, url, max_hits, keywords, stats_cb=stats_cb, should_stop=should_stop,
+                skip_recent=skip_recent, incremental=incremental, known_stop_run=known_stop_run,
+                budget=budget
+            )
+            if wp_results is not None:
+                collected_data.extend(wp_results)
+                urls_to_visit.clear()
         
         while urls_to_visit and len(collected_data) < max_hits:
-            if should_stop():
-                if stats_cb:
-                    stats_cb("stopped", {"url": url})
+            try:
+                budget.check()
+                budget.wait_if_paused()
+            except CrawlInterrupted as e:
+                stop_reason = e.reason
                 break
 
-            wait_if_paused()
-
             current_url, depth = urls_to_visit.pop(0)
-            normalized_url = self.anti_blocking.normalize_url(current_url)
+            normalized_url = self.canonicalizer.canonicalize(current_url)
+            queued_keys.discard(normalized_url)
 
             if stats_cb:
                 stats_cb("attempt", {"url": current_url, "queue": len(urls_to_visit)})
@@ -917,6 +1576,8 @@ class WebCrawler:
                 if fallback:
                     html, final_url, method = fallback
                     data = self._process_html(final_url, html)
+                    if data and canonical_seen(data, current_url, normalized_url):
+                        continue
                     if data and self._is_relevant(data, keywords):
                         collected_data.append(data)
                         self.mark_url_crawled(normalized_url, success=True)
@@ -930,30 +1591,59 @@ class WebCrawler:
                             extract_links(html, final_url, depth)
                         stats_cb("error", {"url": current_url, "error": "Filtered by keywords"})
 
-            # Rate limiting adaptatif
-            is_retry = normalized_url in failed_urls
-            delay = self.anti_blocking.calculate_intelligent_delay(
-                self.base_delay, 
-                domain, 
-                is_retry
-            )
-            self.rate_limiter.wait_if_needed(domain, delay)
-            
             try:
+                # Rate limiting adaptatif
+                is_retry = normalized_url in failed_urls
+                delay = self.anti_blocking.calculate_intelligent_delay(
+                    self.base_delay,
+                    domain,
+                    is_retry
+                )
+                # Tour de rôle: rend la main avant chaque requête, et tant que le domaine n'est pas libre
+                yield self.rate_limiter.time_until_ready(domain)
+                while self.rate_limiter.time_until_ready(domain) > 0.01:
+                    yield self.rate_limiter.time_until_ready(domain)
+                self.rate_limiter.wait_if_needed(domain, delay, sleep=budget.sleep)
+                budget.check()
+
                 logger.info(f"🔍 Crawl: {current_url}")
                 
                 # Headers avancés avec referer intelligent
                 headers = self.anti_blocking.get_advanced_headers(
                     url=current_url,
-                    referer=last_referer
+                    referer=last_referer,
+                    accept_encoding=self.accept_encoding
                 )
                 
-                response = session.get(
+                response = budget.call(lambda: session.get(
                     current_url,
                     headers=headers,
-                    timeout=self.request_timeout,
-                    allow_redirects=True
+                    timeout=budget.cap_timeout(self.request_timeout),
+                    allow_redirects=True,
+                    stream=True
+                ))
+
+                # Filtrage avant lecture du corps (Content-Type, taille, premiers octets)
+                body, content_type, skip_reason = self._read_body(
+                    response,
+                    content_types,
+                    check_type=200 <= response.status_code < 300,
+                    budget=budget
                 )
+                budget.add_fetch(len(body) if body is not None else 0)
+                if body is None:
+                    response.close()
+                    logger.info(f"⏭️  {skip_reason}: {current_url}")
+                    if stats_cb:
+                        stats_cb("error", {"url": current_url, "error": skip_reason})
+                    continue
+                response._content = body
+                if self.archive is not None and 200 <= response.status_code < 300:
+                    try:
+                        self.archive.write(current_url, response.status_code, dict(response.headers), body,
+                                           getattr(response, 'http_version', None) or 'HTTP/1.1')
+                    except Exception as e:
+                        logger.warning(f"Archive non écrite: {e}")
 
                 # Détecter challenge JS même avec status 200
                 if self.use_browser_fallback and self.js_solver.detect_challenge(response):
@@ -968,6 +1658,8 @@ class WebCrawler:
                         if fallback:
                             html, final_url, method = fallback
                             data = self._process_html(final_url, html)
+                            if data and canonical_seen(data, current_url, normalized_url):
+                                continue
                             if data and self._is_relevant(data, keywords):
                                 collected_data.append(data)
                                 self.mark_url_crawled(normalized_url, success=True)
@@ -991,8 +1683,9 @@ class WebCrawler:
                     logger.info(f"Attente de {retry_after}s...")
                     if stats_cb:
                         stats_cb("error", {"url": current_url, "error": f"Rate limited (retry {retry_after}s)"})
-                    time.sleep(retry_after)
+                    yield retry_after
                     urls_to_visit.insert(0, (current_url, depth))
+                    queued_keys.add(normalized_url)
                     visited_urls.remove(normalized_url)
                     continue
                 
@@ -1010,6 +1703,8 @@ class WebCrawler:
                         if fallback:
                             html, final_url, method = fallback
                             data = self._process_html(final_url, html)
+                            if data and canonical_seen(data, current_url, normalized_url):
+                                continue
                             if data and self._is_relevant(data, keywords):
                                 collected_data.append(data)
                                 self.mark_url_crawled(normalized_url, success=True)
@@ -1029,9 +1724,16 @@ class WebCrawler:
                     )
                     if stats_cb:
                         stats_cb("error", {"url": current_url, "error": f"HTTP {response.status_code}"})
-                    time.sleep(5)
+                    yield 5
                     continue
                 
+                if response.status_code in self.RETRY_STATUSES:
+                    logger.warning(f"🔁 {response.status_code} Erreur serveur: {current_url}")
+                    response.close()
+                    wait = retry_later(current_url, depth, normalized_url, f"HTTP {response.status_code}")
+                    yield wait if wait is not None else 5
+                    continue
+
                 response.raise_for_status()
                 
                 # Sauvegarder cookies
@@ -1041,18 +1743,30 @@ class WebCrawler:
                 self.rate_limiter.report_success(domain)
                 
                 # Traiter le contenu
-                content_type = response.headers.get('Content-Type', '').lower()
-                data = None
-                
                 data = None
 
                 if 'html' in content_type and 'html' in content_types:
+                    hop = listing_hops.get(normalized_url)
+                    if hop is not None and walk_listing(response.content, current_url, hop, depth):
+                        last_referer = current_url
+                        continue
+
+                    # Premier niveau: aucun mot-clé dans le texte brut -> pas d'extraction DOM
+                    if keywords and not prefilter.matches(current_url, response.content, content_type):
+                        prefiltered += 1
+                        if len(collected_data) < max_hits and not listing_mode:
+                            extract_links(response.content, current_url, depth)
+                        last_referer = current_url
+                        if stats_cb:
+                            stats_cb("error", {"url": current_url, "error": "Filtered by keywords (prefilter)"})
+                        continue
+
                     data = self._process_html(current_url, response.content)
                     if data:
                         logger.info(f"Fetched: {data['title'][:60]}")
                         
-                        # Extraire liens si besoin
-                        if len(collected_data) < max_hits:
+                        # Extraire liens si besoin (en mode liste, seules les listes sont suivies)
+                        if len(collected_data) < max_hits and not listing_mode:
                             extract_links(response.content, current_url, depth)
                         
                         last_referer = current_url
@@ -1079,6 +1793,9 @@ class WebCrawler:
                         if data:
                             logger.info(f"Fetched page: {data['title'][:60]}")
                 
+                if data and canonical_seen(data, current_url, normalized_url):
+                    continue
+
                 if data and self._is_relevant(data, keywords):
                     collected_data.append(data)
                     self.mark_url_crawled(normalized_url, success=True)
@@ -1087,6 +1804,12 @@ class WebCrawler:
                 elif data and stats_cb:
                     stats_cb("error", {"url": current_url, "error": "Filtered by keywords"})
                 
+            except CrawlInterrupted as e:
+                # Requête abandonnée: la page sera refaite au prochain crawl
+                visited_urls.discard(normalized_url)
+                stop_reason = e.reason
+                break
+
             except requests.exceptions.Timeout:
                 logger.warning(f"⏱️  Timeout: {current_url}")
                 if self.use_browser_fallback:
@@ -1094,6 +1817,8 @@ class WebCrawler:
                     if fallback:
                         html, final_url, method = fallback
                         data = self._process_html(final_url, html)
+                        if data and canonical_seen(data, current_url, normalized_url):
+                            continue
                         if data and self._is_relevant(data, keywords):
                             collected_data.append(data)
                             self.mark_url_crawled(normalized_url, success=True)
@@ -1106,12 +1831,13 @@ class WebCrawler:
                             if len(collected_data) < max_hits:
                                 extract_links(html, final_url, depth)
                             stats_cb("error", {"url": current_url, "error": "Filtered by keywords"})
-                failed_urls[normalized_url] = (
-                    failed_urls.get(normalized_url, (0, ""))[0] + 1,
-                    "Timeout"
-                )
-                if stats_cb:
-                    stats_cb("error", {"url": current_url, "error": "Timeout"})
+                wait = retry_later(current_url, depth, normalized_url, "Timeout")
+                if wait is not None:
+                    try:
+                        yield wait
+                    except CrawlInterrupted as e:
+                        stop_reason = e.reason
+                        break
                 
             except requests.exceptions.ConnectionError as e:
                 logger.warning(f"🔌 Erreur connexion: {current_url}")
@@ -1120,6 +1846,8 @@ class WebCrawler:
                     if fallback:
                         html, final_url, method = fallback
                         data = self._process_html(final_url, html)
+                        if data and canonical_seen(data, current_url, normalized_url):
+                            continue
                         if data and self._is_relevant(data, keywords):
                             collected_data.append(data)
                             self.mark_url_crawled(normalized_url, success=True)
@@ -1132,13 +1860,12 @@ class WebCrawler:
                             if len(collected_data) < max_hits:
                                 extract_links(html, final_url, depth)
                             stats_cb("error", {"url": current_url, "error": "Filtered by keywords"})
-                failed_urls[normalized_url] = (
-                    failed_urls.get(normalized_url, (0, ""))[0] + 1,
-                    "Connection Error"
-                )
-                time.sleep(5)
-                if stats_cb:
-                    stats_cb("error", {"url": current_url, "error": "Connection Error"})
+                wait = retry_later(current_url, depth, normalized_url, "Connection Error")
+                try:
+                    yield wait if wait is not None else 5
+                except CrawlInterrupted as e:
+                    stop_reason = e.reason
+                    break
                 
             except requests.exceptions.TooManyRedirects:
                 logger.warning(f"🔄 Trop de redirections: {current_url}")
@@ -1155,11 +1882,33 @@ class WebCrawler:
                 if stats_cb:
                     stats_cb("error", {"url": current_url, "error": str(e)[:100]})
         
-        session.close()
-        logger.info(f"📊 Résumé: {len(collected_data)} pages collectées, {len(failed_urls)} échecs")
+        if stop_reason is None and wp_api and should_stop():
+            # Interrompu pendant la lecture de l'API WordPress (boucle HTML jamais entrée)
+            stop_reason = "stopped" if budget.stop_requested() else budget.exhausted()
+        if stop_reason == "stopped":
+            if stats_cb:
+                stats_cb("stopped", {"url": url})
+        elif stop_reason:
+            logger.info(f"⏳ Budget épuisé ({stop_reason}): {budget.fetches} requêtes, "
+                        f"{budget.bytes // 1024} KB en {budget.elapsed():.0f}s")
+            if stats_cb:
+                stats_cb("budget", {"url": url, "reason": stop_reason, **budget.to_dict()})
+
+        if owns_session:
+            session.close()
+        logger.info(f"📊 Résumé: {len(collected_data)} pages collectées, {len(failed_urls)} échecs, {traps.total_suppressed} URLs supprimées")
+        if incremental:
+            logger.info(f"♻️  Incrémental: {incremental_stats['known']} articles connus ignorés, {incremental_stats['listings_stopped']} listes arrêtées")
+        if prefiltered:
+            logger.info(f"🧹 Préfiltre: {prefiltered} pages écartées sans extraction DOM")
 
         if stats_cb:
-            stats_cb("done", {"collected": len(collected_data), "failed": len(failed_urls)})
+            stats_cb("done", {
+                "collected": len(collected_data),
+                "failed": len(failed_urls),
+                "suppressed": traps.stats(),
+                "known_skipped": incremental_stats['known']
+            })
         
         return collected_data
     
@@ -1177,14 +1926,22 @@ class WebCrawler:
         """Traite HTML"""
         try:
             soup = BeautifulSoup(content, 'html.parser')
-            
+
+            # JSON-LD / OpenGraph avant suppression des <script>: évite les heuristiques DOM
+            structured = extract_structured(soup)
+
             for script in soup(['script', 'style', 'nav', 'footer', 'aside', 'header']):
                 script.decompose()
             
-            title = soup.title.string if soup.title else 'Sans titre'
+            title = structured.get('title') or (soup.title.string if soup.title else None) or 'Sans titre'
             title = title.strip()[:200]
             
-            text_content = self._extract_main_text(soup)
+            if len(structured.get('body', '')) >= 200:
+                text_content = structured['body']
+                extraction = structured['source']
+            else:
+                text_content = self._extract_main_text(soup, url)
+                extraction = 'dom'
             
             keywords = []
             meta_keywords = soup.find('meta', attrs={'name': 'keywords'})
@@ -1195,14 +1952,26 @@ class WebCrawler:
             meta_desc = soup.find('meta', attrs={'name': 'description'})
             if meta_desc and meta_desc.get('content'):
                 description = meta_desc['content'][:500]
+            if not description:
+                description = structured.get('description', '')[:500]
+
+            canonical_url = None
+            canonical_link = soup.find('link', rel='canonical', href=True)
+            if canonical_link:
+                canonical_url = urljoin(url, canonical_link['href'].strip())
             
             return {
                 'url': url,
                 'title': title,
                 'description': description,
-                'content': text_content[:10000],
+                'content': text_content,
                 'content_type': 'html',
                 'keywords': keywords,
+                'canonical_url': canonical_url,
+                'published_at': structured.get('published_at'),
+                'author': structured.get('author') or None,
+                'section': structured.get('section') or None,
+                'extraction': extraction,
                 'timestamp': datetime.now()
             }
         except Exception as e:
@@ -1247,7 +2016,7 @@ class WebCrawler:
                 'url': url,
                 'title': url.split('/')[-1],
                 'description': text_content[:500],
-                'content': text_content[:10000],
+                'content': text_content,
                 'content_type': 'pdf',
                 'keywords': [],
                 'timestamp': datetime.now()
@@ -1263,7 +2032,7 @@ class WebCrawler:
                 'url': url,
                 'title': url.split('/')[-1],
                 'description': content[:500],
-                'content': content[:10000],
+                'content': content,
                 'content_type': 'text',
                 'keywords': [],
                 'timestamp': datetime.now()
@@ -1272,6 +2041,21 @@ class WebCrawler:
             logger.error(f"Erreur texte: {e}")
             return None
 
+    def process_body(self, url, body, content_type, keywords=None):
+        """Parse un corps déjà téléchargé selon son type et applique le filtre de pertinence"""
+        content_type = (content_type or '').lower()
+        if 'pdf' in content_type:
+            data = self._process_pdf(url, body)
+        elif 'xml' in content_type and 'html' not in content_type:
+            data = self._process_xml(url, body)
+        elif 'text/plain' in content_type:
+            data = self._process_text(url, decode_html(body, content_type))
+        else:
+            data = self._process_html(url, body)
+        if data and self._is_relevant(data, keywords or []):
+            return data
+        return None
+
     def _is_relevant(self, data, keywords):
         if not keywords:
             return True
@@ -1371,11 +2155,15 @@ class WebCrawler:
 
         return content_hits >= 3
     
+    # Hashes de contenu gardés par source pour mesurer les changements d'un crawl à l'autre
+    MAX_SOURCE_HASHES = 2000
+
     def crawl_source(self, source_id):
         """Crawl une source"""
+        started = datetime.now()
+        source = None
         try:
-            from bson.objectid import ObjectId
-            source = self.sources_collection.find_one({'_id': ObjectId(source_id)})
+            source = self._get_source(source_id)
             
             if not source or not source.get('enabled'):
                 logger.warning(f"Source {source_id} introuvable ou désactivée")
@@ -1383,70 +2171,96 @@ class WebCrawler:
             
             logger.info(f"🚀 Début crawl: {source['url']}")
             
-            self.sources_collection.update_one(
-                {'_id': ObjectId(source_id)},
-                {'$set': {'status': 'crawling'}}
-            )
+            self._update_source(source_id, {'status': 'crawling'})
             
+            incremental = bool(source.get('incremental', False))
             collected_data = self.crawl_url(
                 source['url'],
                 source['content_types'],
                 source['max_hits'],
-                keywords=source.get('keywords', [])
+                keywords=source.get('keywords', []),
+                skip_recent=not incremental,
+                incremental=incremental,
+                known_stop_run=source.get('known_stop_run', 10),
+                listing_pages=source.get('listing_pages', 0),
+                wp_api=source.get('wp_api', False),
+                budget=CrawlBudget.from_options(source)
             )
             
-            count = 0
-            for data in collected_data:
-                data['source_id'] = source_id
-                try:
-                    self.data_collection.insert_one(data)
-                    count += 1
-                except pymongo.errors.DuplicateKeyError:
-                    logger.debug(f"Doublon ignoré: {data['url']}")
+            outcomes = self.store_results(collected_data, source_id)
+            count = outcomes['new'] + outcomes['changed'] + outcomes['spooled']
             
-            self.sources_collection.update_one(
-                {'_id': ObjectId(source_id)},
-                {
-                    '$set': {
-                        'status': 'completed',
-                        'last_crawl': datetime.now(),
-                        'failed_attempts': 0
-                    },
-                    '$inc': {'success_count': 1}
-                }
+            # Rythme de changement: contenus (hash) absents du crawl précédent; None au premier crawl
+            hashes = list(dict.fromkeys(content_hash(d.get('title'), d.get('content')) for d in collected_data))
+            previous = source.get('last_hashes') or []
+            current = set(hashes)
+            changes = len(current - set(previous)) if previous else None
+            self._update_source(
+                source_id,
+                {'status': 'completed', 'last_crawl': datetime.now(), 'failed_attempts': 0,
+                 'last_changes': changes, 'last_collected': len(collected_data),
+                 'last_hashes': (hashes + [h for h in previous if h not in current])[:self.MAX_SOURCE_HASHES]},
+                {'success_count': 1}
             )
             
-            logger.info(f"✅ Crawl terminé: {count} éléments sauvegardés")
+            self._record_source_run(source_id, source, started, 'completed', collected_data, outcomes)
+
+            if outcomes['spooled']:
+                logger.info(f"✅ Crawl terminé: {outcomes['spooled']} documents en file d'écriture (spool)")
+            else:
+                logger.info(f"✅ Crawl terminé: {outcomes['new']} nouveaux, {outcomes['changed']} modifiés, {outcomes['unchanged']} inchangés")
             return count
             
         except Exception as e:
             logger.error(f"❌ Erreur crawl: {e}")
+            self._record_source_run(source_id, source, started, 'failed')
             
             try:
-                from bson.objectid import ObjectId
-                self.sources_collection.update_one(
-                    {'_id': ObjectId(source_id)},
-                    {
-                        '$set': {'status': 'failed'},
-                        '$inc': {'failed_attempts': 1}
-                    }
-                )
+                self._update_source(source_id, {'status': 'failed'}, {'failed_attempts': 1})
                 
-                source = self.sources_collection.find_one({'_id': ObjectId(source_id)})
+                source = self._get_source(source_id)
                 if source and source.get('failed_attempts', 0) >= 5:
-                    self.sources_collection.update_one(
-                        {'_id': ObjectId(source_id)},
-                        {'$set': {'enabled': False, 'status': 'disabled_after_failures'}}
-                    )
+                    self._update_source(source_id, {'enabled': False, 'status': 'disabled_after_failures'})
                     logger.warning(f"⚠️  Source {source_id} désactivée après 5 échecs")
             except:
                 pass
             
             return 0
     
+    def store_results(self, collected_data, source_id, extra=None):
+        """Enregistre les résultats d'un crawl (hash de contenu): compte new/changed/unchanged/failed"""
+        outcomes = {'new': 0, 'changed': 0, 'unchanged': 0, 'failed': 0, 'spooled': 0}
+        if self.spool is not None:
+            for data in collected_data:
+                self.spool.save(self.db.name, data, source_id=source_id, extra=extra)
+            outcomes['spooled'] = len(collected_data)
+            return outcomes
+        store = self.local if self.local is not None else self.store
+        for data in collected_data:
+            try:
+                outcomes[store.save(data, source_id=source_id, extra=extra)] += 1
+            except Exception as e:
+                outcomes['failed'] += 1
+                logger.warning(f"Document non enregistré {data.get('url')}: {e}")
+        return outcomes
+
+    def get_content(self, url):
+        """Texte complet d'une page stockée (décompressé à la demande)"""
+        if self.local is not None:
+            doc = self.local.find_document(url)
+            return doc['content'] if doc else None
+        if not self.mongo_available:
+            return None
+        doc = self.data_collection.find_one({'url': url}, sort=[('timestamp', -1)])
+        return self.store.load_content(doc) if doc else None
+    
     def search_data(self, query, limit=50):
         """Recherche par mots-clés"""
         try:
+            if self.local is not None:
+                results = self.local.search(query, limit)
+                logger.info(f"🔍 Recherche locale '{query}': {len(results)} résultats")
+                return results
             results = list(self.data_collection.find(
                 {'$text': {'$search': query}},
                 {'score': {'$meta': 'textScore'}}
@@ -1464,6 +2278,8 @@ class WebCrawler:
     
     def get_statistics(self):
         """Statistiques"""
+        if self.local is not None:
+            return {**self.local.statistics(), 'last_update': datetime.now()}
         return {
             'total_sources': self.sources_collection.count_documents({}),
             'active_sources': self.sources_collection.count_documents({'enabled': True}),
@@ -1473,8 +2289,25 @@ class WebCrawler:
             'last_update': datetime.now()
         }
     
-    def schedule_crawls(self):
-        """Planificateur"""
+    def schedule_crawls(self, workers=None):
+        """Planificateur: SourceScheduler (crawls parallèles, exécutions en base) si MongoDB est joignable"""
+        if self.mongo_available:
+            def crawler_factory():
+                # Un crawler par thread du pool, même configuration que celui-ci
+                return WebCrawler(
+                    mongo_uri=self.mongo_uri, db_name=self.db.name, use_proxy=self.use_proxy,
+                    base_delay=self.base_delay, respect_robots_txt=self.respect_robots_txt,
+                    verify_ssl=self.verify_ssl, max_retries_per_url=self.max_retries_per_url,
+                    request_timeout=self.request_timeout, use_browser_fallback=self.use_browser_fallback,
+                    transport=self.transport, max_depth=self.max_depth,
+                    max_urls_per_template=self.max_urls_per_template, max_param_values=self.max_param_values,
+                    tracking_params=self.tracking_params,
+                )
+
+            kwargs = {"workers": workers} if workers else {}
+            return SourceScheduler(self.db, crawler_factory, **kwargs).start()
+
+        # Stockage local SQLite: ancien planificateur séquentiel (schedule)
         sources = self.get_sources(enabled_only=True)
         
         for source in sources:
@@ -1503,8 +2336,11 @@ class WebCrawler:
         logger.info("✓ Planificateur démarré")
     
     def close(self):
-        """Ferme MongoDB"""
-        self.client.close()
+        """Ferme l'archive et le stockage local (le client MongoDB est partagé par le processus)"""
+        if self.archive is not None:
+            self.archive.close()
+        if self.local is not None:
+            self.local.close()
         logger.info("✓ Connexion fermée")
 
 
@@ -1578,6 +2414,9 @@ def main():
             content_types = [ct.strip() for ct in content_types_input.split(',')]
             keywords_input = input("Mots-cles (finance, education, ... ) [vide]: ").strip()
             keywords = [kw.strip() for kw in keywords_input.split(',') if kw.strip()]
+            incremental = input("Mode incrémental (nouveaux articles seulement)? (o/n) [n]: ").strip().lower() == 'o'
+            wp_api = input("Site WordPress: utiliser l'API REST /wp-json? (o/n) [n]: ").strip().lower() == 'o'
+            adaptive = input("Fréquence adaptative (selon le rythme de publication)? (o/n) [n]: ").strip().lower() == 'o'
             
             source_id = crawler.add_source(
                 url=url,
@@ -1586,7 +2425,10 @@ def main():
                 schedule_time=schedule_time,
                 max_hits=max_hits,
                 content_types=content_types,
-                keywords=keywords
+                keywords=keywords,
+                incremental=incremental,
+                wp_api=wp_api,
+                adaptive=adaptive
             )
             print(f"\n✅ Source ajoutée! ID: {source_id}")
         
@@ -1605,6 +2447,9 @@ def main():
                 print(f"   ❌ Échecs: {source.get('failed_attempts', 0)}")
                 print(f"   ✔️  Succès: {source.get('success_count', 0)}")
                 print(f"   🕐 Dernier crawl: {source.get('last_crawl', 'Jamais')}")
+                if source.get('change_rate') is not None:
+                    print(f"   📈 Changements: {source['change_rate']:.2f}/h, intervalle {source.get('adaptive_interval', 0) / 3600:.1f}h, "
+                          f"fraîcheur prévue {source.get('predicted_freshness', 0):.0%}")
         
         elif choice == '3':
             source_id = input("\n🆔 ID de la source: ").strip()
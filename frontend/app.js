@@ -13,6 +13,7 @@ const connectionStatus = document.getElementById("connectionStatus");
 
 const statRunning = document.getElementById("statRunning");
 const statPaused = document.getElementById("statPaused");
+const statQueued = document.getElementById("statQueued");
 const statStopped = document.getElementById("statStopped");
 const statPages = document.getElementById("statPages");
 
@@ -416,11 +417,13 @@ const renderHistogram = (items, container) => {
 const updateOverview = () => {
   const running = state.jobs.filter((job) => job.status === "running").length;
   const paused = state.jobs.filter((job) => job.status === "paused").length;
+  const queued = state.jobs.filter((job) => job.status === "queued").length;
   const stopped = state.jobs.filter((job) => ["stopped", "done", "error"].includes(job.status)).length;
   const totalPages = state.jobs.reduce((sum, job) => sum + (job.pages_success || 0), 0);
 
   statRunning.textContent = formatNumber(running);
   statPaused.textContent = formatNumber(paused);
+  statQueued.textContent = formatNumber(queued);
   statStopped.textContent = formatNumber(stopped);
   statPages.textContent = formatNumber(totalPages);
   jobsCount.textContent = `${state.jobs.length} job${state.jobs.length === 1 ? "" : "s"}`;
@@ -430,6 +433,8 @@ const buildJobCard = (job) => {
   const uptime = job.start_time ? (Date.now() / 1000 - job.start_time) : 0;
   const lastError = job.last_error ? `<div class="job-stat"><span>Last error</span><strong class="mono">${job.last_error}</strong></div>` : "";
 
+  const budget = job.stop_reason && job.stop_reason !== "stopped" ? `<div class="job-stat"><span>Budget reached</span><strong>${job.stop_reason}</strong></div>` : "";
+
   const pauseLabel = job.status === "paused" ? "Resume" : "Pause";
   const pauseAction = job.status === "paused" ? "resume" : "pause";
 
@@ -441,7 +446,7 @@ const buildJobCard = (job) => {
           <div class="job-meta">job ${job.job_id} · max ${job.max_pages} pages</div>
         </div>
         <div class="actions">
-          <span class="badge ${job.status}">${job.status}</span>
+          <span class="badge ${job.status}">${job.status}${job.status === "queued" && job.queue_position ? ` #${job.queue_position}` : ""}</span>
           <button class="action-btn" data-action="${pauseAction}">${pauseLabel}</button>
           <button class="action-btn stop" data-action="stop">Stop</button>
           <button class="action-btn" data-action="delete">Delete</button>
@@ -453,9 +458,11 @@ const buildJobCard = (job) => {
         <div class="job-stat"><span>Collected</span><strong>${formatNumber(job.pages_success)}</strong></div>
         <div class="job-stat"><span>Errors</span><strong>${formatNumber(job.errors)}</strong></div>
         <div class="job-stat"><span>Queue</span><strong>${formatNumber(job.queue_size)}</strong></div>
+        <div class="job-stat"><span>Suppressed</span><strong>${formatNumber(job.urls_suppressed || 0)}</strong></div>
         <div class="job-stat"><span>Uptime</span><strong>${formatDuration(uptime)}</strong></div>
         <div class="job-stat"><span>Last URL</span><strong class="mono">${job.last_url || "-"}</strong></div>
         ${lastError}
+        ${budget}
       </div>
     </div>
   `;
@@ -485,8 +492,9 @@ const postAction = async (endpoint, payload) => {
 
 startForm.addEventListener("submit", async (event) => {
   event.preventDefault();
-  const url = urlInput.value.trim();
-  if (!url) return;
+  // Several URLs (comma or space separated) start one multi-site job, max pages per domain
+  const urls = urlInput.value.split(/[,\s]+/).map((value) => value.trim()).filter(Boolean);
+  if (!urls.length) return;
 
   const contentTypes = Array.from(startForm.querySelectorAll("input[type=checkbox]:checked")).map(
     (checkbox) => checkbox.value
@@ -501,7 +509,8 @@ startForm.addEventListener("submit", async (event) => {
     method: "POST",
     headers: { "Content-Type": "application/json" },
     body: JSON.stringify({
-      url,
+      url: urls[0],
+      urls,
       max_pages: maxPages,
       content_types: contentTypes.length ? contentTypes : ["html"],
       keywords,
@@ -535,6 +544,17 @@ jobsList.addEventListener("click", async (event) => {
   }
 });
 
+// Past jobs (finished before this server started) come from the job registry, not the stream
+const loadJobHistory = async () => {
+  try {
+    const data = await fetchJson("/api/jobs");
+    const known = new Set(state.jobs.map((job) => job.job_id));
+    updateJobs((data.jobs || []).filter((job) => !known.has(job.job_id)));
+  } catch (error) {
+    // History is optional (no MongoDB): live jobs still come from the stream
+  }
+};
+
 const connectStream = () => {
   const source = new EventSource("/api/stream");
   connectionStatus.textContent = "Live";
@@ -545,6 +565,10 @@ const connectStream = () => {
     if (payload.type === "snapshot") {
       state.jobs = payload.jobs || [];
       renderJobs();
+      loadJobHistory();
+    }
+    if (payload.type === "job_queued") {
+      updateJobs([payload.job]);
     }
     if (payload.type === "job_deleted") {
       state.jobs = state.jobs.filter((job) => job.job_id !== payload.job_id);
@@ -1,7 +1,7 @@
-import pymongo
 from datetime import datetime
 from graph.models import Node, Edge, Graph
 from config.settings import MONGODB_URI, DATABASE_NAME
+from crawler.db import connect
 import logging
 
 # Configurer le logger
@@ -11,19 +11,12 @@ logger = logging.getLogger(__name__)
 class GraphBuilder:
     def __init__(self):
         try:
-            self.client = pymongo.MongoClient(MONGODB_URI, serverSelectionTimeoutMS=5000)
-            self.client.admin.command('ping')
-            
-            self.db = self.client[DATABASE_NAME]
+            # Client partagé; index créés par les migrations de crawler.db
+            self.db = connect(MONGODB_URI, DATABASE_NAME, timeout_ms=5000)
+            self.client = self.db.client
             self.graphs = self.db['graphs']
             self.nodes = self.db['nodes']
             self.edges = self.db['edges']
-            
-            try:
-                self.graphs.create_index('source_url')
-                self.graphs.create_index('created_at')
-            except:
-                pass
                 
             logger.info("✅ GraphBuilder initialisé")
         except Exception as e:
@@ -181,9 +174,5 @@ class GraphBuilder:
             return []
     
     def close(self):
-        """Ferme la connexion MongoDB"""
-        try:
-            self.client.close()
-            logger.info("Connexion MongoDB fermée")
-        except Exception as e:
-            logger.error(f"Erreur fermeture: {e}")
\ No newline at end of file
+        """Le client MongoDB est partagé par le processus (crawler.db): rien à fermer ici"""
+        logger.info("GraphBuilder fermé")
\ No newline at end of file
@@ -8,14 +8,24 @@ if BASE_DIR not in sys.path:
 
 from flask import Flask, Response, jsonify, request
 
-from server.manager import CrawlerManager
+from config.settings import CRAWLER_JOB_HISTORY, CRAWLER_REQUEUE_INTERRUPTED, CRAWLER_SSE_HEARTBEAT
+from server.executor import is_crawl_worker
+from server.jobs import open_job_registry
+from server.manager import RESYNC, CrawlerManager, QueueFullError
 from server.reporting import ReportingService
 
 FRONTEND_DIR = os.path.join(BASE_DIR, "frontend")
 
 app = Flask(__name__, static_folder=FRONTEND_DIR, static_url_path="")
-manager = CrawlerManager()
-reporting = ReportingService()
+# With CRAWLER_EXECUTOR=process, spawned job workers re-import the entry script (this file or
+# server.asgi): they only run crawl code and must not start another manager or reporting connection.
+# The check is on the worker's process name, not parent_process(): ASGI servers such as hypercorn
+# serve from spawned processes of their own, which do need the manager.
+if not is_crawl_worker():
+    registry = open_job_registry()
+    manager = CrawlerManager(registry=registry)
+    manager.recover(requeue=CRAWLER_REQUEUE_INTERRUPTED)
+    reporting = ReportingService(registry=registry)
 
 
 @app.route("/")
@@ -25,18 +35,35 @@ def index():
 
 @app.route("/api/jobs", methods=["GET"])
 def jobs():
-    return jsonify({"jobs": manager.list_stats()})
+    history = request.args.get("history", CRAWLER_JOB_HISTORY, type=int)
+    return jsonify({"jobs": manager.list_stats(history=history)})
 
 
 @app.route("/api/crawl/start", methods=["POST"])
 def start_crawl():
     payload = request.get_json(silent=True) or {}
+    # Several seeds (list, or a string of URLs separated by commas/whitespace) make one multi-site job
+    urls = payload.get("urls") or []
+    if isinstance(urls, str):
+        urls = urls.replace(",", " ").split()
+    elif not isinstance(urls, list):
+        urls = []
+    urls = [u.strip() for u in urls if isinstance(u, str) and u.strip()]
     url = (payload.get("url") or "").strip()
+    if url and url not in urls and urls:
+        urls.insert(0, url)
+    url = url or (urls[0] if urls else "")
     if not url:
         return jsonify({"error": "URL is required"}), 400
 
+    urls = [u if u.startswith(("http://", "https://")) else "https://" + u for u in urls]
     if not url.startswith(("http://", "https://")):
         url = "https://" + url
+    # Per-domain page budgets of a multi-site job, e.g. {"hespress.com": 50}
+    domain_pages = payload.get("domain_pages") or {}
+    if not isinstance(domain_pages, dict):
+        domain_pages = {}
+    domain_pages = {str(domain): int(pages) for domain, pages in domain_pages.items() if str(pages).isdigit()}
 
     max_pages = int(payload.get("max_pages") or 5)
     content_types = payload.get("content_types") or ["html"]
@@ -49,7 +76,34 @@ def start_crawl():
     elif not isinstance(keywords, list):
         keywords = []
 
-    job_id = manager.start(url, max_pages=max_pages, content_types=content_types, keywords=keywords)
+    max_depth = payload.get("max_depth")
+    max_depth = int(max_depth) if max_depth not in (None, "") else None
+    listing_pages = int(payload.get("listing_pages") or 0)
+    wp_api = bool(payload.get("wp_api"))
+    priority = int(payload.get("priority") or 0)
+    # Optional budgets on top of max_pages: wall-clock seconds, downloaded megabytes, HTTP fetches
+    budget = {
+        "max_seconds": float(payload.get("max_seconds") or 0) or None,
+        "max_bytes": int(float(payload.get("max_mb") or 0) * 1024 * 1024) or None,
+        "max_fetches": int(payload.get("max_fetches") or 0) or None,
+    }
+
+    try:
+        job_id = manager.start(
+            url,
+            max_pages=max_pages,
+            content_types=content_types,
+            keywords=keywords,
+            max_depth=max_depth,
+            listing_pages=listing_pages,
+            wp_api=wp_api,
+            priority=priority,
+            budget=budget,
+            urls=urls if len(urls) > 1 else None,
+            domain_pages=domain_pages or None,
+        )
+    except QueueFullError as exc:
+        return jsonify({"error": str(exc)}), 429
     return jsonify({"job_id": job_id})
 
 
@@ -100,15 +154,22 @@ def delete_crawl():
 @app.route("/api/stream")
 def stream():
     def event_stream():
-        q = manager.subscribe()
+        subscription = manager.subscribe()
         try:
-            snapshot = {"type": "snapshot", "jobs": manager.list_stats()}
+            snapshot = {"type": "snapshot", "jobs": manager.snapshot()}
             yield f"data: {json.dumps(snapshot)}\n\n"
-            while True:
-                data = q.get()
-                yield f"data: {data}\n\n"
+            while not subscription.closed:
+                data = subscription.get(timeout=CRAWLER_SSE_HEARTBEAT)
+                if data is None:
+                    # Heartbeat comment: keeps proxies from closing the stream and surfaces dead clients
+                    yield ": keepalive\n\n"
+                elif data == RESYNC:
+                    snapshot = {"type": "snapshot", "jobs": manager.snapshot()}
+                    yield f"data: {json.dumps(snapshot)}\n\n"
+                else:
+                    yield f"data: {data}\n\n"
         finally:
-            manager.unsubscribe(q)
+            manager.unsubscribe(subscription)
 
     headers = {
         "Cache-Control": "no-cache",
@@ -0,0 +1,175 @@
+"""ASGI entry point: serves /api/stream natively on the event loop, everything else through Flask.
+
+With Flask's threaded dev server each open SSE connection holds an OS thread for its whole life.
+Here a subscriber is a coroutine waiting on an asyncio.Event, so hundreds of dashboard tabs cost
+no threads. The other routes (including slow LLM report requests) keep their Flask handlers and
+run in a bounded thread pool (CRAWLER_ASGI_THREADS) instead of one thread per request.
+
+Run with:
+
+  python -m server.asgi --port 8000
+  hypercorn server.asgi:app --bind 0.0.0.0:8000
+"""
+import argparse
+import asyncio
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from hypercorn.middleware import AsyncioWSGIMiddleware
+
+from config.settings import CRAWLER_ASGI_THREADS, CRAWLER_SSE_HEARTBEAT
+from server import app as flask_module
+from server.manager import RESYNC, Subscription
+
+logger = logging.getLogger(__name__)
+
+STREAM_PATH = "/api/stream"
+STREAM_HEADERS = [
+    (b"content-type", b"text/event-stream; charset=utf-8"),
+    (b"cache-control", b"no-cache"),
+    (b"x-accel-buffering", b"no"),
+]
+
+
+class AsyncSubscription(Subscription):
+    """Subscription whose reader is a coroutine: publisher threads wake the loop instead of a thread."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self._loop = loop
+        self._ready = asyncio.Event()
+
+    def _wake(self) -> None:
+        try:
+            self._loop.call_soon_threadsafe(self._ready.set)
+        except RuntimeError:  # loop already closed
+            pass
+
+    def put(self, data: str) -> None:
+        super().put(data)
+        self._wake()
+
+    def close(self) -> None:
+        super().close()
+        self._wake()
+
+    async def next(self, timeout: float) -> Optional[str]:
+        """Next message, RESYNC, or None on timeout / once closed."""
+        deadline = time.monotonic() + timeout
+        while True:
+            self._ready.clear()
+            data = self.get(timeout=0)
+            if data is not None or self.closed:
+                return data
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            try:
+                await asyncio.wait_for(self._ready.wait(), remaining)
+            except asyncio.TimeoutError:
+                return None
+
+
+def _event(payload: str) -> bytes:
+    return f"data: {payload}\n\n".encode("utf-8")
+
+
+def _snapshot(manager) -> bytes:
+    return _event(json.dumps({"type": "snapshot", "jobs": manager.snapshot()}))
+
+
+async def stream(scope, receive, send) -> None:
+    manager = flask_module.manager
+    subscription = manager.subscribe(AsyncSubscription(asyncio.get_running_loop()))
+
+    async def watch_disconnect() -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                subscription.close()
+                return
+
+    watcher = asyncio.create_task(watch_disconnect())
+    try:
+        await send({"type": "http.response.start", "status": 200, "headers": STREAM_HEADERS})
+        await send({"type": "http.response.body", "body": _snapshot(manager), "more_body": True})
+        while not subscription.closed:
+            data = await subscription.next(CRAWLER_SSE_HEARTBEAT)
+            if subscription.closed:
+                break
+            if data is None:
+                chunk = b": keepalive\n\n"
+            elif data == RESYNC:
+                chunk = _snapshot(manager)
+            else:
+                chunk = _event(data)
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        if not watcher.done():
+            # Evicted by the manager (stalled client): end the response cleanly
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+    except OSError:
+        pass  # client went away mid-write
+    finally:
+        watcher.cancel()
+        manager.unsubscribe(subscription)
+
+
+class CrawlerASGI:
+    """Routes /api/stream to the native handler and the rest to the Flask app."""
+
+    def __init__(self, wsgi_app, threads: int = CRAWLER_ASGI_THREADS) -> None:
+        self.wsgi = AsyncioWSGIMiddleware(wsgi_app)
+        self.threads = threads
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _ensure_executor(self) -> None:
+        # Flask handlers run in the loop's default executor: cap it instead of the asyncio default
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="asgi-wsgi")
+            asyncio.get_running_loop().set_default_executor(self._executor)
+
+    async def lifespan(self, receive, send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                self._ensure_executor()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "lifespan":
+            await self.lifespan(receive, send)
+            return
+        self._ensure_executor()  # servers started without lifespan support
+        if scope["type"] == "http" and scope["path"] == STREAM_PATH and scope["method"] == "GET":
+            await stream(scope, receive, send)
+            return
+        await self.wsgi(scope, receive, send)
+
+
+app = CrawlerASGI(flask_module.app)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Crawler server (ASGI, hypercorn)")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    from hypercorn.asyncio import serve
+    from hypercorn.config import Config
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    config = Config()
+    config.bind = [f"{args.host}:{args.port}"]
+    config.accesslog = None
+    asyncio.run(serve(app, config))
+
+
+if __name__ == "__main__":
+    main()
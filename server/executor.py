@@ -0,0 +1,148 @@
+"""Crawl job execution: in a manager thread, or in an isolated worker subprocess.
+
+In process mode each job runs in its own spawned interpreter with memory/CPU rlimits. Stats events
+travel back over a multiprocessing queue, and pause/stop keep their semantics because the job's
+CrawlerControl is built on multiprocessing events shared with the child.
+"""
+import logging
+import multiprocessing
+import queue
+import sys
+import time
+from typing import Callable, Dict, Optional
+
+from crawler.budget import CrawlBudget
+from crawler.storage import top_keywords
+from crawler.web_crawler import WebCrawler
+
+try:
+    import resource
+except ImportError:  # Windows: no rlimits, the job still runs out of process
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+EXECUTORS = ("thread", "process")
+# Seconds a stopped job gets to finish its current page before the worker is killed
+STOP_GRACE_SECONDS = 30.0
+_EXIT = "__exit__"
+# Name prefix of job worker processes; spawn sets it before re-importing the parent's main module
+WORKER_NAME_PREFIX = "crawl-job-"
+
+StatsCallback = Callable[[str, Dict], None]
+
+
+def mp_context():
+    return multiprocessing.get_context("spawn")
+
+
+def run_crawl(job_id: str, url: str, options: Dict, control, stats_cb: StatsCallback) -> None:
+    """Crawl one job and store its results (same code path for both executors)."""
+    crawler = WebCrawler(base_delay=0.5, max_retries_per_url=2, request_timeout=12, max_depth=options.get("max_depth"))
+    keywords = options.get("keywords") or []
+    common = dict(
+        content_types=options.get("content_types"),
+        max_hits=options.get("max_pages"),
+        keywords=keywords,
+        skip_recent=False,
+        listing_pages=options.get("listing_pages", 0),
+        wp_api=options.get("wp_api", False),
+        control=control,
+        stats_cb=stats_cb,
+        budget=CrawlBudget.from_options(options.get("budget"), control),
+    )
+    try:
+        if options.get("urls"):
+            # Multi-seed job: domains interleaved on one session and rate limiter
+            results = crawler.crawl_seeds(options["urls"], domain_budgets=options.get("domain_pages"), **common)
+        else:
+            results = crawler.crawl_url(url, prefer_browser=False, **common)
+        if not crawler.storage_available:
+            stats_cb("error", {"url": url, "error": "No storage available (MongoDB down, local store disabled)"})
+        else:
+            outcomes = crawler.store_results(results, job_id, extra={"keywords_filter": keywords})
+            stats_cb("stored", {**outcomes, "top_keywords": top_keywords(results, keywords)})
+    finally:
+        try:
+            crawler.close()
+        except Exception:
+            pass
+
+
+def _apply_limits(memory_mb: int, cpu_seconds: int) -> None:
+    if resource is None:
+        return
+    if memory_mb:
+        # RLIMIT_DATA rather than RLIMIT_AS: browsers reserve huge PROT_NONE ranges that AS would count
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_DATA, (limit, limit))
+    if cpu_seconds:
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds + 5))
+
+
+def _child_main(job_id: str, url: str, options: Dict, control, events, memory_mb: int, cpu_seconds: int) -> None:
+    _apply_limits(memory_mb, cpu_seconds)
+
+    def stats_cb(event: str, payload: Dict) -> None:
+        events.put((event, payload))
+
+    code = 0
+    try:
+        run_crawl(job_id, url, options, control, stats_cb)
+    except MemoryError:
+        events.put(("error", {"url": url, "error": f"Worker exceeded its {memory_mb} MB memory limit"}))
+        code = 1
+    except Exception as exc:
+        events.put(("error", {"url": url, "error": str(exc)}))
+        code = 1
+    finally:
+        events.put((_EXIT, {}))
+        events.close()
+        events.join_thread()
+    sys.exit(code)
+
+
+def is_crawl_worker() -> bool:
+    """True inside a spawned job worker (as opposed to the server or a server's own worker processes)."""
+    return multiprocessing.current_process().name.startswith(WORKER_NAME_PREFIX)
+
+
+def run_in_subprocess(job_id: str, url: str, options: Dict, control, stats_cb: StatsCallback,
+                      memory_mb: int = 0, cpu_seconds: int = 0) -> Optional[int]:
+    """Run the job in a spawned worker and relay its events; returns the worker's exit code."""
+    ctx = mp_context()
+    events = ctx.Queue()
+    process = ctx.Process(
+        target=_child_main,
+        args=(job_id, url, options, control, events, memory_mb, cpu_seconds),
+        name=f"{WORKER_NAME_PREFIX}{job_id}",
+        daemon=True,
+    )
+    process.start()
+    stop_requested_at: Optional[float] = None
+    exited = False
+    while not exited:
+        try:
+            event, payload = events.get(timeout=0.5)
+        except queue.Empty:
+            event, payload = None, None
+        if event == _EXIT:
+            exited = True
+        elif event is not None:
+            stats_cb(event, payload)
+        elif not process.is_alive():
+            break
+        if control.stop_event.is_set() and not exited:
+            stop_requested_at = stop_requested_at or time.monotonic()
+            if time.monotonic() - stop_requested_at > STOP_GRACE_SECONDS and process.is_alive():
+                logger.warning(f"Job {job_id}: worker did not stop in {STOP_GRACE_SECONDS:.0f}s, killing it")
+                process.kill()
+    process.join(timeout=10)
+    if process.is_alive():
+        process.kill()
+        process.join()
+    code = process.exitcode
+    if not exited and not control.stop_event.is_set():
+        stats_cb("error", {"url": url, "error": f"Worker process died (exit code {code})"})
+    events.close()
+    return code
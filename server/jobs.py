@@ -0,0 +1,234 @@
+"""Persistent job registry: one document per crawl job in the `jobs` collection.
+
+The manager keeps live jobs in memory; the registry mirrors their options and latest stats to
+MongoDB so that finished jobs survive restarts (history, audit trail, session listing) and jobs cut
+off by a crash or restart can be marked "interrupted" and optionally requeued.
+
+Stats writes are coalesced: the manager hands over the latest stats of a job as often as it likes,
+a background thread writes the last version of each changed job every flush_interval seconds.
+
+Crawls of registered sources (crawl_source, from the CLI or the scheduler) are recorded in the same
+collection with kind "source": one document per source, keyed by the source id (the session id of
+its documents) and overwritten by each run, written once the run has finished.
+
+Several servers can share the collection: each active job carries its owner ("host:pid") and a
+lease_until that the owning server keeps pushing forward. Recovery only takes jobs whose lease
+expired or whose owner process is gone from this host, never the live jobs of another instance.
+"""
+import logging
+import os
+import socket
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from pymongo import DESCENDING
+
+from config.settings import DATABASE_NAME, MONGODB_URI
+from crawler.db import JOBS_COLLECTION, connect
+
+logger = logging.getLogger(__name__)
+
+COLLECTION = JOBS_COLLECTION
+# Statuses of a job that was still queued or running when its server went away
+ACTIVE_STATUSES = ("queued", "running", "paused", "stopping")
+STATS_FIELDS = (
+    "status", "start_time", "last_update", "pages_attempted", "pages_success", "errors", "pages_per_sec",
+    "last_url", "last_error", "urls_suppressed", "suppressed_reasons", "documents_stored", "stop_reason",
+    "top_keywords",
+)
+
+
+def _timestamp(value: Optional[float]) -> Optional[datetime]:
+    return datetime.fromtimestamp(value) if value else None
+
+
+def _epoch(value: Optional[datetime]) -> Optional[float]:
+    return value.timestamp() if value else None
+
+
+def as_stats(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Persisted job in the shape of CrawlerStats.to_dict(), for job lists mixing live and past jobs."""
+    options = doc.get("options") or {}
+    return {
+        "job_id": doc["_id"],
+        "url": doc.get("url", ""),
+        "max_pages": options.get("max_pages", 0),
+        "status": doc.get("status", "unknown"),
+        "start_time": _epoch(doc.get("started_at")),
+        "last_update": _epoch(doc.get("last_update") or doc.get("updated_at")),
+        "pages_attempted": doc.get("pages_attempted", 0),
+        "pages_success": doc.get("pages_success", 0),
+        "errors": doc.get("errors", 0),
+        "pages_per_sec": doc.get("pages_per_sec", 0.0),
+        "last_url": doc.get("last_url", ""),
+        "last_error": doc.get("last_error", ""),
+        "queue_size": 0,
+        "urls_suppressed": doc.get("urls_suppressed", 0),
+        "suppressed_reasons": doc.get("suppressed_reasons") or {},
+        "priority": doc.get("priority", 0),
+        "queue_position": None,
+        "documents_stored": doc.get("documents_stored", 0),
+        "stop_reason": doc.get("stop_reason", ""),
+        "top_keywords": doc.get("top_keywords") or [],
+    }
+
+
+def open_job_registry(uri: str = MONGODB_URI, db_name: str = DATABASE_NAME) -> Optional["JobRegistry"]:
+    """Registry backed by MongoDB, or None when it is unreachable (jobs then stay in memory only)."""
+    try:
+        db = connect(uri, db_name, timeout_ms=4000)
+    except Exception as exc:
+        logger.warning(f"Job registry disabled, MongoDB unreachable: {exc}")
+        return None
+    return JobRegistry(db[COLLECTION])
+
+
+def _owner_gone(owner: Optional[str]) -> bool:
+    """True when the owner is a process of this host that no longer exists."""
+    host, _, pid = (owner or "").rpartition(":")
+    if host != socket.gethostname() or not pid.isdigit():
+        return False
+    if int(pid) == os.getpid():
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except OSError:  # alive, owned by another user
+        return False
+    return False
+
+
+class JobRegistry:
+    def __init__(self, collection, flush_interval: float = 2.0, lease_seconds: float = 60.0) -> None:
+        self.collection = collection
+        self.flush_interval = flush_interval
+        self.lease = timedelta(seconds=lease_seconds)
+        self._renewed_at = datetime.min
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        threading.Thread(target=self._run, name="job-registry", daemon=True).start()
+
+    # ----- writes ---------------------------------------------------------
+    def create(self, job_id: str, url: str, domain: str, options: Dict[str, Any], priority: int,
+               requeued_from: Optional[str] = None) -> None:
+        now = datetime.now()
+        doc = {
+            "_id": job_id,
+            "url": url,
+            "domain": domain,
+            "options": options,
+            "priority": priority,
+            "status": "queued",
+            "created_at": now,
+            "updated_at": now,
+            "owner": self.owner,
+            "lease_until": now + self.lease,
+        }
+        if requeued_from:
+            doc["requeued_from"] = requeued_from
+        try:
+            self.collection.insert_one(doc)
+        except Exception as exc:
+            logger.warning(f"Job {job_id} not recorded: {exc}")
+
+    def update(self, job_id: str, stats: Dict[str, Any]) -> None:
+        """Queue the latest stats of a job; terminal statuses are written without waiting for the tick."""
+        fields = {key: stats[key] for key in STATS_FIELDS if key in stats}
+        fields["started_at"] = _timestamp(fields.pop("start_time", None))
+        fields["last_update"] = _timestamp(fields.get("last_update"))
+        if fields.get("status") not in ACTIVE_STATUSES:
+            fields["finished_at"] = fields["last_update"] or datetime.now()
+        with self._lock:
+            self._pending.setdefault(job_id, {}).update(fields)
+        if "finished_at" in fields:
+            self._wakeup.set()
+
+    def mark_deleted(self, job_id: str) -> None:
+        """Jobs removed from the dashboard stay in the collection for the audit trail."""
+        with self._lock:
+            self._pending.setdefault(job_id, {})["deleted_at"] = datetime.now()
+        self._wakeup.set()
+
+    def delete_past(self, job_id: str) -> bool:
+        """Hide a job that is no longer in memory from the history; False if it is unknown."""
+        try:
+            result = self.collection.update_one({"_id": job_id, "deleted_at": None},
+                                                {"$set": {"deleted_at": datetime.now()}})
+        except Exception as exc:
+            logger.warning(f"Job {job_id} not deleted: {exc}")
+            return False
+        return result.matched_count > 0
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+            self.renew_leases()
+
+    def renew_leases(self) -> None:
+        """Push the lease of this server's active jobs forward (every third of the lease)."""
+        now = datetime.now()
+        if now - self._renewed_at < self.lease / 3:
+            return
+        try:
+            self.collection.update_many({"owner": self.owner, "status": {"$in": list(ACTIVE_STATUSES)}},
+                                        {"$set": {"lease_until": now + self.lease}})
+            self._renewed_at = now
+        except Exception as exc:
+            logger.warning(f"Job leases not renewed: {exc}")
+
+    def flush(self) -> None:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for job_id, fields in pending.items():
+            fields["updated_at"] = datetime.now()
+            try:
+                self.collection.update_one({"_id": job_id}, {"$set": fields})
+            except Exception as exc:
+                logger.warning(f"Job {job_id} stats not persisted: {exc}")
+                with self._lock:
+                    # Keep the newer values if the job changed since; retried on the next tick
+                    self._pending[job_id] = {**fields, **self._pending.get(job_id, {})}
+
+    # ----- reads ----------------------------------------------------------
+    def recover_interrupted(self) -> List[Dict[str, Any]]:
+        """Mark jobs left active by a dead server (lease expired or owner process gone) as "interrupted".
+
+        Jobs of a live instance sharing the collection keep renewing their lease and are left alone.
+        """
+        now = datetime.now()
+        active = self.collection.find({"status": {"$in": list(ACTIVE_STATUSES)}, "deleted_at": None,
+                                       "owner": {"$ne": self.owner}})
+        interrupted = [job for job in active
+                       if (job.get("lease_until") or datetime.min) < now or _owner_gone(job.get("owner"))]
+        if interrupted:
+            # Only jobs still active: two servers starting together cannot both requeue the same job
+            result = self.collection.update_many(
+                {"_id": {"$in": [job["_id"] for job in interrupted]}, "status": {"$in": list(ACTIVE_STATUSES)}},
+                {"$set": {"status": "interrupted", "interrupted_at": now}},
+            )
+            if result.modified_count < len(interrupted):
+                claimed = {doc["_id"] for doc in self.collection.find(
+                    {"_id": {"$in": [job["_id"] for job in interrupted]}, "interrupted_at": now}, {"_id": 1})}
+                interrupted = [job for job in interrupted if job["_id"] in claimed]
+            logger.warning(f"{len(interrupted)} job(s) interrupted by the last shutdown")
+        return interrupted
+
+    def history(self, limit: int = 50, exclude: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        query: Dict[str, Any] = {"deleted_at": None}
+        if exclude:
+            query["_id"] = {"$nin": list(exclude)}
+        return list(self.collection.find(query).sort("created_at", DESCENDING).limit(limit))
+
+    def sessions(self, limit: int = 8) -> List[Dict[str, Any]]:
+        """Finished jobs that stored documents, most recent first (indexed on finished_at)."""
+        query = {"finished_at": {"$ne": None}, "documents_stored": {"$gt": 0}}
+        return list(self.collection.find(query).sort("finished_at", DESCENDING).limit(limit))
+
+    def is_empty(self) -> bool:
+        return self.collection.find_one({}, {"_id": 1}) is None
@@ -2,18 +2,103 @@ import json
 import threading
 import time
 import uuid
-from dataclasses import dataclass, asdict
-from queue import Queue
-from typing import Dict, List, Optional
+from collections import deque
+from dataclasses import dataclass, asdict, field
+from typing import Any, Dict, List, Optional
 
-from crawler.web_crawler import WebCrawler
+from config.settings import (
+    CRAWLER_EXECUTOR,
+    CRAWLER_MAX_QUEUED,
+    CRAWLER_MAX_WORKERS,
+    CRAWLER_SSE_BUFFER,
+    CRAWLER_SSE_IDLE_TIMEOUT,
+    CRAWLER_SSE_POLICY,
+    CRAWLER_STATS_HZ,
+    CRAWLER_WORKER_CPU_SECONDS,
+    CRAWLER_WORKER_MEMORY_MB,
+)
+from crawler.canonical import url_domain
+from server.executor import EXECUTORS, mp_context, run_crawl, run_in_subprocess
+from server.jobs import JobRegistry, as_stats
+
+
+class QueueFullError(RuntimeError):
+    """Raised by CrawlerManager.start when max_queued jobs are already waiting."""
+
+
+# Returned by Subscription.get when buffered messages were discarded: send a fresh snapshot
+RESYNC = "__resync__"
+SSE_POLICIES = ("resync", "drop-oldest")
+
+
+class Subscription:
+    """Bounded message buffer of one SSE client.
+
+    On overflow, "resync" discards the buffer and makes the next get() return RESYNC (safe with
+    delta stats), "drop-oldest" discards the oldest message.
+    """
+
+    def __init__(self, maxsize: int = CRAWLER_SSE_BUFFER, policy: str = CRAWLER_SSE_POLICY) -> None:
+        if policy not in SSE_POLICIES:
+            raise ValueError(f"Unknown SSE policy: {policy} (choices: {', '.join(SSE_POLICIES)})")
+        self.maxsize = max(1, maxsize)
+        self.policy = policy
+        self.closed = False
+        self.dropped = 0
+        self.last_read = time.monotonic()
+        self._items: deque = deque()
+        self._resync = False
+        self._cond = threading.Condition()
+
+    def put(self, data: str) -> None:
+        with self._cond:
+            if self.closed:
+                return
+            if len(self._items) >= self.maxsize:
+                if self.policy == "resync":
+                    self.dropped += len(self._items)
+                    self._items.clear()
+                    self._resync = True
+                else:
+                    self._items.popleft()
+                    self.dropped += 1
+            if not self._resync or self.policy != "resync":
+                self._items.append(data)
+            self._cond.notify()
+
+    def get(self, timeout: Optional[float] = None) -> Optional[str]:
+        """Next message, RESYNC, or None on timeout / once closed."""
+        with self._cond:
+            self.last_read = time.monotonic()
+            if not self._items and not self._resync and not self.closed:
+                self._cond.wait(timeout)
+            self.last_read = time.monotonic()
+            if self.closed:
+                return None
+            if self._resync:
+                self._resync = False
+                return RESYNC
+            return self._items.popleft() if self._items else None
+
+    def stalled_for(self) -> float:
+        """Seconds since the client last took a message while some are waiting."""
+        with self._cond:
+            if not self._items and not self._resync:
+                return 0.0
+            return time.monotonic() - self.last_read
+
+    def close(self) -> None:
+        with self._cond:
+            self.closed = True
+            self._items.clear()
+            self._cond.notify_all()
 
 
 class CrawlerControl:
-    def __init__(self) -> None:
-        self.pause_event = threading.Event()
+    def __init__(self, event_factory=threading.Event) -> None:
+        self.pause_event = event_factory()
         self.pause_event.set()
-        self.stop_event = threading.Event()
+        self.stop_event = event_factory()
 
 
 @dataclass
@@ -31,26 +116,88 @@ class CrawlerStats:
     last_url: str
     last_error: str
     queue_size: int
+    urls_suppressed: int = 0
+    suppressed_reasons: Dict[str, int] = field(default_factory=dict)
+    priority: int = 0
+    queue_position: Optional[int] = None
+    documents_stored: int = 0
+    stop_reason: str = ""
+    top_keywords: List[Dict[str, Any]] = field(default_factory=list)
 
     def to_dict(self) -> Dict:
         return asdict(self)
 
 
 class CrawlerManager:
-    def __init__(self) -> None:
+    """Runs crawl jobs on a fixed pool of worker threads.
+
+    Jobs wait in a priority queue (higher priority first, then FIFO) with status "queued"; a worker
+    only picks a job whose domain is not already being crawled by another job.
+
+    Crawl events only update the in-memory stats; a ticker publishes the fields that changed since
+    the last publication (deltas) at stats_hz. Status changes and terminal events go out at once.
+
+    With a JobRegistry, every published change is also persisted to the `jobs` collection.
+    """
+
+    TERMINAL_EVENTS = ("done", "stopped", "stored")
+
+    def __init__(self, max_workers: int = CRAWLER_MAX_WORKERS, max_queued: int = CRAWLER_MAX_QUEUED,
+                 executor: str = CRAWLER_EXECUTOR, worker_memory_mb: int = CRAWLER_WORKER_MEMORY_MB,
+                 worker_cpu_seconds: int = CRAWLER_WORKER_CPU_SECONDS, stats_hz: float = CRAWLER_STATS_HZ,
+                 registry: Optional[JobRegistry] = None) -> None:
+        if executor not in EXECUTORS:
+            raise ValueError(f"Unknown executor: {executor} (choices: {', '.join(EXECUTORS)})")
+        self.executor = executor
+        self.worker_memory_mb = worker_memory_mb
+        self.worker_cpu_seconds = worker_cpu_seconds
+        self.registry = registry
         self._lock = threading.Lock()
         self._jobs: Dict[str, Dict] = {}
-        self._subscribers: List[Queue] = []
+        self._subscribers: List[Subscription] = []
+        self.max_workers = max(1, max_workers)
+        self.max_queued = max_queued
+        self._queue: List[str] = []
+        self._active_domains: set = set()
+        self._seq = 0
+        self._job_ready = threading.Condition(self._lock)
+        # Stats published per job (what subscribers have), and jobs changed since
+        self._published: Dict[str, Dict] = {}
+        self._dirty: set = set()
+        self._publish_lock = threading.Lock()
+        self._tick = 1.0 / stats_hz if stats_hz > 0 else 0.0
+        if self._tick:
+            threading.Thread(target=self._stats_ticker, name="stats-ticker", daemon=True).start()
+        self._workers = [
+            threading.Thread(target=self._worker_loop, name=f"crawl-worker-{i}", daemon=True)
+            for i in range(self.max_workers)
+        ]
+        for worker in self._workers:
+            worker.start()
 
-    def start(self, url: str, max_pages: int, content_types: List[str], keywords: List[str]) -> str:
+    def start(self, url: str, max_pages: int, content_types: List[str], keywords: List[str],
+              max_depth: Optional[int] = None, listing_pages: int = 0, wp_api: bool = False,
+              priority: int = 0, requeued_from: Optional[str] = None, budget: Optional[Dict] = None,
+              urls: Optional[List[str]] = None, domain_pages: Optional[Dict[str, int]] = None) -> str:
+        """Queue a crawl job.
+
+        urls: several seeds crawled by one job (url is the first one); max_pages is then the page
+        budget of each domain, overridden per domain by domain_pages.
+        """
         job_id = uuid.uuid4().hex[:8]
-        control = CrawlerControl()
+        domains = list(dict.fromkeys(url_domain(seed) for seed in (urls or [url])))
+        if urls:
+            domain_pages = {url_domain(domain): pages for domain, pages in (domain_pages or {}).items()}
+            total_pages = sum(domain_pages.get(domain, max_pages) for domain in domains)
+        else:
+            total_pages = max_pages
+        control = CrawlerControl(mp_context().Event if self.executor == "process" else threading.Event)
         stats = CrawlerStats(
             job_id=job_id,
             url=url,
-            max_pages=max_pages,
-            status="running",
-            start_time=time.time(),
+            max_pages=total_pages,
+            status="queued",
+            start_time=None,
             last_update=time.time(),
             pages_attempted=0,
             pages_success=0,
@@ -59,25 +206,52 @@ class CrawlerManager:
             last_url="",
             last_error="",
             queue_size=0,
-        )
-
-        thread = threading.Thread(
-            target=self._run_job,
-            args=(job_id, url, max_pages, content_types, keywords, control),
-            daemon=True,
+            priority=priority,
         )
 
         with self._lock:
+            if len(self._queue) >= self.max_queued:
+                raise QueueFullError(f"{len(self._queue)} jobs already queued (limit {self.max_queued})")
+            self._seq += 1
             self._jobs[job_id] = {
-                "thread": thread,
                 "control": control,
                 "stats": stats,
+                "url": url,
+                "domains": domains,
+                "max_pages": max_pages,
                 "content_types": content_types,
                 "keywords": keywords,
+                "max_depth": max_depth,
+                "listing_pages": listing_pages,
+                "wp_api": wp_api,
+                "budget": budget,
+                "urls": urls,
+                "domain_pages": domain_pages,
+                "order": (-priority, self._seq),
             }
+            self._queue.append(job_id)
+            self._queue.sort(key=lambda queued_id: self._jobs[queued_id]["order"])
+            moved = self._queue_positions()
+            self._job_ready.notify()
 
-        self._publish({"type": "job_started", "job": stats.to_dict()})
-        thread.start()
+        if self.registry is not None:
+            options = {
+                "max_pages": max_pages,
+                "content_types": content_types,
+                "keywords": keywords,
+                "max_depth": max_depth,
+                "listing_pages": listing_pages,
+                "wp_api": wp_api,
+                "budget": budget,
+                "urls": urls,
+                "domain_pages": domain_pages,
+            }
+            self.registry.create(job_id, url, domains[0], options, priority, requeued_from=requeued_from)
+        with self._publish_lock:
+            job_dict = stats.to_dict()
+            self._published[job_id] = job_dict
+            self._publish({"type": "job_queued", "job": job_dict})
+        self._flush_stats(moved)
         return job_id
 
     def pause(self, job_id: str) -> bool:
@@ -85,7 +259,8 @@ class CrawlerManager:
         if not job:
             return False
         job["control"].pause_event.clear()
-        self._set_status(job_id, "paused")
+        if job["stats"].status != "queued":
+            self._set_status(job_id, "paused")
         return True
 
     def resume(self, job_id: str) -> bool:
@@ -93,7 +268,8 @@ class CrawlerManager:
         if not job:
             return False
         job["control"].pause_event.set()
-        self._set_status(job_id, "running")
+        if job["stats"].status != "queued":
+            self._set_status(job_id, "running")
         return True
 
     def stop(self, job_id: str) -> bool:
@@ -102,41 +278,156 @@ class CrawlerManager:
             return False
         job["control"].stop_event.set()
         job["control"].pause_event.set()
-        self._set_status(job_id, "stopping")
+        if self._dequeue(job_id):
+            self._set_status(job_id, "stopped")
+        else:
+            self._set_status(job_id, "stopping")
         return True
 
     def delete(self, job_id: str) -> bool:
         job = self._jobs.get(job_id)
         if not job:
-            return False
+            # Past job listed from the registry: hide it from the history
+            return self.registry is not None and self.registry.delete_past(job_id)
         job["control"].stop_event.set()
         job["control"].pause_event.set()
+        self._dequeue(job_id)
+        with self._publish_lock:
+            with self._lock:
+                self._jobs.pop(job_id, None)
+                self._dirty.discard(job_id)
+            self._published.pop(job_id, None)
+            self._publish({"type": "job_deleted", "job_id": job_id})
+        if self.registry is not None:
+            self.registry.mark_deleted(job_id)
+        return True
+
+    def recover(self, requeue: bool = False) -> List[str]:
+        """Mark jobs cut off by the last shutdown as interrupted; requeue them with their options if asked."""
+        if self.registry is None:
+            return []
+        requeued = []
+        for doc in self.registry.recover_interrupted():
+            if not requeue:
+                continue
+            options = doc.get("options") or {}
+            try:
+                requeued.append(self.start(
+                    doc["url"],
+                    max_pages=options.get("max_pages", 5),
+                    content_types=options.get("content_types") or ["html"],
+                    keywords=options.get("keywords") or [],
+                    max_depth=options.get("max_depth"),
+                    listing_pages=options.get("listing_pages", 0),
+                    wp_api=options.get("wp_api", False),
+                    priority=doc.get("priority", 0),
+                    requeued_from=doc["_id"],
+                    budget=options.get("budget"),
+                    urls=options.get("urls"),
+                    domain_pages=options.get("domain_pages"),
+                ))
+            except QueueFullError:
+                break
+        return requeued
+
+    # ----- queue ----------------------------------------------------------
+    def _queue_positions(self) -> List[str]:
+        """Refresh queue_position of waiting jobs (caller holds the lock); returns the ids that moved."""
+        moved = []
+        for position, queued_id in enumerate(self._queue, start=1):
+            stats = self._jobs[queued_id]["stats"]
+            if stats.queue_position != position:
+                stats.queue_position = position
+                moved.append(queued_id)
+        return moved
+
+    def _dequeue(self, job_id: str) -> bool:
         with self._lock:
-            self._jobs.pop(job_id, None)
-        self._publish({"type": "job_deleted", "job_id": job_id})
+            if job_id not in self._queue:
+                return False
+            self._queue.remove(job_id)
+            self._jobs[job_id]["stats"].queue_position = None
+            moved = self._queue_positions()
+        self._flush_stats(moved)
         return True
 
-    def list_stats(self) -> List[Dict]:
+    def _next_job(self) -> Optional[str]:
+        """First queued job whose domains are all free (caller holds the lock)."""
+        for job_id in self._queue:
+            if self._active_domains.isdisjoint(self._jobs[job_id]["domains"]):
+                return job_id
+        return None
+
+    def _worker_loop(self) -> None:
+        while True:
+            with self._job_ready:
+                job_id = self._next_job()
+                while job_id is None:
+                    self._job_ready.wait()
+                    job_id = self._next_job()
+                self._queue.remove(job_id)
+                job = self._jobs[job_id]
+                self._active_domains.update(job["domains"])
+                stats: CrawlerStats = job["stats"]
+                stats.status = "running" if job["control"].pause_event.is_set() else "paused"
+                stats.start_time = stats.last_update = time.time()
+                stats.queue_position = None
+                moved = self._queue_positions()
+            self._flush_stats([job_id] + moved)
+            try:
+                self._run_job(
+                    job_id, job["url"], job["max_pages"], job["content_types"], job["keywords"], job["control"],
+                    job["max_depth"], job["listing_pages"], job["wp_api"], job["budget"],
+                    job["urls"], job["domain_pages"],
+                )
+            finally:
+                with self._job_ready:
+                    self._active_domains.difference_update(job["domains"])
+                    self._job_ready.notify_all()
+
+    def list_stats(self, history: int = 0) -> List[Dict]:
+        """Live jobs, followed by up to `history` past jobs from the registry (most recent first)."""
         with self._lock:
-            return [job["stats"].to_dict() for job in self._jobs.values()]
+            live = [job["stats"].to_dict() for job in self._jobs.values()]
+        if history and self.registry is not None:
+            try:
+                past = self.registry.history(history, exclude=[stats["job_id"] for stats in live])
+            except Exception:
+                past = []
+            live.extend(as_stats(doc) for doc in past)
+        return live
 
-    def subscribe(self) -> Queue:
-        q: Queue = Queue()
+    def snapshot(self) -> List[Dict]:
+        """Stats as last published, so that deltas sent after it apply exactly."""
+        with self._publish_lock:
+            with self._lock:
+                return [
+                    dict(self._published.get(job_id) or job["stats"].to_dict())
+                    for job_id, job in self._jobs.items()
+                ]
+
+    def subscribe(self, subscription: Optional[Subscription] = None) -> Subscription:
+        subscription = subscription or Subscription()
         with self._lock:
-            self._subscribers.append(q)
-        return q
+            self._subscribers.append(subscription)
+        return subscription
 
-    def unsubscribe(self, q: Queue) -> None:
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscription.close()
         with self._lock:
-            if q in self._subscribers:
-                self._subscribers.remove(q)
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
 
     def _publish(self, payload: Dict) -> None:
         data = json.dumps(payload)
         with self._lock:
             subscribers = list(self._subscribers)
-        for q in subscribers:
-            q.put(data)
+        for subscription in subscribers:
+            if subscription.stalled_for() > CRAWLER_SSE_IDLE_TIMEOUT:
+                # Client stopped reading (frozen tab, dead socket): free it, its stream ends on wake-up
+                self.unsubscribe(subscription)
+                continue
+            subscription.put(data)
 
     def _set_status(self, job_id: str, status: str) -> None:
         with self._lock:
@@ -145,46 +436,69 @@ class CrawlerManager:
                 return
             job["stats"].status = status
             job["stats"].last_update = time.time()
-            stats = job["stats"].to_dict()
-        self._publish({"type": "stats", "jobs": [stats]})
+        self._flush_stats([job_id])
+
+    # ----- stats publication ----------------------------------------------
+    def _stats_ticker(self) -> None:
+        while True:
+            time.sleep(self._tick)
+            self._flush_stats()
+
+    def _flush_stats(self, job_ids: Optional[List[str]] = None) -> None:
+        """Publish changed fields of the given jobs (default: every job changed since the last tick)."""
+        with self._publish_lock:
+            with self._lock:
+                if job_ids is None:
+                    ids = set(self._dirty)
+                else:
+                    ids = set(job_ids)
+                self._dirty -= ids
+                current = {job_id: self._jobs[job_id]["stats"].to_dict() for job_id in ids if job_id in self._jobs}
+            deltas = []
+            for job_id, stats in current.items():
+                last = self._published.get(job_id, {})
+                delta = {key: value for key, value in stats.items() if key not in last or last[key] != value}
+                if delta:
+                    delta["job_id"] = job_id
+                    deltas.append(delta)
+                    self._published[job_id] = stats
+                    if self.registry is not None:
+                        self.registry.update(job_id, stats)
+            if deltas:
+                self._publish({"type": "stats", "jobs": deltas})
 
-    def _run_job(self, job_id: str, url: str, max_pages: int, content_types: List[str], keywords: List[str], control: CrawlerControl) -> None:
-        crawler = WebCrawler(base_delay=0.5, max_retries_per_url=2, request_timeout=12)
+    def _run_job(self, job_id: str, url: str, max_pages: int, content_types: List[str], keywords: List[str],
+                 control: CrawlerControl, max_depth: Optional[int] = None, listing_pages: int = 0,
+                 wp_api: bool = False, budget: Optional[Dict] = None, urls: Optional[List[str]] = None,
+                 domain_pages: Optional[Dict[str, int]] = None) -> None:
+        options = {
+            "max_pages": max_pages,
+            "content_types": content_types,
+            "keywords": keywords,
+            "max_depth": max_depth,
+            "listing_pages": listing_pages,
+            "wp_api": wp_api,
+            "budget": budget,
+            "urls": urls,
+            "domain_pages": domain_pages,
+        }
 
         def stats_cb(event: str, payload: Dict) -> None:
             self._handle_event(job_id, event, payload)
 
         try:
-            results = crawler.crawl_url(
-                url,
-                content_types=content_types,
-                max_hits=max_pages,
-                keywords=keywords,
-                skip_recent=False,
-                prefer_browser=False,
-                control=control,
-                stats_cb=stats_cb,
-            )
-            stored = 0
-            if not crawler.mongo_available:
-                self._handle_event(job_id, "error", {"url": url, "error": "MongoDB unavailable"})
+            if self.executor == "process":
+                code = run_in_subprocess(
+                    job_id, url, options, control, stats_cb,
+                    memory_mb=self.worker_memory_mb, cpu_seconds=self.worker_cpu_seconds,
+                )
+                if code and not control.stop_event.is_set():
+                    self._set_status(job_id, "error")
             else:
-                for item in results:
-                    item["source_id"] = job_id
-                    item["keywords_filter"] = keywords
-                    try:
-                        crawler.data_collection.insert_one(item)
-                        stored += 1
-                    except Exception:
-                        pass
+                run_crawl(job_id, url, options, control, stats_cb)
         except Exception as exc:
             self._handle_event(job_id, "error", {"url": url, "error": str(exc)})
             self._set_status(job_id, "error")
-        finally:
-            try:
-                crawler.close()
-            except Exception:
-                pass
 
     def _handle_event(self, job_id: str, event: str, payload: Dict) -> None:
         with self._lock:
@@ -205,14 +519,25 @@ class CrawlerManager:
             elif event == "error":
                 stats.errors += 1
                 stats.last_error = payload.get("error", stats.last_error)
+            elif event == "suppressed":
+                stats.urls_suppressed += payload.get("count", 0)
+                stats.suppressed_reasons = payload.get("reasons", stats.suppressed_reasons)
             elif event == "stopped":
                 stats.status = "stopped"
+                stats.stop_reason = "stopped"
+            elif event == "budget":
+                stats.stop_reason = payload.get("reason", "")
             elif event == "done":
                 stats.status = "done"
+                stats.suppressed_reasons = payload.get("suppressed", stats.suppressed_reasons)
+            elif event == "stored":
+                stats.documents_stored = sum(payload.get(key, 0) for key in ("new", "changed", "unchanged", "spooled"))
+                stats.top_keywords = payload.get("top_keywords", stats.top_keywords)
 
             elapsed = max(now - (stats.start_time or now), 0.001)
             stats.pages_per_sec = stats.pages_success / elapsed
 
-            updated = stats.to_dict()
+            self._dirty.add(job_id)
 
-        self._publish({"type": "stats", "jobs": [updated]})
+        if event in self.TERMINAL_EVENTS or not self._tick:
+            self._flush_stats([job_id])
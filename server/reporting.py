@@ -1,4 +1,5 @@
 import json
+import os
 import re
 from collections import Counter
 from datetime import datetime
@@ -6,7 +7,11 @@ from typing import Any, Dict, List, Optional
 
 import pymongo
 
-from config.settings import DATABASE_NAME, MONGODB_URI
+from config.settings import CRAWLER_LOCAL_DB, DATABASE_NAME, MONGODB_URI
+from crawler.db import connect
+from crawler.local_store import LocalStore, open_local_store
+from crawler.storage import DocumentStore
+from server.jobs import JobRegistry
 
 ARTICLE_URL_REGEX = r"/\d{3,}.*\.html$"
 TOPIC_WORD_REGEX = re.compile(r"[^\W\d_]{4,}", flags=re.UNICODE)
@@ -68,6 +73,11 @@ def _extract_topics(docs: List[Dict[str, Any]]) -> Counter:
     return topics
 
 
+def _session_query(session_id: str) -> Dict[str, Any]:
+    """Documents created by the session or re-seen by it (unchanged re-crawls only add to seen_in)."""
+    return {"$or": [{"source_id": session_id}, {"seen_in": session_id}]}
+
+
 def _metric(key: str, label: str, value: Any, unit: str = "", fmt: str = "number") -> Dict[str, Any]:
     return {"key": key, "label": label, "value": value, "unit": unit, "format": fmt}
 
@@ -91,58 +101,94 @@ def _extract_json_payload(text: str) -> Optional[Dict[str, Any]]:
 class ReportingService:
     """Read-only analytics helper to summarize crawl sessions and invoke LLM reporting."""
 
-    def __init__(self) -> None:
+    def __init__(self, registry: Optional[JobRegistry] = None) -> None:
         self._init_error: Optional[str] = None
+        self.registry = registry
         self.client: Optional[pymongo.MongoClient] = None
         self.collection: Optional[pymongo.collection.Collection] = None
+        self.store: Optional[DocumentStore] = None
+        self.local: Optional[LocalStore] = None
 
         try:
-            self.client = pymongo.MongoClient(MONGODB_URI, serverSelectionTimeoutMS=4000)
-            self.client.admin.command("ping")
-            db = self.client[DATABASE_NAME]
+            db = connect(MONGODB_URI, DATABASE_NAME, timeout_ms=4000)
+            self.client = db.client
             self.collection = db["crawled_data"]
+            self.store = DocumentStore(db)
         except Exception as exc:  # pragma: no cover - defensive guard for runtime env
             self._init_error = str(exc)
             self.client = None
             self.collection = None
+            # Crawls made while MongoDB was down are still readable from the local SQLite store
+            if CRAWLER_LOCAL_DB and os.path.exists(CRAWLER_LOCAL_DB):
+                self.local = open_local_store(CRAWLER_LOCAL_DB)
 
     # ----- public API -----------------------------------------------------
     def list_sessions(self, limit: int = 8) -> List[Dict[str, Any]]:
-        """Return recent crawl sessions (by source_id) ordered by last seen document."""
+        """Return recent crawl sessions, most recent first.
+
+        Sessions come from the job registry, which records server jobs and source/scheduler crawls
+        when they finish. Without a registry (MongoDB down, local store) they are rebuilt from the
+        most recent documents.
+        """
         col = self._require_collection()
-        docs = col.find(
-            {},
-            {
-                "source_id": 1,
-                "timestamp": 1,
-                "url": 1,
-                "keywords_filter": 1,
-                "keywords": 1,
-            },
-        ).sort("timestamp", -1).limit(limit * 40)
+        if self.local is not None or self.registry is None:
+            return self._scan_sessions(col, limit)
+        return [self._job_session(job) for job in self.registry.sessions(limit)]
 
-        sessions: Dict[str, Dict[str, Any]] = {}
-        for doc in docs:
-            session_id = str(doc.get("source_id") or "unspecified")
-            timestamp = doc.get("timestamp")
+    @staticmethod
+    def _job_session(job: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "session_id": str(job["_id"]),
+            "count": job.get("documents_stored", 0),
+            "last_timestamp": _safe_iso(job.get("finished_at")),
+            "sample_url": job.get("url", ""),
+            "top_keywords": job.get("top_keywords") or [],
+            "keywords_filter": _clean_keywords((job.get("options") or {}).get("keywords") or []),
+            "status": job.get("status"),
+            "kind": job.get("kind", "job"),
+        }
 
-            entry = sessions.setdefault(
-                session_id,
+    def _scan_sessions(self, col: Optional[pymongo.collection.Collection], limit: int) -> List[Dict[str, Any]]:
+        """Sessions rebuilt from the documents themselves (no job registry available)."""
+        if self.local is not None:
+            docs = self.local.recent_documents(limit * 40)
+        else:
+            docs = col.find(
+                {},
                 {
-                    "session_id": session_id,
-                    "count": 0,
-                    "last_timestamp": None,
-                    "sample_url": "",
-                    "top_keywords": Counter(),
+                    "source_id": 1,
+                    "seen_in": 1,
+                    "timestamp": 1,
+                    "last_seen": 1,
+                    "url": 1,
+                    "keywords_filter": 1,
+                    "keywords": 1,
                 },
-            )
-            entry["count"] += 1
-            if timestamp and (entry["last_timestamp"] is None or timestamp > entry["last_timestamp"]):
-                entry["last_timestamp"] = timestamp
-            if not entry["sample_url"] and doc.get("url"):
-                entry["sample_url"] = doc["url"]
-            for kw in _clean_keywords(doc.get("keywords_filter") or doc.get("keywords") or []):
-                entry["top_keywords"][kw] += 1
+            ).sort("timestamp", -1).limit(limit * 40)
+
+        sessions: Dict[str, Dict[str, Any]] = {}
+        for doc in docs:
+            timestamp = doc.get("last_seen") or doc.get("timestamp")
+            session_ids = {str(sid) for sid in doc.get("seen_in") or [] if sid}
+            session_ids.add(str(doc.get("source_id") or "unspecified"))
+            for session_id in session_ids:
+                entry = sessions.setdefault(
+                    session_id,
+                    {
+                        "session_id": session_id,
+                        "count": 0,
+                        "last_timestamp": None,
+                        "sample_url": "",
+                        "top_keywords": Counter(),
+                    },
+                )
+                entry["count"] += 1
+                if timestamp and (entry["last_timestamp"] is None or timestamp > entry["last_timestamp"]):
+                    entry["last_timestamp"] = timestamp
+                if not entry["sample_url"] and doc.get("url"):
+                    entry["sample_url"] = doc["url"]
+                for kw in _clean_keywords(doc.get("keywords_filter") or doc.get("keywords") or []):
+                    entry["top_keywords"][kw] += 1
 
         result: List[Dict[str, Any]] = []
         for entry in sessions.values():
@@ -168,139 +214,26 @@ class ReportingService:
         if not resolved_session_id:
             raise RuntimeError("No crawl data found to build a report.")
 
-        match_query: Dict[str, Any] = {"source_id": resolved_session_id}
-        total_docs = col.count_documents(match_query)
+        if self.local is not None:
+            data = self.local.session_data(resolved_session_id, ARTICLE_URL_REGEX, sample_limit)
+        else:
+            data = self._mongo_session_data(col, resolved_session_id, sample_limit)
+        total_docs = data["total_docs"]
         if total_docs == 0:
             raise RuntimeError(f"No documents found for session '{resolved_session_id}'.")
-
-        news_query = {**match_query, "url": {"$regex": ARTICLE_URL_REGEX}}
-        news_docs = col.count_documents(news_query)
-        use_query = news_query if news_docs else match_query
-        if not news_docs:
-            news_docs = total_docs
-
-        # Time window
-        first_doc = col.find(use_query, {"timestamp": 1}).sort("timestamp", 1).limit(1)
-        last_doc = col.find(use_query, {"timestamp": 1}).sort("timestamp", -1).limit(1)
-        start_ts = next(iter(first_doc), {}).get("timestamp")
-        end_ts = next(iter(last_doc), {}).get("timestamp")
-
-        # Content type distribution
-        content_types = list(
-            col.aggregate(
-                [
-                    {"$match": use_query},
-                    {"$group": {"_id": "$content_type", "count": {"$sum": 1}}},
-                    {"$sort": {"count": -1}},
-                ]
-            )
-        )
-
-        # Domains
-        domains = list(
-            col.aggregate(
-                [
-                    {"$match": use_query},
-                    {
-                        "$project": {
-                            "domain": {
-                                "$arrayElemAt": [{"$split": ["$url", "/"]}, 2]
-                            }
-                        }
-                    },
-                    {"$group": {"_id": "$domain", "count": {"$sum": 1}}},
-                    {"$sort": {"count": -1}},
-                    {"$limit": 15},
-                ]
-            )
-        )
-
-        # Time histogram (bucketed by hour)
-        time_histogram = list(
-            col.aggregate(
-                [
-                    {"$match": use_query},
-                    {
-                        "$project": {
-                            "bucket": {
-                                "$dateToString": {"format": "%Y-%m-%d %H:00", "date": "$timestamp"}
-                            }
-                        }
-                    },
-                    {"$group": {"_id": "$bucket", "count": {"$sum": 1}}},
-                    {"$sort": {"_id": 1}},
-                ]
-            )
-        )
-
-        topic_docs = list(
-            col.find(
-                use_query,
-                {"title": 1, "description": 1},
-            ).limit(400)
-        )
-
-        topics_counter = _extract_topics(topic_docs)
+        news_docs = data["news_docs"] or total_docs
+        start_ts, end_ts = data["start_ts"], data["end_ts"]
+        content_types = data["content_types"]
+        domains = data["domains"]
+        time_histogram = data["time_histogram"]
+        length_stats = data["length_stats"]
+        unique_titles = data["unique_titles"]
+
+        topics_counter = _extract_topics(data["topic_docs"])
         top_topics = [{"topic": topic, "count": count} for topic, count in topics_counter.most_common(20)]
 
-        length_stats = next(
-            iter(
-                col.aggregate(
-                    [
-                        {"$match": use_query},
-                        {
-                            "$project": {
-                                "title_len": {"$strLenCP": {"$ifNull": ["$title", ""]}},
-                                "desc_len": {"$strLenCP": {"$ifNull": ["$description", ""]}},
-                                "content_len": {"$strLenCP": {"$ifNull": ["$content", ""]}},
-                            }
-                        },
-                        {
-                            "$group": {
-                                "_id": None,
-                                "avg_desc_len": {"$avg": "$desc_len"},
-                                "avg_content_len": {"$avg": "$content_len"},
-                                "missing_title": {"$sum": {"$cond": [{"$lte": ["$title_len", 5]}, 1, 0]}},
-                                "missing_desc": {"$sum": {"$cond": [{"$lte": ["$desc_len", 30]}, 1, 0]}},
-                                "thin_content": {"$sum": {"$cond": [{"$lte": ["$content_len", 500]}, 1, 0]}},
-                            }
-                        },
-                    ]
-                )
-            ),
-            {},
-        )
-
-        unique_titles = next(
-            iter(
-                col.aggregate(
-                    [
-                        {"$match": use_query},
-                        {"$match": {"title": {"$ne": None}}},
-                        {"$group": {"_id": "$title"}},
-                        {"$count": "count"},
-                    ]
-                )
-            ),
-            {},
-        ).get("count", 0)
-
-        # Latest documents for display + LLM context
-        latest_items_cursor = col.find(
-            use_query,
-            {
-                "title": 1,
-                "url": 1,
-                "description": 1,
-                "content_type": 1,
-                "keywords": 1,
-                "keywords_filter": 1,
-                "timestamp": 1,
-            },
-        ).sort("timestamp", -1).limit(sample_limit)
-
         latest_items = []
-        for doc in latest_items_cursor:
+        for doc in data["latest_items"]:
             latest_items.append(
                 {
                     "title": doc.get("title") or "(untitled)",
@@ -521,38 +454,19 @@ class ReportingService:
             raise RuntimeError("URL is required for page analysis.")
 
         col = self._require_collection()
-        query: Dict[str, Any] = {"url": url}
-        if session_id:
-            query["source_id"] = session_id
-
-        doc = col.find_one(
-            query,
-            {
-                "title": 1,
-                "description": 1,
-                "content": 1,
-                "timestamp": 1,
-                "content_type": 1,
-            },
-        )
-        if not doc and session_id:
-            doc = col.find_one(
-                {"url": url},
-                {
-                    "title": 1,
-                    "description": 1,
-                    "content": 1,
-                    "timestamp": 1,
-                    "content_type": 1,
-                },
-            )
+        if self.local is not None:
+            doc = self.local.find_document(url, session_id) if session_id else None
+            doc = doc or self.local.find_document(url)
+        else:
+            doc = self._find_page(col, session_id, url)
 
         if not doc:
             raise RuntimeError("Page not found in crawl data.")
 
         title = (doc.get("title") or "").strip()
         description = (doc.get("description") or "").strip()
-        content = (doc.get("content") or "").strip()
+        content = (doc.get("content") or "") if self.local is not None else self.store.load_content(doc)
+        content = content.strip()
         clipped_content = content[:6000]
 
         system_prompt = (
@@ -697,14 +611,194 @@ class ReportingService:
         }
 
     # ----- helpers -------------------------------------------------------
-    def _require_collection(self) -> pymongo.collection.Collection:
-        if self.collection is None:
+    def _find_page(self, col: pymongo.collection.Collection, session_id: Optional[str],
+                   url: str) -> Optional[Dict[str, Any]]:
+        query: Dict[str, Any] = {"url": url}
+        if session_id:
+            query.update(_session_query(session_id))
+
+        doc = col.find_one(
+            query,
+            {
+                "title": 1,
+                "description": 1,
+                "content": 1,
+                "content_stored": 1,
+                "timestamp": 1,
+                "content_type": 1,
+            },
+        )
+        if not doc and session_id:
+            doc = col.find_one(
+                {"url": url},
+                {
+                    "title": 1,
+                    "description": 1,
+                    "content": 1,
+                    "content_stored": 1,
+                    "timestamp": 1,
+                    "content_type": 1,
+                },
+            )
+        return doc
+
+    def _mongo_session_data(self, col: pymongo.collection.Collection, session_id: str,
+                            sample_limit: int) -> Dict[str, Any]:
+        """Raw aggregates for summarize_session, computed by MongoDB."""
+        match_query: Dict[str, Any] = _session_query(session_id)
+        total_docs = col.count_documents(match_query)
+        news_query = {**match_query, "url": {"$regex": ARTICLE_URL_REGEX}}
+        news_docs = col.count_documents(news_query)
+        use_query = news_query if news_docs else match_query
+
+        # Time window
+        first_doc = col.find(use_query, {"timestamp": 1}).sort("timestamp", 1).limit(1)
+        last_doc = col.find(use_query, {"timestamp": 1}).sort("timestamp", -1).limit(1)
+        start_ts = next(iter(first_doc), {}).get("timestamp")
+        end_ts = next(iter(last_doc), {}).get("timestamp")
+
+        # Content type distribution
+        content_types = list(
+            col.aggregate(
+                [
+                    {"$match": use_query},
+                    {"$group": {"_id": "$content_type", "count": {"$sum": 1}}},
+                    {"$sort": {"count": -1}},
+                ]
+            )
+        )
+
+        # Domains
+        domains = list(
+            col.aggregate(
+                [
+                    {"$match": use_query},
+                    {
+                        "$project": {
+                            "domain": {
+                                "$arrayElemAt": [{"$split": ["$url", "/"]}, 2]
+                            }
+                        }
+                    },
+                    {"$group": {"_id": "$domain", "count": {"$sum": 1}}},
+                    {"$sort": {"count": -1}},
+                    {"$limit": 15},
+                ]
+            )
+        )
+
+        # Time histogram (bucketed by hour)
+        time_histogram = list(
+            col.aggregate(
+                [
+                    {"$match": use_query},
+                    {
+                        "$project": {
+                            "bucket": {
+                                "$dateToString": {"format": "%Y-%m-%d %H:00", "date": "$timestamp"}
+                            }
+                        }
+                    },
+                    {"$group": {"_id": "$bucket", "count": {"$sum": 1}}},
+                    {"$sort": {"_id": 1}},
+                ]
+            )
+        )
+
+        topic_docs = list(
+            col.find(
+                use_query,
+                {"title": 1, "description": 1},
+            ).limit(400)
+        )
+
+        length_stats = next(
+            iter(
+                col.aggregate(
+                    [
+                        {"$match": use_query},
+                        {
+                            "$project": {
+                                "title_len": {"$strLenCP": {"$ifNull": ["$title", ""]}},
+                                "desc_len": {"$strLenCP": {"$ifNull": ["$description", ""]}},
+                                "content_len": {
+                                    "$ifNull": ["$content_length", {"$strLenCP": {"$ifNull": ["$content", ""]}}]
+                                },
+                            }
+                        },
+                        {
+                            "$group": {
+                                "_id": None,
+                                "avg_desc_len": {"$avg": "$desc_len"},
+                                "avg_content_len": {"$avg": "$content_len"},
+                                "missing_title": {"$sum": {"$cond": [{"$lte": ["$title_len", 5]}, 1, 0]}},
+                                "missing_desc": {"$sum": {"$cond": [{"$lte": ["$desc_len", 30]}, 1, 0]}},
+                                "thin_content": {"$sum": {"$cond": [{"$lte": ["$content_len", 500]}, 1, 0]}},
+                            }
+                        },
+                    ]
+                )
+            ),
+            {},
+        )
+
+        unique_titles = next(
+            iter(
+                col.aggregate(
+                    [
+                        {"$match": use_query},
+                        {"$match": {"title": {"$ne": None}}},
+                        {"$group": {"_id": "$title"}},
+                        {"$count": "count"},
+                    ]
+                )
+            ),
+            {},
+        ).get("count", 0)
+
+        # Latest documents for display + LLM context
+        latest_items = col.find(
+            use_query,
+            {
+                "title": 1,
+                "url": 1,
+                "description": 1,
+                "content_type": 1,
+                "keywords": 1,
+                "keywords_filter": 1,
+                "timestamp": 1,
+            },
+        ).sort("timestamp", -1).limit(sample_limit)
+
+        return {
+            "total_docs": total_docs,
+            "news_docs": news_docs,
+            "start_ts": start_ts,
+            "end_ts": end_ts,
+            "content_types": content_types,
+            "domains": domains,
+            "time_histogram": time_histogram,
+            "topic_docs": topic_docs,
+            "length_stats": length_stats,
+            "unique_titles": unique_titles,
+            "latest_items": list(latest_items),
+        }
+
+    def _require_collection(self) -> Optional[pymongo.collection.Collection]:
+        """MongoDB collection, or None when reading from the local SQLite store."""
+        if self.collection is None and self.local is None:
             raise RuntimeError(self._init_error or "Reporting unavailable: MongoDB connection failed.")
         return self.collection
 
     def _latest_session_id(self) -> Optional[str]:
         col = self._require_collection()
-        latest = col.find({"source_id": {"$exists": True}}, {"source_id": 1}).sort("timestamp", -1).limit(1)
+        if self.local is not None:
+            return self.local.latest_session_id()
+        if self.registry is not None:
+            sessions = self.registry.sessions(1)
+            if sessions:
+                return str(sessions[0]["_id"])
+        latest = col.find({"source_id": {"$exists": True}}, {"source_id": 1, "timestamp": 1}).sort("timestamp", -1).limit(1)
         doc = next(iter(latest), None)
         return str(doc["source_id"]) if doc and doc.get("source_id") else None
 
@@ -0,0 +1,38 @@
+import base64
+import gzip
+import hashlib
+
+from crawler.archive import ResponseArchive, iter_index, read_record
+
+
+def test_record_round_trip_and_payload_digest(tmp_path):
+    archive = ResponseArchive(str(tmp_path))
+    body = "<html><body>Élection</body></html>".encode("utf-8")
+    entry = archive.write("https://example.com/a", 200, {"Content-Type": "text/html", "Content-Encoding": "br"}, body)
+    archive.write("https://example.com/b", 404, {}, b"")
+    archive.close()
+
+    url, status, headers, read_body = read_record(str(tmp_path), entry)
+    assert (url, status, read_body) == ("https://example.com/a", 200, body)
+    assert headers["Content-Type"] == "text/html"
+    assert "Content-Encoding" not in headers  # le corps archivé est déjà décodé
+
+    segment = (tmp_path / entry["segment"]).read_bytes()
+    warc_head = gzip.decompress(segment).split(b"\r\n\r\n", 1)[0].decode()
+    expected = base64.b32encode(hashlib.sha1(body).digest()).decode()
+    assert f"WARC-Payload-Digest: sha1:{expected}" in warc_head.splitlines()
+
+
+def test_iter_index_latest_entry_and_domain_filter(tmp_path):
+    archive = ResponseArchive(str(tmp_path))
+    for url, body in [("https://example.com/a", b"v1"), ("https://example.com/a", b"v2"),
+                      ("https://www.example.com/b", b"b"), ("https://notexample.com/c", b"c"),
+                      ("https://example.com.evil.org/d", b"d")]:
+        archive.write(url, 200, {}, body)
+    archive.close()
+
+    urls = sorted(entry["url"] for entry in iter_index(str(tmp_path), domain="example.com"))
+    assert urls == ["https://example.com/a", "https://www.example.com/b"]
+    latest = [entry for entry in iter_index(str(tmp_path)) if entry["url"] == "https://example.com/a"]
+    assert len(latest) == 1 and read_record(str(tmp_path), latest[0])[3] == b"v2"
+    assert len(list(iter_index(str(tmp_path), latest_only=False))) == 5
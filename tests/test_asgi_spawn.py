@@ -0,0 +1,39 @@
+import asyncio
+import json
+import multiprocessing
+import os
+
+
+def _get_jobs(results) -> None:
+    # Hypercorn workers are spawned processes: parent_process() is set, yet they serve the API
+    os.environ["MONGODB_URI"] = "mongodb://127.0.0.1:1/?serverSelectionTimeoutMS=200"
+    from server.asgi import app
+
+    scope = {"type": "http", "method": "GET", "path": "/api/jobs", "raw_path": b"/api/jobs",
+             "query_string": b"", "headers": [], "http_version": "1.1", "scheme": "http",
+             "server": ("127.0.0.1", 8000), "client": ("127.0.0.1", 1234), "root_path": ""}
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    status = next(m["status"] for m in messages if m["type"] == "http.response.start")
+    body = b"".join(m.get("body", b"") for m in messages if m["type"] == "http.response.body")
+    results.put((status, body.decode("utf-8")))
+
+
+def test_asgi_app_serves_from_a_spawned_process():
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    process = ctx.Process(target=_get_jobs, args=(results,))
+    process.start()
+    try:
+        status, body = results.get(timeout=60)
+    finally:
+        process.join(timeout=30)
+    assert status == 200
+    assert json.loads(body)["jobs"] == []
@@ -0,0 +1,72 @@
+import threading
+import time
+
+import pytest
+
+from crawler.budget import CrawlBudget, CrawlInterrupted
+from server.manager import CrawlerControl
+
+
+def test_sleep_is_cut_short_by_a_stop():
+    control = CrawlerControl()
+    budget = CrawlBudget(control=control)
+    threading.Timer(0.2, control.stop_event.set).start()
+    started = time.monotonic()
+    with pytest.raises(CrawlInterrupted) as interrupted:
+        budget.sleep(30)
+    assert interrupted.value.reason == "stopped"
+    assert time.monotonic() - started < 2
+
+
+def test_sleep_ends_at_the_deadline():
+    budget = CrawlBudget(max_seconds=0.3)
+    started = time.monotonic()
+    with pytest.raises(CrawlInterrupted) as interrupted:
+        budget.sleep(30)
+    assert interrupted.value.reason == "time"
+    assert time.monotonic() - started < 2
+
+
+def test_paused_job_still_hits_its_deadline():
+    control = CrawlerControl()
+    control.pause_event.clear()
+    budget = CrawlBudget(max_seconds=0.3, control=control)
+    with pytest.raises(CrawlInterrupted) as interrupted:
+        budget.wait_if_paused()
+    assert interrupted.value.reason == "time"
+
+
+@pytest.mark.parametrize("limits, fetches, reason", [
+    ({"max_fetches": 2}, [10, 10], "fetches"),
+    ({"max_bytes": 100}, [60, 60], "bytes"),
+])
+def test_check_raises_once_a_limit_is_reached(limits, fetches, reason):
+    budget = CrawlBudget(**limits)
+    budget.check()
+    for size in fetches:
+        budget.add_fetch(size)
+    assert budget.exhausted() == reason
+    with pytest.raises(CrawlInterrupted) as interrupted:
+        budget.check()
+    assert interrupted.value.reason == reason
+
+
+def test_cap_timeout_follows_the_deadline():
+    assert CrawlBudget().cap_timeout(12) == 12
+    assert CrawlBudget(max_seconds=5).cap_timeout(12) <= 5
+    assert CrawlBudget(max_seconds=0.01).cap_timeout(12) == 1.0
+
+
+def test_call_maps_errors_of_a_stopped_job_to_an_interruption():
+    control = CrawlerControl()
+    budget = CrawlBudget(control=control)
+
+    def request():
+        control.stop_event.set()
+        raise ConnectionError("reset")
+
+    with pytest.raises(CrawlInterrupted) as interrupted:
+        budget.call(request)
+    assert interrupted.value.reason == "stopped"
+    with pytest.raises(ValueError):
+        CrawlBudget().call(lambda: int("x"))
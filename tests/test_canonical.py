@@ -0,0 +1,71 @@
+from datetime import datetime
+
+import mongomock
+import pytest
+
+from crawler.canonical import UrlCanonicalizer, url_domain
+from crawler.db import _v4_canonical_url_history
+
+
+@pytest.mark.parametrize("variant", [
+    "http://www.example.com/article/12/",
+    "https://example.com/article/12?utm_source=x&fbclid=abc",
+    "https://amp.example.com/article/12/amp",
+    "https://example.com:443//article/12#comments",
+    "https://EXAMPLE.com/article/12?outputType=amp",
+])
+def test_variants_share_one_key(variant):
+    assert UrlCanonicalizer().canonicalize(variant) == "https://example.com/article/12"
+
+
+def test_query_is_sorted_and_real_parameters_kept():
+    canonicalizer = UrlCanonicalizer()
+    assert canonicalizer.canonicalize("https://example.com/search?q=eau&page=2") == \
+        canonicalizer.canonicalize("https://example.com/search?page=2&q=eau&utm_medium=mail")
+    assert canonicalizer.canonicalize("https://example.com/search?page=2") != \
+        canonicalizer.canonicalize("https://example.com/search?page=3")
+
+
+def test_rel_canonical_alias():
+    canonicalizer = UrlCanonicalizer()
+    key = canonicalizer.register_alias("https://example.com/print/12", "https://example.com/article/12")
+    assert key == "https://example.com/article/12"
+    assert canonicalizer.canonicalize("http://www.example.com/print/12") == key
+    assert canonicalizer.is_alias("https://example.com/print/12")
+    assert canonicalizer.register_alias("https://example.com/article/12", "https://www.example.com/article/12/") is None
+
+
+def test_results_are_memoized():
+    canonicalizer = UrlCanonicalizer()
+    for _ in range(3):
+        canonicalizer.canonicalize("https://example.com/a")
+    assert canonicalizer.cache_info().hits == 2
+
+
+@pytest.mark.parametrize("url, domain", [
+    ("https://www.hespress.com/politique", "hespress.com"),
+    ("http://user@news.example.org:8080/a", "news.example.org"),
+    ("www.hespress.com", "hespress.com"),
+    ("", ""),
+])
+def test_url_domain(url, domain):
+    assert url_domain(url) == domain
+
+
+def test_migration_rewrites_normalize_url_keys_and_merges_duplicates():
+    history = mongomock.MongoClient()["crawler_test"]["url_history"]
+    old, new = datetime(2026, 1, 1), datetime(2026, 2, 1)
+    history.insert_many([
+        {"url": "http://www.example.com/a", "last_crawled": old, "success": True, "crawl_count": 2},
+        {"url": "https://example.com/a", "last_crawled": new, "success": False, "crawl_count": 1},
+        {"url": "https://www.example.com/b?utm_source=x", "last_crawled": old, "success": True, "crawl_count": 1},
+        {"url": "https://example.com/print/1", "canonical": "https://example.com/1", "last_crawled": old},
+    ])
+
+    _v4_canonical_url_history(history.database)
+
+    docs = {doc["url"]: doc for doc in history.find()}
+    assert set(docs) == {"https://example.com/a", "https://example.com/b", "https://example.com/print/1"}
+    assert docs["https://example.com/a"]["crawl_count"] == 3
+    assert docs["https://example.com/a"]["last_crawled"] == new
+    assert docs["https://example.com/a"]["success"] is True
@@ -0,0 +1,67 @@
+import http.server
+import socketserver
+import threading
+import time
+
+import pytest
+
+from server.manager import CrawlerControl
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    hits = {}
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        count = self.hits[self.path] = self.hits.get(self.path, 0) + 1
+        if self.path.startswith("/down") or (self.path.startswith("/flaky") and count == 1):
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = b"<html><head><title>Page</title></head><body><article>" + b"mot " * 300 + b"</article></body></html>"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class _Server(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    daemon_threads = True
+
+
+@pytest.fixture(scope="module")
+def base_url():
+    server = _Server(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+@pytest.fixture(scope="module")
+def crawler():
+    from crawler.web_crawler import WebCrawler
+
+    return WebCrawler(base_delay=0.01, use_browser_fallback=False, max_retries_per_url=5, mongo_timeout_ms=200,
+                      local_store_path=None, spool_dir=None)
+
+
+def test_stop_returns_promptly_against_a_503_endpoint(base_url, crawler):
+    events = []
+    control = CrawlerControl()
+    threading.Timer(1.0, control.stop_event.set).start()
+    started = time.monotonic()
+    pages = crawler.crawl_url(f"{base_url}/down", ["html"], control=control, skip_recent=False,
+                              stats_cb=lambda event, payload: events.append(event))
+    assert time.monotonic() - started < 3.0
+    assert pages == []
+    assert "stopped" in events
+
+
+def test_server_error_is_retried_by_the_crawler(base_url, crawler):
+    pages = crawler.crawl_url(f"{base_url}/flaky", ["html"], control=CrawlerControl(), skip_recent=False)
+    assert len(pages) == 1
+    assert _Handler.hits["/flaky"] == 2
@@ -0,0 +1,48 @@
+from crawler.frontier import TrapDetector
+
+
+def test_depth_verdict_is_not_cached():
+    traps = TrapDetector(max_depth=2)
+    assert traps.check("https://example.com/a", 3) == "depth"
+    # Same URL reached later through a shorter path
+    assert traps.check("https://example.com/a", 1) is None
+
+
+def test_url_verdicts_are_cached():
+    traps = TrapDetector()
+    url = "https://example.com/a/a/a/b"
+    assert traps.check(url, 0) == "repeated_path"
+    assert traps.check(url, 0) == "repeated_path"
+    assert traps.stats() == {"repeated_path": 1}
+
+
+def test_article_template_is_not_capped():
+    traps = TrapDetector(max_per_template=5)
+    assert all(traps.check(f"https://example.com/article/{n}", 1) is None for n in range(50))
+
+
+def test_calendar_templates_are_capped(caplog):
+    traps = TrapDetector(max_per_template=5)
+    days = [traps.check(f"https://example.com/agenda/2024/{m}/{d}", 1) for m in range(1, 4) for d in range(1, 4)]
+    assert days.count(None) == 5 and days.count("path_template") == 4
+    months = [traps.check(f"https://example.com/agenda/2024-{m:02d}", 1) for m in range(1, 13)]
+    assert months.count("path_template") == 7
+    assert sum("Gabarit plafonné" in record.message for record in caplog.records) <= 2
+
+
+def test_template_cap_can_be_disabled():
+    traps = TrapDetector(max_per_template=0)
+    assert all(traps.check(f"https://example.com/agenda/{n}/{n}", 1) is None for n in range(200))
+
+
+def test_parameter_cardinality_and_tracking():
+    traps = TrapDetector(max_param_values=3)
+    verdicts = [traps.check(f"https://example.com/search?color=c{n}", 1) for n in range(5)]
+    assert verdicts == [None, None, None, "param_cardinality", "param_cardinality"]
+    assert traps.strip_tracking("https://example.com/a;jsessionid=XYZ?id=1&utm_source=x&fbclid=1") == \
+        "https://example.com/a?id=1"
+
+
+def test_path_template():
+    assert TrapDetector.path_template("https://Example.com/2024-05-01/abcdef0123456789ab/7?b=1&a=2") == \
+        "example.com/{date}/{id}/{n}?a&b"
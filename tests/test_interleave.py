@@ -0,0 +1,73 @@
+import http.server
+import json
+import socketserver
+import threading
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from server.manager import CrawlerControl
+
+POSTS_PER_PAGE = 2
+PAGES = 4
+
+
+class _WordPress(http.server.BaseHTTPRequestHandler):
+    requests = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        if not parsed.path.startswith("/wp-json/wp/v2/posts"):
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        host = self.headers["Host"]
+        page = int(parse_qs(parsed.query)["page"][0])
+        self.requests.append((host.split(":")[0], page))
+        posts = [{
+            "link": f"http://{host}/post-{page}-{n}",
+            "title": {"rendered": f"Article {page}-{n}"},
+            "excerpt": {"rendered": "Résumé"},
+            "content": {"rendered": "<p>" + "texte " * 200 + "</p>"},
+            "date_gmt": "2026-01-01T00:00:00",
+        } for n in range(POSTS_PER_PAGE)]
+        body = json.dumps(posts).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("X-WP-TotalPages", str(PAGES))
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class _Server(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    daemon_threads = True
+
+
+@pytest.fixture
+def port():
+    server = _Server(("", 0), _WordPress)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server.server_address[1]
+    server.shutdown()
+
+
+def test_wordpress_domains_are_interleaved(port):
+    from crawler.web_crawler import WebCrawler
+
+    crawler = WebCrawler(base_delay=0.01, use_browser_fallback=False, mongo_timeout_ms=200,
+                         local_store_path=None, spool_dir=None)
+    _WordPress.requests.clear()
+    pages = crawler.crawl_seeds([f"http://127.0.0.1:{port}/", f"http://localhost:{port}/"], ["html"],
+                                max_hits=POSTS_PER_PAGE * PAGES, control=CrawlerControl(), skip_recent=False,
+                                wp_api=True)
+
+    assert len(pages) == 2 * POSTS_PER_PAGE * PAGES
+    hosts = [host for host, _ in _WordPress.requests]
+    assert sorted(hosts) == sorted(["127.0.0.1", "localhost"] * PAGES)
+    # Les deux API avancent à tour de rôle au lieu d'être lues l'une après l'autre
+    assert set(hosts[:PAGES]) == {"127.0.0.1", "localhost"}
@@ -0,0 +1,75 @@
+import socket
+import subprocess
+import sys
+from datetime import datetime, timedelta
+
+import mongomock
+import pytest
+
+from server.jobs import JobRegistry, as_stats
+
+
+@pytest.fixture
+def collection():
+    return mongomock.MongoClient()["crawler_test"]["jobs"]
+
+
+def _dead_pid():
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def _active_job(collection, job_id, owner, lease_until):
+    collection.insert_one({"_id": job_id, "url": f"https://{job_id}.example.com/", "status": "running",
+                           "owner": owner, "lease_until": lease_until, "created_at": datetime.now()})
+
+
+def test_recovery_only_takes_jobs_of_dead_servers(collection):
+    now = datetime.now()
+    host = socket.gethostname()
+    _active_job(collection, "expired", "other-host:1", now - timedelta(seconds=1))
+    _active_job(collection, "owner-gone", f"{host}:{_dead_pid()}", now + timedelta(minutes=5))
+    _active_job(collection, "live-remote", "other-host:1", now + timedelta(minutes=5))
+    registry = JobRegistry(collection, flush_interval=60)
+    _active_job(collection, "own", registry.owner, now - timedelta(seconds=1))
+
+    interrupted = {job["_id"] for job in registry.recover_interrupted()}
+
+    assert interrupted == {"expired", "owner-gone"}
+    statuses = {doc["_id"]: doc["status"] for doc in collection.find()}
+    assert statuses == {"expired": "interrupted", "owner-gone": "interrupted", "live-remote": "running",
+                        "own": "running"}
+    # Un second serveur qui démarre en même temps ne reprend rien de plus
+    assert JobRegistry(collection, flush_interval=60).recover_interrupted() == []
+
+
+def test_leases_are_renewed_for_active_jobs_only(collection):
+    registry = JobRegistry(collection, flush_interval=60, lease_seconds=30)
+    registry.create("running", "https://a.example.com/", "a.example.com", {}, 0)
+    registry.create("finished", "https://b.example.com/", "b.example.com", {}, 0)
+    registry.update("finished", {"status": "done", "last_update": 1.0})
+    registry.flush()
+    past = (datetime.now() - timedelta(minutes=1)).replace(microsecond=0)
+    collection.update_many({}, {"$set": {"lease_until": past}})
+
+    registry.renew_leases()
+
+    leases = {doc["_id"]: doc["lease_until"] for doc in collection.find()}
+    assert leases["running"] > datetime.now() + timedelta(seconds=20)
+    assert leases["finished"] == past
+
+
+def test_finished_job_keeps_its_stats(collection):
+    registry = JobRegistry(collection, flush_interval=60)
+    registry.create("job-1", "https://example.com/", "example.com", {"max_pages": 20}, 3)
+    registry.update("job-1", {"status": "stopped", "start_time": 1000.0, "last_update": 1060.0,
+                              "pages_success": 12, "documents_stored": 10, "stop_reason": "time"})
+    registry.flush()
+
+    doc = collection.find_one({"_id": "job-1"})
+    assert doc["finished_at"] == datetime.fromtimestamp(1060.0)
+    stats = as_stats(doc)
+    assert (stats["status"], stats["max_pages"], stats["pages_success"], stats["stop_reason"]) == \
+        ("stopped", 20, 12, "time")
+    assert [job["_id"] for job in registry.sessions()] == ["job-1"]
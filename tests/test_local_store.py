@@ -0,0 +1,36 @@
+import mongomock
+
+from crawler.local_store import LocalStore
+
+
+def test_sync_to_mongo_replays_local_data_once(tmp_path):
+    local = LocalStore(str(tmp_path / "local.db"))
+    try:
+        source_id = local.add_source({"url": "https://example.com/", "enabled": True, "max_hits": 10})
+        local.mark_crawled("https://example.com/a", success=True)
+        local.record_alias("https://example.com/print/a", "https://example.com/a")
+        long_text = "texte complet " * 500
+        assert local.save({"url": "https://example.com/a", "title": "A", "content": long_text},
+                          source_id=source_id) == "new"
+        assert local.save({"url": "https://example.com/a", "title": "A", "content": long_text},
+                          source_id="job-2") == "unchanged"
+        assert local.save({"url": "https://example.com/b", "title": "B", "content": "court"}) == "new"
+
+        db = mongomock.MongoClient()["crawler_test"]
+        assert local.sync_to_mongo(db) == {"sources": 1, "url_history": 2, "documents": 2}
+        assert local.sync_to_mongo(db) == {"sources": 0, "url_history": 0, "documents": 0}
+    finally:
+        local.close()
+
+    assert db["sources"].find_one()["url"] == "https://example.com/"
+    history = {doc["url"]: doc for doc in db["url_history"].find()}
+    assert history["https://example.com/a"]["success"] is True
+    assert history["https://example.com/print/a"]["canonical"] == "https://example.com/a"
+
+    doc = db["crawled_data"].find_one({"url": "https://example.com/a"})
+    assert doc["source_id"] == source_id
+    assert sorted(doc["seen_in"]) == sorted([source_id, "job-2"])
+    assert doc["version"] == 1
+    # Texte complet reversé compressé dans crawled_content, aperçu dans crawled_data
+    assert doc["content_stored"] and db["crawled_content"].count_documents({"_id": doc["_id"]}) == 1
+    assert db["crawled_data"].count_documents({}) == 2
@@ -0,0 +1,44 @@
+import time
+
+import mongomock
+import pytest
+
+from crawler import web_crawler as web_crawler_module
+from server import reporting as reporting_module
+from server.jobs import JobRegistry
+from server.reporting import ReportingService
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = mongomock.MongoClient()["crawler_test"]
+    monkeypatch.setattr(web_crawler_module, "connect", lambda *args, **kwargs: db)
+    monkeypatch.setattr(reporting_module, "connect", lambda *args, **kwargs: db)
+    return db
+
+
+def test_sessions_come_from_jobs_and_source_crawls(db):
+    registry = JobRegistry(db["jobs"], flush_interval=60)
+    registry.create("job-1", "https://example.com/", "example.com", {"keywords": ["climat"]}, 0)
+    now = time.time()
+    registry.update("job-1", {"status": "done", "start_time": now - 5, "last_update": now - 1, "documents_stored": 2,
+                              "top_keywords": [{"keyword": "climat", "count": 2}]})
+    registry.flush()
+
+    source_id = str(db["sources"].insert_one({
+        "url": "https://news.example.org/", "enabled": True, "content_types": ["html"], "max_hits": 5,
+    }).inserted_id)
+    crawler = web_crawler_module.WebCrawler(spool_dir=None, use_browser_fallback=False)
+    pages = [{"url": f"https://news.example.org/a{i}", "title": f"A{i}", "content": f"texte {i}",
+              "keywords": ["energie", "eau"] if i else ["energie"]} for i in range(3)]
+    crawler.crawl_url = lambda *args, **kwargs: pages
+    assert crawler.crawl_source(source_id) == 3
+
+    sessions = ReportingService(registry=registry).list_sessions()
+
+    assert [session["session_id"] for session in sessions] == [source_id, "job-1"]
+    source, job = sessions
+    assert source["kind"] == "source" and source["count"] == 3
+    assert source["top_keywords"] == [{"keyword": "energie", "count": 3}, {"keyword": "eau", "count": 2}]
+    assert job["top_keywords"] == [{"keyword": "climat", "count": 2}]
+    assert job["keywords_filter"] == ["climat"]
@@ -0,0 +1,23 @@
+import mongomock
+
+from crawler import spool as spool_module
+from crawler.spool import DEAD_LETTER, WriteSpool
+
+
+def test_poison_record_does_not_block_following_writes(tmp_path, monkeypatch):
+    client = mongomock.MongoClient()
+    monkeypatch.setattr(spool_module, "get_client", lambda uri: client)
+    spool = WriteSpool(str(tmp_path), "mongodb://unused", flush_interval=0.05)
+    try:
+        spool.save("crawler", {"title": "Sans URL", "content": "x"})  # KeyError dans DocumentStore.save
+        spool.save("crawler", {"url": "https://example.com/a", "title": "A", "content": "bonjour"})
+        spool.update("crawler", "url_history", {"url": "https://example.com/a"}, {"$set": {"ok": True}})
+        assert spool.drain(timeout=10)
+    finally:
+        spool.close()
+
+    assert client["crawler"]["crawled_data"].find_one({"url": "https://example.com/a"}) is not None
+    assert client["crawler"]["url_history"].find_one({"url": "https://example.com/a"})["ok"] is True
+    assert spool.stats["dropped"] == 1
+    dead = (tmp_path / DEAD_LETTER).read_text(encoding="utf-8").splitlines()
+    assert len(dead) == 1 and "Sans URL" in dead[0]
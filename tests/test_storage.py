@@ -0,0 +1,41 @@
+import mongomock
+
+from crawler.storage import DocumentStore, top_keywords
+
+
+def _page(content, title="Titre"):
+    return {"url": "https://example.com/a", "title": title, "content": content, "timestamp": "t"}
+
+
+def test_save_reports_new_changed_and_unchanged():
+    store = DocumentStore(mongomock.MongoClient()["crawler_test"])
+    assert store.save(_page("Premier texte"), source_id="job-1") == "new"
+    # Casse et espaces ignorés par le hash
+    assert store.save(_page("  premier   TEXTE "), source_id="job-2") == "unchanged"
+    assert store.save(_page("Second texte"), source_id="job-2") == "changed"
+
+    doc = store.documents.find_one({"url": "https://example.com/a"})
+    assert doc["version"] == 2
+    assert doc["source_id"] == "job-1"
+    assert sorted(doc["seen_in"]) == ["job-1", "job-2"]
+
+
+def test_delta_revisions_rebuild_every_version():
+    store = DocumentStore(mongomock.MongoClient()["crawler_test"], preview_chars=100)
+    texts = [("paragraphe %d. " % n) * 200 + "version %d" % n for n in range(1, 4)]
+    for text in texts:
+        store.save(_page(text))
+
+    doc = store.documents.find_one({"url": "https://example.com/a"})
+    assert doc["content_stored"] and len(doc["content"]) == 100
+    assert store.load_content(doc) == texts[-1]
+    assert [version["content"] for version in store.history("https://example.com/a")] == texts[::-1]
+    assert store.revisions.count_documents({}) == 2
+    # Révision compressée en delta: bien plus petite que le texte qu'elle remplace
+    assert all(len(revision["data"]) < revision["length"] // 4 for revision in store.revisions.find())
+
+
+def test_top_keywords_prefers_the_job_filter():
+    docs = [{"keywords": ["eau", "sol"]}, {"keywords": ["eau"]}, {}]
+    assert top_keywords(docs) == [{"keyword": "eau", "count": 2}, {"keyword": "sol", "count": 1}]
+    assert top_keywords(docs, ["climat"]) == [{"keyword": "climat", "count": 3}]
@@ -0,0 +1,50 @@
+import threading
+
+import pytest
+
+from server import manager as manager_module
+from server.manager import RESYNC, CrawlerManager, Subscription
+
+
+def test_resync_policy_replaces_the_backlog_with_one_resync():
+    subscription = Subscription(maxsize=3, policy="resync")
+    for n in range(5):
+        subscription.put(f"m{n}")
+    assert subscription.dropped == 3
+    assert subscription.get(timeout=0) == RESYNC
+    # Les messages suivants repartent après le snapshot
+    subscription.put("m5")
+    assert subscription.get(timeout=0) == "m5"
+    assert subscription.get(timeout=0) is None
+
+
+def test_drop_oldest_policy_keeps_the_latest_messages():
+    subscription = Subscription(maxsize=3, policy="drop-oldest")
+    for n in range(5):
+        subscription.put(f"m{n}")
+    assert subscription.dropped == 2
+    assert [subscription.get(timeout=0) for _ in range(4)] == ["m2", "m3", "m4", None]
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        Subscription(policy="block")
+
+
+def test_close_wakes_a_waiting_reader():
+    subscription = Subscription()
+    threading.Timer(0.1, subscription.close).start()
+    assert subscription.get(timeout=5) is None
+    subscription.put("late")
+    assert subscription.get(timeout=0) is None
+
+
+def test_stalled_subscriber_is_evicted_on_publish(monkeypatch):
+    monkeypatch.setattr(manager_module, "CRAWLER_SSE_IDLE_TIMEOUT", 0.0)
+    manager = CrawlerManager(max_workers=1, stats_hz=0)
+    reader, stalled = manager.subscribe(), manager.subscribe()
+    stalled.put("backlog")
+    stalled.last_read -= 1
+    manager._publish({"type": "ping"})
+    assert stalled.closed and not reader.closed
+    assert reader.get(timeout=0) == '{"type": "ping"}'